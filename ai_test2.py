@@ -1,11 +1,11 @@
 import pandas as pd
 import numpy as np
-import re
 import pickle
 import os
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import SGDClassifier
 from sklearn.pipeline import Pipeline
+from text_normalization import QueryNormalizer
 
 # --- CONFIGURATION ---
 DATASET_FILE = "dataset_train2.csv"
@@ -26,19 +26,8 @@ SYNONYMS = {
     "jawl": "telephone"
 }
 
-def preprocess_query(query):
-    """Cleans text and expands synonyms."""
-    text = str(query).lower().strip()
-    text = re.sub(r'[^\w\s]', '', text)
-    
-    words = text.split()
-    expanded = []
-    for w in words:
-        expanded.append(w)
-        if w in SYNONYMS:
-            expanded.append(SYNONYMS[w])
-            
-    return " ".join(expanded)
+# Same cleaning as every generation (text_normalization.py), with this generation's synonyms
+preprocess_query = QueryNormalizer(SYNONYMS)
 
 # --- 2. THE AI ENGINE CLASS ---
 class DjezzySearchAI:
@@ -59,7 +48,7 @@ class DjezzySearchAI:
             return
 
         # Create features
-        df['features'] = df['user_query'].apply(preprocess_query) + " | " + \
+        df['features'] = preprocess_query.many(df['user_query']) + " | " + \
                          df['product_name'] + " " + df['category'] + " " + df['description']
         
         X = df['features']
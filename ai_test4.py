@@ -1,155 +1,774 @@
 import pandas as pd
 import numpy as np
-import re
 import pickle
 import os
-from sklearn.feature_extraction.text import TfidfVectorizer
+import scipy.sparse as sp
+from collections import Counter
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, CountVectorizer, TfidfTransformer
 from sklearn.linear_model import SGDClassifier
 from sklearn.pipeline import Pipeline
+from sklearn.base import clone
+from fast_search import FactorizedScorer, CandidateIndex, PrefixCompleter, QueryCache, fingerprint_bytes, top_k_positions, SCORE_TOLERANCE
+from brain_format import write_brain, read_brain, brain_path_for
+from instrumentation import StageTimer
+from hashing_tfidf import OnlineTfidfTransformer
+from product_identity import unique_sku_positions
+# Query cleaning + SYNONYMS (shared with the Tk interface)
+from text_normalization import normalizer_for, preprocess_query
+from columnar_dataset import dataset_format, read_table, plain_frame, iter_frames
 
 # --- CONFIGURATION ---
 DATASET_FILE = "dataset_train4.csv"
 MODEL_FILE = "djezzy_ai_brain4.pkl"
+BATCH_MAX_PAIRS = 200000  # (query, product) pairs scored per chunk in search_many
+RESULT_COLUMNS = ['product_name', 'category', 'price', 'ai_score', 'description']
+# features='hashing': fixed number of hash buckets instead of a learned vocabulary
+HASH_BUCKETS = 2 ** 18
+# train_stream(): rows per CSV chunk, max passes over the file, rows held for shuffling
+STREAM_CHUNK_ROWS = 50000
+STREAM_EPOCHS = 30
+SHUFFLE_BUFFER = 200000
+TRAIN_COLUMNS = ['product_id', 'product_name', 'category', 'description', 'price', 'user_query', 'relevance_label']
+PRODUCT_COLUMNS = ['product_id', 'product_name', 'category', 'description', 'price']
+# Normalized layout (createdata4.py --normalized): a folder with the product table
+# once, plus (query, product_id, label) pairs in pairs.csv or part-*.csv partitions
+PRODUCTS_FILE = "products.csv"
+PAIRS_FILE = "pairs.csv"
+PAIR_COLUMNS = ['user_query', 'product_id', 'relevance_label']
 
-# --- 1. THE BRAIN: SYNONYM MAPPING (STRICTLY HARDWARE) ---
-# Removed: legend, storm, flexy, puce, net (User requirement: No internet offers)
-SYNONYMS = {
-    # Smartphones
-    "telephone": "smartphone",
-    "mobile": "smartphone",
-    "portable": "smartphone",
-    "jawl": "smartphone",
-    "hètf": "smartphone",
-    "tel": "smartphone",
-    "cellulaire": "smartphone",
-    
-    # Accessories (Audio/Charge)
-    "kitman": "ecouteurs",     # Common slang for earphones
-    "ecouteur": "ecouteurs",
-    "casque": "ecouteurs",
-    "airpods": "ecouteurs",
-    "earbuds": "ecouteurs",
-    "chargeur": "accessoire",
-    "cable": "accessoire",
-    "fil": "accessoire",
-    "usb": "accessoire",
-    "powerbank": "accessoire",
-    
-    # Modems/Routers
-    "wifi": "modem",           # Users say "wifi" when looking for a modem
-    "routeur": "modem",
-    "box": "modem",
-    "4g": "modem",
-    
-    # Tablets
-    "tab": "tablette",
-    "ipad": "tablette"
-}
-
-def preprocess_query(query):
-    """Cleans text and expands synonyms."""
-    if pd.isna(query):
-        return ""
-    text = str(query).lower().strip()
-    text = re.sub(r'[^\w\s]', '', text) # Remove special chars
-    
-    words = text.split()
-    expanded = []
-    for w in words:
-        expanded.append(w)
-        if w in SYNONYMS:
-            expanded.append(SYNONYMS[w])
-            
-    return " ".join(expanded)
+def dataset_files(path):
+    """A dataset is one CSV, or a folder of part-*.csv partitions (createdata4.py --workers).
+
+    For a normalized folder these are the pair files (pairs.csv if there are no partitions).
+    """
+    if not os.path.isdir(path):
+        return [path]
+    parts = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.startswith("part-") and f.endswith(".csv")]
+    if not parts and os.path.exists(os.path.join(path, PAIRS_FILE)):
+        parts = [os.path.join(path, PAIRS_FILE)]
+    if not parts:
+        raise FileNotFoundError(f"no part-*.csv partitions in '{path}'")
+    return parts
+
+def is_normalized(path):
+    """True for a dataset folder with a products table (products.csv + pair files)."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, PRODUCTS_FILE))
+
+def read_products(path):
+    """Product table of a normalized dataset, one row per product_id."""
+    products = pd.read_csv(os.path.join(path, PRODUCTS_FILE), usecols=PRODUCT_COLUMNS, dtype={'product_id': str})
+    return products.drop_duplicates(subset=['product_id']).reset_index(drop=True)
+
+def load_normalized(path):
+    """(products, pairs) of a normalized dataset. pairs['product_row'] is the
+    position of the pair's product in `products`; pairs whose id is not in the
+    table are dropped."""
+    products = read_products(path)
+    dtypes = {'product_id': str, 'user_query': str}
+    pairs = pd.concat([pd.read_csv(f, usecols=PAIR_COLUMNS, dtype=dtypes) for f in dataset_files(path)],
+                      ignore_index=True)
+    rows = pd.Index(products['product_id']).get_indexer(pairs['product_id'])
+    unknown = rows < 0
+    if unknown.any():
+        print(f"[WARN] {int(unknown.sum())} pairs reference a product_id missing from '{PRODUCTS_FILE}', skipped.")
+        pairs, rows = pairs[~unknown].reset_index(drop=True), rows[~unknown]
+    pairs['product_row'] = rows
+    return products, pairs
+
+def collapse_duplicates(products):
+    """Keeps the first listing of every SKU (same normalized name, description and price)."""
+    positions = unique_sku_positions(products['product_name'], products['price'], products['description'])
+    if len(positions) == len(products):
+        return products
+    print(f"[AI] Collapsed {len(products) - len(positions)} duplicate listings ({len(positions)} unique products).")
+    return products.iloc[positions].copy()
+
+def product_text(df):
+    """Product half of the training string (also the catalog's search_text)."""
+    return df['product_name'].fillna('') + " " + \
+           df['category'].fillna('') + " " + \
+           df['description'].fillna('') + " " + \
+           df['price'].astype(str)
+
+def product_pairs(df):
+    """(products, pairs) of a denormalized dataset frame.
+
+    products holds every distinct combination of the product columns once,
+    in order of first appearance (row labels of its first row);
+    pairs['product_row'] is the position of each row's combination. On
+    categorical (dictionary-encoded) columns this groups integer codes.
+    """
+    rows = df.groupby(PRODUCT_COLUMNS, observed=True, sort=False, dropna=False).ngroup().to_numpy()
+    first = np.unique(rows, return_index=True)[1]
+    pairs = df[['user_query', 'relevance_label']].assign(product_row=rows)
+    return df[PRODUCT_COLUMNS].iloc[first], pairs
+
+def make_features(df):
+    """Training strings "QUERY | PRODUCT INFO" for the rows of a dataset frame."""
+    return preprocess_query.many(df['user_query']) + " | " + product_text(df)
+
+def pair_counts(vectorizer, count, queries, products, query_codes, product_codes):
+    """Term counts of the rows "queries[q] | products[p]", vectorizing each text once.
+
+    With a 'word' analyzer the tokens of "q | p" are the tokens of q followed by
+    those of p ('|' is not a word character), so a row's n-grams are the
+    query's, the product's and the n-grams spanning the separator. The latter
+    only depend on the last (n-1) query tokens (tail) and the first (n-1)
+    product tokens (head), and are counted once per distinct (tail, head) as
+    count(tail + head) - count(tail) - count(head). `count` maps a list of
+    strings to a count matrix (a fitted vectorizer's transform, or a
+    fit_transform that learns the vocabulary from exactly these strings).
+    """
+    n = vectorizer.ngram_range[1] - 1
+    preprocess, tokenize = vectorizer.build_preprocessor(), vectorizer.build_tokenizer()
+    edge = lambda texts, part: pd.factorize(np.array([" ".join(part(tokenize(preprocess(t)))) if n else ""
+                                                      for t in texts], dtype=object))
+    tail_codes, tails = edge(queries, lambda tokens: tokens[-n:])
+    head_codes, heads = edge(products, lambda tokens: tokens[:n])
+    # Distinct (tail, head) combinations among the rows
+    combo_codes, combos = pd.factorize(tail_codes[query_codes] * len(heads) + head_codes[product_codes])
+    spans = [tails[c // len(heads)] + " " + heads[c % len(heads)] for c in combos]
+
+    docs = list(queries) + list(products) + list(tails) + list(heads) + spans
+    counts = sp.csr_matrix(count(docs))
+    ends = np.cumsum([len(queries), len(products), len(tails), len(heads), len(spans)])
+    Q, P, T, H, S = (counts[start:end] for start, end in zip(np.r_[0, ends[:-1]], ends))
+    boundary = S - T[combos // len(heads)] - H[combos % len(heads)]
+
+    X = Q[query_codes] + P[product_codes] + boundary[combo_codes]
+    X.eliminate_zeros()     # the idf counts stored entries
+    return X
+
+def aggregate_rows(*codes):
+    """Collapses rows that are equal in every code array (non-negative ints).
+
+    Returns (first, counts): the position of the first row of each distinct
+    combination, in order of first appearance, and how many rows it stands for.
+    """
+    key = np.zeros(len(codes[0]), dtype=np.int64)
+    for c in codes:
+        c = np.asarray(c, dtype=np.int64)
+        # Re-factorized at every step, so the combined key never exceeds the row count
+        key = pd.factorize(key * (int(c.max(initial=0)) + 1) + c)[0]
+    first = np.unique(key, return_index=True)[1]
+    return first, np.bincount(key).astype(np.float64)
+
+def weighted_idf(counts, weights, smooth_idf=True):
+    """TfidfTransformer's idf when row i stands for weights[i] identical documents."""
+    df = np.bincount(counts.indices, weights=np.repeat(weights, np.diff(counts.indptr)), minlength=counts.shape[1])
+    return np.log((weights.sum() + smooth_idf) / (df + smooth_idf)) + 1
 
 # --- 2. THE AI ENGINE CLASS ---
 class DjezzySearchAI:
-    def __init__(self):
-        self.product_db = None
+    def __init__(self, fast_scoring=True, instrument=False, features='tfidf', n_buckets=HASH_BUCKETS,
+                 dedup_rows=True):
+        self._product_db = None
+        # (columns, row_labels) of a loaded brain, turned into product_db on first use
+        self._brain_columns = None
+        # Factorized scorer: product side vectorized once, only the query per search
+        self.fast_scoring = fast_scoring
+        self.scorer = None
+        # Preallocated score buffer, reused by every search()
+        self._score_buffer = None
+        # Result columns as plain arrays, so a search only gathers k rows
+        self._result_arrays = None
+        # Inverted index that picks which products reach the classifier
+        self.index = None
+        # Prefix autocomplete for the search entry (names, codes, synonyms, popular queries)
+        self.completer = None
+        # LRU cache of results, invalidated whenever the model fingerprint changes
+        self.cache = QueryCache()
+        self.fingerprint = None
+        # Query cleaning of the loaded model (older brains/pickles: their generation's synonyms)
+        self.preprocess = preprocess_query
+        # Per-stage timers for search() and train() (off unless instrument=True;
+        # timer.profile = True adds a cProfile capture)
+        self.timer = StageTimer(enabled=instrument)
+        # train(): identical (query, product, label) rows are fitted once with
+        # their count as sample_weight instead of once per copy
+        self.dedup_rows = dedup_rows
         # The 'Brain' (Pipeline)
         # Using SGDClassifier (Logistic Regression) for fast, efficient text classification
-        self.pipeline = Pipeline([
-            ('tfidf', TfidfVectorizer(analyzer='word', ngram_range=(1, 3))),
-            ('clf', SGDClassifier(loss='log_loss', penalty='l2', alpha=1e-4, random_state=42))
-        ])
+        if features == 'hashing':
+            # Constant memory: n-grams hashed into n_buckets, idf counted per bucket
+            self.pipeline = Pipeline([
+                ('hash', HashingVectorizer(analyzer='word', ngram_range=(1, 3), n_features=n_buckets,
+                                           alternate_sign=False, norm=None)),
+                ('tfidf', OnlineTfidfTransformer()),
+                ('clf', SGDClassifier(loss='log_loss', penalty='l2', alpha=1e-4, random_state=42))
+            ])
+        elif features == 'tfidf':
+            self.pipeline = Pipeline([
+                ('tfidf', TfidfVectorizer(analyzer='word', ngram_range=(1, 3))),
+                ('clf', SGDClassifier(loss='log_loss', penalty='l2', alpha=1e-4, random_state=42))
+            ])
+        else:
+            raise ValueError(f"features must be 'tfidf' or 'hashing', got '{features}'")
         
+    @property
+    def product_db(self):
+        """Product table. For a loaded brain it is only built when something needs it:
+        search() reads the memory-mapped columns, so serving processes share one copy."""
+        if self._product_db is None and self._brain_columns is not None:
+            columns, row_labels = self._brain_columns
+            self._product_db = pd.DataFrame(columns, index=row_labels)
+        return self._product_db
+
+    @product_db.setter
+    def product_db(self, value):
+        self._product_db = value
+        self._brain_columns = None
+
     def train(self, csv_path):
+        with self.timer.call('train'):
+            return self._train(csv_path)
+
+    def _train(self, csv_path):
+        timer = self.timer
         print(f"[AI] Loading dataset from {csv_path}...")
+        if is_normalized(csv_path):
+            return self._train_normalized(csv_path)
+        columnar = dataset_format(csv_path) != 'csv'
         try:
-            df = pd.read_csv(csv_path)
+            with timer.stage('load_csv'):
+                if columnar:
+                    # Parquet / Arrow: memory-mapped, only TRAIN_COLUMNS, product columns categorical
+                    df = read_table(csv_path, TRAIN_COLUMNS).to_pandas()
+                else:
+                    df = pd.concat([pd.read_csv(f) for f in dataset_files(csv_path)], ignore_index=True)
         except FileNotFoundError:
             print(f"[ERROR] Dataset '{csv_path}' not found. Make sure it is in the same folder.")
             return
+        except (ImportError, OSError, KeyError, ValueError) as e:
+            if not columnar:
+                raise
+            print(f"[ERROR] Cannot read dataset '{csv_path}': {e}")
+            return
 
         # Create features: We combine Query + Product Info to learn the match pattern
-        # Format: "QUERY | PRODUCT INFO"
-        df['features'] = df['user_query'].apply(preprocess_query) + " | " + \
-                         df['product_name'].fillna('') + " " + \
-                         df['category'].fillna('') + " " + \
-                         df['description'].fillna('') + " " + \
-                         df['price'].astype(str)
-        
-        X = df['features']
-        y = df['relevance_label']
+        # Format: "QUERY | PRODUCT INFO", with each distinct product text built once
+        with timer.stage('group_products'):
+            products, pairs = product_pairs(df)
+            if columnar:
+                products = plain_frame(products)
 
         print(f"[AI] Training model on {len(df)} examples...")
-        self.pipeline.fit(X, y)
+        self._fit_pairs(products, pairs)
         
         # Prepare the searchable database 
         # We drop duplicates to have a clean list of unique products to search against later
-        self.product_db = df[['product_id', 'product_name', 'category', 'description', 'price']].drop_duplicates(subset=['product_id']).copy()
-        
+        with timer.stage('dedup_products'):
+            self._set_products(products.drop_duplicates(subset=['product_id']).copy())
+
+        # Queries that led to a relevant product are the "popular past queries"
+        self._finish_training(pairs.loc[pairs['relevance_label'] == 1, 'user_query'])
+
+    def _train_normalized(self, path):
+        """train() on a products table + (query, product_id, label) pairs."""
+        timer = self.timer
+        try:
+            with timer.stage('load_csv'):
+                products, pairs = load_normalized(path)
+        except FileNotFoundError:
+            print(f"[ERROR] Dataset '{path}' has no pair files (pairs.csv or part-*.csv).")
+            return
+        if pairs.empty:
+            print(f"[ERROR] Dataset '{path}' has no pairs to train on.")
+            return
+
+        print(f"[AI] Training model on {len(pairs)} examples ({len(products)} products)...")
+        self._fit_pairs(products, pairs)
+        with timer.stage('dedup_products'):
+            self._set_products(products.iloc[np.sort(pairs['product_row'].unique())].copy())
+        self._finish_training(pairs.loc[pairs['relevance_label'] == 1, 'user_query'])
+
+    def _fit_pairs(self, products, pairs):
+        """Fits the pipeline on the rows "pairs.user_query | products[pairs.product_row]".
+
+        Each distinct product text and query is vectorized once and the pair
+        rows are assembled from them by index (see pair_counts), giving the
+        same matrix as the row strings. With dedup_rows, rows with the same
+        cleaned query, product and label are one row weighted by their count:
+        idf counts it that many times (same idf as the full data) and the
+        classifier gets the count as sample_weight (same objective).
+        """
+        timer = self.timer
+        y = pairs['relevance_label'].to_numpy()
+        steps = self.pipeline.named_steps
+        vec = steps['hash'] if 'hash' in steps else steps['tfidf']
+        if not self._joinable(vec):
+            # Analyzer settings the join cannot reproduce: build the row strings after all
+            # (no dedup: the vectorizer would learn its vocabulary/idf from the unique rows)
+            with timer.stage('features'):
+                rows = products.iloc[pairs['product_row']].reset_index(drop=True)
+                X = make_features(rows.assign(user_query=pairs['user_query']))
+            with timer.stage('fit'):
+                self.pipeline.fit(X, y)
+            return
+
+        with timer.stage('features'):
+            query_codes, queries = pd.factorize(preprocess_query.many(pairs['user_query']))
+            product_codes = pairs['product_row'].to_numpy()
+            weights = None
+            if self.dedup_rows:
+                first, weights = aggregate_rows(query_codes, product_codes, pd.factorize(y)[0])
+                query_codes, product_codes, y = query_codes[first], product_codes[first], y[first]
+                print(f"[AI] {len(pairs)} rows -> {len(first)} unique (query, product, label) rows "
+                      f"({len(pairs) / len(first):.2f}x).")
+            product_codes, used = pd.factorize(product_codes)
+            texts = product_text(products.iloc[used])
+            if 'hash' in steps:
+                counts = pair_counts(vec, vec.transform, queries, texts, query_codes, product_codes)
+                weighting = steps['tfidf'].fit(counts, sample_weight=weights)
+            else:
+                params = CountVectorizer().get_params()
+                counter = CountVectorizer(**{k: v for k, v in vec.get_params().items() if k in params})
+                counts = pair_counts(vec, counter.fit_transform, queries, texts, query_codes, product_codes)
+                weighting = TfidfTransformer(norm=vec.norm, use_idf=vec.use_idf, smooth_idf=vec.smooth_idf,
+                                             sublinear_tf=vec.sublinear_tf).fit(counts)
+                if weights is not None:
+                    weighting.idf_ = weighted_idf(counts, weights, vec.smooth_idf)
+                # The vectorizer's fitted state: what fit() on the row strings learns
+                vec.vocabulary_ = counter.vocabulary_
+                vec.idf_ = weighting.idf_
+        with timer.stage('fit'):
+            # Counts scaled to mean 1: SGD minimizes mean(weight * loss) + alpha * penalty,
+            # so this is the objective of the full data (raw counts would weaken alpha)
+            steps['clf'].fit(weighting.transform(counts), y,
+                             sample_weight=None if weights is None else weights / weights.mean())
+
+    @staticmethod
+    def _joinable(vec):
+        """Whether pair_counts reproduces this vectorizer on "q | p" strings."""
+        if vec.analyzer != 'word' or vec.preprocessor is not None or vec.tokenizer is not None \
+                or vec.get_stop_words() is not None or vec.binary:
+            return False
+        if isinstance(vec, TfidfVectorizer):
+            # Vocabulary pruning counts documents, which the join does not have
+            return vec.use_idf and vec.min_df == 1 and vec.max_df == 1.0 and vec.max_features is None
+        return True
+
+    def train_stream(self, csv_path, chunk_rows=STREAM_CHUNK_ROWS, epochs=STREAM_EPOCHS,
+                     shuffle_buffer=SHUFFLE_BUFFER, seed=42):
+        """Out-of-core training: the CSV is read in chunks, never as a whole."""
+        with self.timer.call('train'):
+            return self._train_stream(csv_path, chunk_rows, epochs, shuffle_buffer, seed)
+
+    def _train_stream(self, csv_path, chunk_rows, epochs, shuffle_buffer, seed):
+        """Needs a vectorizer that does not learn from the whole file: the hashing
+        configuration (stateless hashing + per-bucket idf counted chunk by chunk)
+        or an already fitted TfidfVectorizer. Pass 1 counts idf and collects the
+        catalog and query log; every epoch then streams the file again through a
+        shuffle buffer into SGDClassifier.partial_fit, and stops early with the
+        tol / n_iter_no_change rule of SGDClassifier.fit, applied to the
+        progressive log loss (each batch scored before it is learned). Memory is bounded by
+        chunk_rows + shuffle_buffer rows, the catalog and the distinct positive
+        queries, not by the file size.
+        """
+        timer = self.timer
+        steps = self.pipeline.named_steps
+        hashing = 'hash' in steps
+        if not hashing and not hasattr(steps['tfidf'], 'vocabulary_'):
+            print("[ERROR] Streaming training needs features='hashing' or a fitted TfidfVectorizer.")
+            return
+        if not os.path.exists(csv_path):
+            print(f"[ERROR] Dataset '{csv_path}' not found. Make sure it is in the same folder.")
+            return
+        # Fresh copies of the learned steps, so a second call retrains like fit() does
+        fresh = ('tfidf', 'clf') if hashing else ('clf',)
+        self.pipeline.steps = [(name, clone(step) if name in fresh else step) for name, step in self.pipeline.steps]
+        steps = self.pipeline.named_steps
+        vectorize = steps['hash'].transform if hashing else steps['tfidf'].transform
+        weight = steps['tfidf'].transform if hashing else (lambda X: X)
+        classifier = steps['clf']
+        rng = np.random.default_rng(seed)
+
+        print(f"[AI] Streaming dataset from {csv_path} ({chunk_rows} rows per chunk)...")
+        # Pass 1: idf counts, unique products (first row wins), popular queries
+        products = {}
+        positive_queries = Counter()
+        n_rows = 0
+        with timer.stage('idf_pass'):
+            for chunk in self._read_chunks(csv_path, chunk_rows):
+                n_rows += len(chunk)
+                if hashing:
+                    steps['tfidf'].partial_fit(vectorize(make_features(chunk)))
+                new = chunk.drop_duplicates(subset=['product_id'])
+                new = new[~new['product_id'].isin(products)]
+                for row in new[PRODUCT_COLUMNS].itertuples(index=False):
+                    products[row.product_id] = row
+                positive_queries.update(chunk.loc[chunk['relevance_label'] == 1, 'user_query'].dropna())
+
+        print(f"[AI] Training model on {n_rows} examples ({epochs} epochs, shuffle buffer {shuffle_buffer})...")
+        with timer.stage('fit'):
+            best_loss, no_change = np.inf, 0
+            for epoch in range(epochs):
+                loss = 0.0
+                buffer_X, buffer_y = [], np.empty(0, dtype=np.int64)
+                for chunk in self._read_chunks(csv_path, chunk_rows):
+                    # Append the chunk, shuffle, emit everything beyond the buffer size
+                    buffer_X += list(make_features(chunk))
+                    buffer_y = np.concatenate([buffer_y, chunk['relevance_label'].to_numpy(dtype=np.int64)])
+                    order = rng.permutation(len(buffer_y))
+                    emit, keep = order[shuffle_buffer:], order[:shuffle_buffer]
+                    if len(emit):
+                        loss += self._partial_fit(classifier, weight(vectorize([buffer_X[i] for i in emit])), buffer_y[emit])
+                    buffer_X, buffer_y = [buffer_X[i] for i in keep], buffer_y[keep]
+                if len(buffer_y):
+                    order = rng.permutation(len(buffer_y))
+                    for start in range(0, len(order), chunk_rows):
+                        part = order[start:start + chunk_rows]
+                        loss += self._partial_fit(classifier, weight(vectorize([buffer_X[i] for i in part])), buffer_y[part])
+
+                loss /= max(n_rows, 1)
+                if epoch > 0:   # the first epoch starts from an untrained model
+                    no_change = no_change + 1 if loss > best_loss - classifier.tol else 0
+                    best_loss = min(best_loss, loss)
+                    if no_change >= classifier.n_iter_no_change:
+                        break
+            print(f"[AI] {epoch + 1} epochs, progressive log loss {loss:.4f}")
+
+        with timer.stage('dedup_products'):
+            self._set_products(pd.DataFrame(list(products.values()), columns=PRODUCT_COLUMNS))
+        self._finish_training(positive_queries.elements())
+
+    @staticmethod
+    def _read_chunks(csv_path, chunk_rows):
+        # Text columns as str: per-chunk type inference could turn numeric-looking ids into ints
+        dtypes = {c: str for c in PRODUCT_COLUMNS + ['user_query']}
+        if dataset_format(csv_path) != 'csv':
+            yield from iter_frames(csv_path, TRAIN_COLUMNS, chunk_rows)
+            return
+        if is_normalized(csv_path):
+            # Pairs chunks get their product columns from the (small) products table
+            products = read_products(csv_path).set_index('product_id')
+            for path in dataset_files(csv_path):
+                for chunk in pd.read_csv(path, usecols=PAIR_COLUMNS, dtype=dtypes, chunksize=chunk_rows):
+                    yield chunk.join(products, on='product_id', how='inner')[TRAIN_COLUMNS]
+            return
+        for path in dataset_files(csv_path):
+            yield from pd.read_csv(path, usecols=TRAIN_COLUMNS, dtype=dtypes, chunksize=chunk_rows)
+
+    @staticmethod
+    def _partial_fit(classifier, X, y):
+        """One SGD pass over a batch; returns the batch log loss measured before it."""
+        loss = 0.0
+        if hasattr(classifier, 'coef_'):
+            p = np.clip(classifier.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+            loss = -float(np.sum(np.where(y == 1, np.log(p), np.log(1 - p))))
+        classifier.partial_fit(X, y, classes=np.array([0, 1]))
+        return loss
+
+    def _set_products(self, products):
+        """Unique products of the training data become the searchable catalog."""
+        self.product_db = collapse_duplicates(products)
+        # Training always cleans queries with this generation's SYNONYMS
+        self.preprocess = preprocess_query
         # Pre-compute the search text for the inference phase
-        self.product_db['search_text'] = self.product_db['product_name'].fillna('') + " " + \
-                                         self.product_db['category'].fillna('') + " " + \
-                                         self.product_db['description'].fillna('') + " " + \
-                                         self.product_db['price'].astype(str)
-        
+        self.product_db['search_text'] = product_text(self.product_db)
+
+    def _finish_training(self, positive_queries):
+        """Scorer, index, autocomplete and fingerprint of a freshly trained model."""
+        timer = self.timer
+        with timer.stage('build_scorer'):
+            self._build_scorer()
+        with timer.stage('build_index'):
+            self._build_index()
+        with timer.stage('build_completer'):
+            self._build_completer(positive_queries)
+        with timer.stage('fingerprint'):
+            self._set_fingerprint(pickle.dumps(self._model_package()))
         print("[AI] Training Complete.")
 
+    def _build_scorer(self):
+        """Precomputes the product-side TF-IDF and SGD contributions."""
+        self.scorer = None
+        self._prepare_results()
+        if self.fast_scoring:
+            self.scorer = FactorizedScorer.from_pipeline(self.pipeline, self.product_db['search_text'])
+            if self.scorer is None:
+                print("[WARN] Pipeline cannot be factorized, using full predict_proba.")
+
+    def _prepare_results(self):
+        """Score buffer + result columns as arrays, so a search only gathers k rows."""
+        self._score_buffer = np.empty(len(self.product_db))
+        self._result_arrays = {c: self.product_db[c].to_numpy() for c in RESULT_COLUMNS if c != 'ai_score'}
+        self._result_arrays['index'] = self.product_db.index.to_numpy()
+
+    def _product_texts(self):
+        """Name + category + description per product (what the index and completer see)."""
+        product_texts = self.product_db['product_name'].fillna('').astype(str) + " " + \
+                        self.product_db['category'].fillna('').astype(str) + " " + \
+                        self.product_db['description'].fillna('').astype(str)
+        return list(product_texts)
+
+    def _build_index(self):
+        """Builds the candidate index (name, category, description, model codes)."""
+        # Query-independent score, used to pad candidate sets with few matches
+        prior = self.score_products("")
+        self.index = CandidateIndex.from_texts(self._product_texts(), prior=prior)
+
+    def _build_completer(self, queries=()):
+        """Builds the autocomplete from the catalog, the model's synonyms and past queries."""
+        self.completer = PrefixCompleter.from_catalog(
+            self.product_db['product_name'].fillna('').astype(str), self._product_texts(),
+            synonyms=list(self.preprocess.synonyms), queries=list(queries)
+        )
+
+    def _model_package(self):
+        return {
+            'pipeline': self.pipeline,
+            'database': self.product_db,
+            'completer': self.completer
+        }
+
+    def _set_fingerprint(self, artifact_bytes):
+        """Hashes the model artifact; cached results of another model are dropped."""
+        self.fingerprint = fingerprint_bytes(artifact_bytes)
+        self.cache.bind(self.fingerprint)
+
     def save_model(self, filename):
         """Saves the trained pipeline AND the product database to a file."""
         if self.product_db is None:
             print("[ERROR] Cannot save: Model is not trained yet.")
             return
-            
-        model_package = {
-            'pipeline': self.pipeline,
-            'database': self.product_db
-        }
         
         try:
             with open(filename, 'wb') as f:
-                pickle.dump(model_package, f)
+                pickle.dump(self._model_package(), f)
             print(f"[SUCCESS] Model saved to '{filename}'")
         except Exception as e:
             print(f"[ERROR] Failed to save model: {e}")
 
+    def save_brain(self, dirname=None):
+        """Saves the memory-mappable .brain folder (see brain_format.py)."""
+        if self.scorer is None or self.index is None:
+            print("[ERROR] Cannot save brain: no factorized model (train or load a pickle first).")
+            return False
+        dirname = dirname or brain_path_for(MODEL_FILE)
+        max_diff = self.check_export()
+        if max_diff is not None and max_diff > SCORE_TOLERANCE:
+            print(f"[ERROR] Exported scorer differs from predict_proba by {max_diff:.2e}, brain not saved.")
+            return False
+        try:
+            manifest = write_brain(dirname, self.scorer, self.index, self.product_db,
+                                   source=self.fingerprint, completer=self.completer,
+                                   synonyms=self.preprocess.synonyms)
+            print(f"[SUCCESS] Brain saved to '{dirname}' (fingerprint {manifest['fingerprint']})")
+            return True
+        except Exception as e:
+            print(f"[ERROR] Failed to save brain: {e}")
+            return False
+
+    def load_model(self, filename, synonyms=None):
+        """Loads a pre-trained model from disk (.pkl file or .brain folder).
+
+        synonyms: query synonym table a pickle was trained with (None: this
+        generation's SYNONYMS). A .brain carries its own in the manifest.
+        """
+        print(f"[AI] Loading model from '{filename}'...")
+        if os.path.isdir(filename):
+            return self._load_brain(filename)
+        try:
+            with open(filename, 'rb') as f:
+                artifact = f.read()
+            model_package = pickle.loads(artifact)
+            
+            self.pipeline = model_package['pipeline']
+            # Older pickles may list one SKU under several ids
+            self.product_db = collapse_duplicates(model_package['database'])
+            self.preprocess = normalizer_for(synonyms)
+            self._build_scorer()
+            self._build_index()
+            # Older pickles have no completer (and no query log): catalog + synonyms only
+            self.completer = model_package.get('completer')
+            if self.completer is None:
+                self._build_completer()
+            self._set_fingerprint(artifact)
+            print("[SUCCESS] Model loaded! Ready to search.")
+            return True
+        except FileNotFoundError:
+            print(f"[WARN] '{filename}' not found. You need to train first.")
+            return False
+        except Exception as e:
+            # Unpickling errors (e.g. a scikit-learn version mismatch) or a malformed package
+            print(f"[ERROR] Failed to load model '{filename}': {e}")
+            return False
+
+    def check_export(self, queries=None):
+        """Max |exported scorer - pipeline.predict_proba| over sample queries.
+
+        None when there is no fitted pipeline to compare with (brain loaded).
+        """
+        classifier = self.pipeline.named_steps.get('clf') if self.pipeline is not None else None
+        if self.scorer is None or not hasattr(classifier, 'coef_'):
+            return None
+        if queries is None:
+            queries = ["", "tablette", "wifi d-link", "kitman hoco"] + list(self.product_db['product_name'].astype(str)[:20])
+        max_diff = 0.0
+        for q in queries:
+            clean_query = self.preprocess(q)
+            expected = self.pipeline.predict_proba(clean_query + " | " + self.product_db['search_text'])[:, 1]
+            max_diff = max(max_diff, float(np.abs(self.scorer.score(clean_query) - expected).max(initial=0.0)))
+        return max_diff
+
+    def _load_brain(self, dirname):
+        """Memory-maps a .brain folder: no pipeline unpickling, no re-vectorizing."""
+        try:
+            brain = read_brain(dirname)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Failed to load brain '{dirname}': {e}")
+            return False
+
+        self.scorer = brain['scorer']
+        self.index = brain['index']
+        self.product_db = None
+        self._brain_columns = (brain['columns'], brain['row_labels'])
+        # Result columns straight from the mapped arrays (no private copy)
+        self._score_buffer = np.empty(len(brain['row_labels']))
+        self._result_arrays = {c: brain['columns'][c] for c in RESULT_COLUMNS if c != 'ai_score'}
+        self._result_arrays['index'] = brain['row_labels']
+        self.preprocess = normalizer_for(brain['synonyms'])
+        self.completer = brain['completer']
+        if self.completer is None:
+            self._build_completer()
+        self.fingerprint = brain['manifest']['fingerprint']
+        self.cache.bind(self.fingerprint)
+        print("[SUCCESS] Brain loaded! Ready to search.")
+        return True
+
+    def complete(self, prefix, k=8):
+        """Ranked autocomplete suggestions for what the user has typed so far."""
+        if self.completer is None:
+            return []
+        return self.completer.complete(prefix, k)
+
     def search(self, user_query, top_k=5):
         """Test function to verify the model works immediately after training."""
-        if self.product_db is None:
+        with self.timer.call('search'):
+            return self._search(user_query, top_k)
+
+    def _search(self, user_query, top_k):
+        if self._result_arrays is None:
             print("[ERROR] Model not ready.")
             return pd.DataFrame()
 
-        clean_query = preprocess_query(user_query)
+        timer = self.timer
+        with timer.stage('preprocess'):
+            clean_query = self.preprocess(user_query)
+        cache_key = (clean_query, top_k)
+        with timer.stage('cache'):
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached.copy()
         
-        candidates = self.product_db.copy()
-        candidate_features = clean_query + " | " + candidates['search_text']
+        # Stage 1: candidate generation (None = whole catalog)
+        with timer.stage('candidates'):
+            rows = self.index.candidates(clean_query) if self.index is not None else None
+        n_rows = len(self._score_buffer) if rows is None else len(rows)
         
-        # Predict probability (0 to 1)
-        probs = self.pipeline.predict_proba(candidate_features)[:, 1]
-        candidates['ai_score'] = probs
+        # Stage 2: predict probability (0 to 1) into the preallocated buffer
+        probs = self.score_products(clean_query, rows, out=self._score_buffer[:n_rows])
         
-        final_results = candidates.sort_values(by='ai_score', ascending=False).head(top_k)
-        return final_results[['product_name', 'price', 'ai_score', 'description']]
+        # Partial selection of the k best, then only those rows become a DataFrame
+        with timer.stage('top_k'):
+            best = top_k_positions(probs, top_k)
+        positions = best if rows is None else rows[best]
+        with timer.stage('materialize'):
+            final_results = self._materialize(positions, probs[best])
+            self.cache.put(cache_key, final_results)
+            return final_results.copy()
+
+    def search_many(self, user_queries, top_k=5, max_pairs=BATCH_MAX_PAIRS):
+        """Batch search (query log replays, nightly checks): one DataFrame per query.
+
+        The (query, product) pairs are scored in chunks of at most `max_pairs`,
+        each chunk in a single sparse pass. The query cache is bypassed so a
+        replay does not flush the hot POS queries.
+        """
+        if self._result_arrays is None:
+            print("[ERROR] Model not ready.")
+            return [pd.DataFrame() for _ in user_queries]
+
+        clean_queries = self.preprocess.many(list(user_queries))
+        rows_list = [self.index.candidates(q) if self.index is not None else None for q in clean_queries]
+        n_rows = [len(self._score_buffer) if rows is None else len(rows) for rows in rows_list]
+
+        results = []
+        start = 0
+        while start < len(clean_queries):
+            # Grow the chunk until it would exceed max_pairs (at least one query)
+            end, pairs = start, 0
+            while end < len(clean_queries) and (end == start or pairs + n_rows[end] <= max_pairs):
+                pairs += n_rows[end]
+                end += 1
+
+            chunk_scores = self.score_products_many(clean_queries[start:end], rows_list[start:end])
+            positions, scores = [], []
+            for rows, probs in zip(rows_list[start:end], chunk_scores):
+                best = top_k_positions(probs, top_k)
+                positions.append(best if rows is None else rows[best])
+                scores.append(probs[best])
+
+            # Materialize the winners of the whole chunk at once, then slice per query
+            hits = self._materialize(np.concatenate(positions), np.concatenate(scores))
+            offset = 0
+            for p in positions:
+                results.append(hits.iloc[offset:offset + len(p)])
+                offset += len(p)
+            start = end
+        return results
+
+    def score_products_many(self, clean_queries, rows_list):
+        """score_products for a batch of queries in one pass (one array per query)."""
+        if self.scorer is not None:
+            return self.scorer.score_many(clean_queries, rows_list)
+        # One feature Series for every (query, product) pair, one predict_proba call
+        features = []
+        for clean_query, rows in zip(clean_queries, rows_list):
+            search_text = self.product_db['search_text'] if rows is None else self.product_db['search_text'].iloc[rows]
+            features.append(clean_query + " | " + search_text)
+        probs = self.pipeline.predict_proba(pd.concat(features, ignore_index=True))[:, 1]
+        return np.split(probs, np.cumsum([len(f) for f in features])[:-1])
+
+    def _materialize(self, positions, scores):
+        """Result DataFrame holding only the winning rows and the result columns."""
+        arrays = self._result_arrays
+        data = {c: scores if c == 'ai_score' else arrays[c][positions] for c in RESULT_COLUMNS}
+        return pd.DataFrame(data, index=arrays['index'][positions])
+
+    def score_products(self, clean_query, rows=None, out=None):
+        """Match probability of the products in product_db (all, or the `rows` positions)."""
+        if self.scorer is not None:
+            # Query TF-IDF + SGD margins in one factorized pass
+            with self.timer.stage('tfidf_sgd'):
+                return self.scorer.score(clean_query, rows, out=out)
+        with self.timer.stage('candidate_strings'):
+            search_text = self.product_db['search_text'] if rows is None else self.product_db['search_text'].iloc[rows]
+            features = clean_query + " | " + search_text
+        with self.timer.stage('predict_proba'):
+            probs = self.pipeline.predict_proba(features)[:, 1]
+        if out is None:
+            return probs
+        out[:] = probs
+        return out
 
 # --- 3. MAIN EXECUTION ---
 if __name__ == "__main__":
-    engine = DjezzySearchAI()
+    # DJEZZY_TIMING=1 prints the per-stage timing report at the end (=profile adds cProfile)
+    timing = os.environ.get("DJEZZY_TIMING", "")
+    # DJEZZY_STREAM=1 trains out-of-core (chunked CSV, hashing features, partial_fit)
+    stream = bool(os.environ.get("DJEZZY_STREAM"))
+    engine = DjezzySearchAI(instrument=bool(timing), features='hashing' if stream else 'tfidf')
+    engine.timer.profile = timing == "profile"
     
     # Train with your specific file
-    engine.train(DATASET_FILE)
+    if stream:
+        engine.train_stream(DATASET_FILE)
+    else:
+        engine.train(DATASET_FILE)
     engine.save_model(MODEL_FILE)
+    engine.save_brain(brain_path_for(MODEL_FILE))
     
     # --- DEMO ---
     test_queries = [
@@ -174,4 +793,9 @@ if __name__ == "__main__":
                     # [MATCH] tag used for safety against encoding errors
                     print(f"   [MATCH] ({row['ai_score']:.2f}) -> {row['product_name']} [{row['price']}]")
         else:
-            print("   (No results)")
\ No newline at end of file
+            print("   (No results)")
+
+    if engine.timer.enabled:
+        print("\n" + engine.timer.report())
+        if engine.timer.profile:
+            print(engine.timer.profile_report())
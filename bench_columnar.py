@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+# ==========================================
+# CSV vs PARQUET vs ARROW DATASET BENCHMARK
+# ==========================================
+# Converts each CSV dataset with columnar_dataset.convert_csv (dictionary-
+# encoded product columns) and compares, per format:
+#   - size on disk,
+#   - load time: pd.read_csv of the whole file (what train() did) and of
+#     TRAIN_COLUMNS only, against read_table (memory-mapped, TRAIN_COLUMNS
+#     only) and read_table + to_pandas (categorical product columns),
+#   - DjezzySearchAI.train() on the dataset of ai_test4 in each format, split
+#     into the load / group / features / fit stages of its StageTimer.
+# --repeat N concatenates each dataset N times first (1 MB CSVs load in
+# milliseconds; the ratios show at larger sizes). Load times are the median
+# of --runs runs with a warm page cache.
+#
+# Usage: python bench_columnar.py [dataset.csv ...] [--repeat 20] [--runs 5] [--out bench_columnar.json]
+
+OUT_FILE = "bench_columnar.json"
+RUNS = 5
+DATASETS = ["dataset_train1.csv", "dataset_train2.csv", "dataset_train3.csv", "dataset_train4.csv"]
+TRAIN_STAGES = ['load_csv', 'group_products', 'features', 'fit']
+
+
+def median_time(fn, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def prepare(csv_path, repeat, work_dir):
+    """Copies (repeat > 1: concatenates) the CSV into work_dir and converts it."""
+    import pandas as pd
+    from columnar_dataset import EXTENSIONS, convert_csv
+
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    local = os.path.join(work_dir, name + ".csv")
+    df = pd.read_csv(csv_path)
+    pd.concat([df] * repeat, ignore_index=True).to_csv(local, index=False)
+    files = {'csv': local}
+    for fmt, ext in EXTENSIONS.items():
+        files[fmt], _ = convert_csv(local, fmt, out_path=os.path.join(work_dir, name + ext), keep_csv=True)
+    return files
+
+
+def load_times(files, runs):
+    import pandas as pd
+    from ai_test4 import TRAIN_COLUMNS
+    from columnar_dataset import read_table
+
+    rows = []
+    for fmt, path in files.items():
+        row = {'format': fmt, 'size_kb': os.path.getsize(path) / 1024}
+        if fmt == 'csv':
+            row['load_all_s'] = median_time(lambda: pd.read_csv(path), runs)
+            row['load_projected_s'] = median_time(lambda: pd.read_csv(path, usecols=TRAIN_COLUMNS), runs)
+            row['to_pandas_s'] = row['load_projected_s']
+        else:
+            row['load_all_s'] = median_time(lambda: read_table(path), runs)
+            row['load_projected_s'] = median_time(lambda: read_table(path, TRAIN_COLUMNS), runs)
+            row['to_pandas_s'] = median_time(lambda: read_table(path, TRAIN_COLUMNS).to_pandas(), runs)
+        rows.append(row)
+    return rows
+
+
+def train_times(files):
+    from ai_test4 import DjezzySearchAI
+
+    rows = []
+    for fmt, path in files.items():
+        engine = DjezzySearchAI(instrument=True)
+        start = time.perf_counter()
+        engine.train(path)
+        row = {'format': fmt, 'train_s': time.perf_counter() - start}
+        stats = engine.timer.stats()
+        for stage in TRAIN_STAGES:
+            row[f'{stage}_s'] = stats.get(f'train.{stage}', {}).get('total_ms', 0.0) / 1000
+        row['coef'] = engine.pipeline.named_steps['clf'].coef_
+        rows.append(row)
+    # Every format must train the model the CSV trains
+    reference = rows[0].pop('coef')
+    for row in rows[1:]:
+        row['coef_max_diff'] = float(abs(row.pop('coef') - reference).max())
+    rows[0]['coef_max_diff'] = 0.0
+    return rows
+
+
+def main():
+    from ai_test4 import DATASET_FILE
+
+    parser = argparse.ArgumentParser(description="CSV vs Parquet vs Arrow dataset benchmark")
+    parser.add_argument("datasets", nargs="*", default=None)
+    parser.add_argument("--repeat", type=int, default=1, help="concatenate each dataset N times")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--out", default=OUT_FILE)
+    args = parser.parse_args()
+    datasets = args.datasets or [d for d in DATASETS if os.path.exists(d)]
+
+    work_dir = tempfile.mkdtemp(prefix="djezzy_columnar_")
+    results = {'repeat': args.repeat, 'runs': args.runs, 'datasets': {}}
+    print(f"{'dataset':<20} {'format':<8} {'size KB':>9} {'all s':>8} {'proj s':>8} {'pandas s':>9}")
+    for csv_path in datasets:
+        files = prepare(csv_path, args.repeat, work_dir)
+        rows = load_times(files, args.runs)
+        entry = {'loads': rows}
+        for r in rows:
+            print(f"{os.path.basename(csv_path):<20} {r['format']:<8} {r['size_kb']:>9.0f} {r['load_all_s']:>8.3f} "
+                  f"{r['load_projected_s']:>8.3f} {r['to_pandas_s']:>9.3f}")
+        if os.path.basename(csv_path) == os.path.basename(DATASET_FILE):
+            entry['train'] = train_times(files)
+        results['datasets'][csv_path] = entry
+
+    for csv_path, entry in results['datasets'].items():
+        if 'train' not in entry:
+            continue
+        print(f"\ntrain() on {csv_path} x{args.repeat}")
+        print(f"{'format':<8} {'total s':>8} " + " ".join(f"{s + ' s':>11}" for s in TRAIN_STAGES) + f" {'coef diff':>10}")
+        for r in entry['train']:
+            print(f"{r['format']:<8} {r['train_s']:>8.2f} " + " ".join(f"{r[s + '_s']:>11.3f}" for s in TRAIN_STAGES)
+                  + f" {r['coef_max_diff']:>10.1e}")
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n[BENCH] Results written to '{args.out}' (files in '{work_dir}')")
+
+
+if __name__ == "__main__":
+    main()
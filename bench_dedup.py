@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+# ==========================================
+# TRAINING-ROW DEDUPLICATION REPORT
+# ==========================================
+# DjezzySearchAI(dedup_rows=True) fits each distinct (cleaned query, product,
+# label) row once, weighted by its count, instead of every copy the query
+# augmentation produced. This report trains with and without it on the same
+# split by query (bench_hashing.split_by_query) and shows:
+#   compression: rows, unique rows and their ratio
+#   cost:        features / fit / total train() time, SGD epochs
+#   quality:     held-out AUC, log loss, hit@5 and MRR (bench_hashing.evaluate)
+# SGD results depend on its shuffling seed, so every configuration runs with
+# --seeds seeds and the report shows means (and the spread of MRR).
+#
+# Usage: python bench_dedup.py [dataset.csv ...] [--seeds 1 2 3] [--out bench_dedup.json]
+
+OUT_FILE = "bench_dedup.json"
+SEEDS = [1, 2, 3]
+METRICS = ['auc', 'log_loss', 'hit_at_5', 'mrr']
+
+
+def run(train_csv, test_df, dedup_rows, seed):
+    from ai_test4 import DjezzySearchAI
+    from bench_hashing import evaluate
+
+    engine = DjezzySearchAI(instrument=True, dedup_rows=dedup_rows)
+    engine.pipeline.set_params(clf__random_state=seed)
+    start = time.perf_counter()
+    engine.train(train_csv)
+    train_s = time.perf_counter() - start
+    stats = engine.timer.stats()
+    result = {
+        'dedup_rows': dedup_rows,
+        'seed': seed,
+        'train_s': train_s,
+        'features_s': stats['train.features']['total_ms'] / 1000,
+        'fit_s': stats['train.fit']['total_ms'] / 1000,
+        'epochs': int(engine.pipeline.named_steps['clf'].n_iter_),
+    }
+    result.update(evaluate(engine, test_df))
+    return result
+
+
+def unique_rows(df):
+    from ai_test4 import preprocess_query
+
+    keys = df[['product_id', 'relevance_label']].assign(query=preprocess_query.many(df['user_query']))
+    return len(keys.drop_duplicates())
+
+
+def summarize(runs):
+    row = {k: statistics.mean(r[k] for r in runs) for k in ['train_s', 'features_s', 'fit_s', 'epochs'] + METRICS}
+    row['mrr_min'] = min(r['mrr'] for r in runs)
+    row['mrr_max'] = max(r['mrr'] for r in runs)
+    return row
+
+
+def main():
+    import pandas as pd
+    from ai_test4 import DATASET_FILE
+    from bench_hashing import split_by_query
+
+    parser = argparse.ArgumentParser(description="Training-row deduplication report")
+    parser.add_argument("datasets", nargs="*", default=[DATASET_FILE])
+    parser.add_argument("--seeds", type=int, nargs="*", default=SEEDS)
+    parser.add_argument("--out", default=OUT_FILE)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="djezzy_dedup_")
+    report = {'seeds': args.seeds, 'datasets': {}}
+    for path in args.datasets:
+        train_df, test_df = split_by_query(pd.read_csv(path))
+        train_csv = os.path.join(work_dir, "train.csv")
+        train_df.to_csv(train_csv, index=False)
+        runs = [run(train_csv, test_df, dedup, seed) for dedup in (False, True) for seed in args.seeds]
+        n_unique = unique_rows(train_df)
+        report['datasets'][path] = {
+            'train_rows': len(train_df),
+            'unique_rows': n_unique,
+            'compression': len(train_df) / n_unique,
+            'full': summarize([r for r in runs if not r['dedup_rows']]),
+            'dedup': summarize([r for r in runs if r['dedup_rows']]),
+            'runs': runs,
+        }
+
+    print(f"\n{'dataset':<24} {'rows':>9} {'unique':>9} {'ratio':>6} {'mode':<6} {'feat s':>7} {'fit s':>7} "
+          f"{'train s':>8} {'epochs':>6} {'AUC':>6} {'logloss':>8} {'hit@5':>6} {'MRR':>6} {'MRR range':>13}")
+    for path, entry in report['datasets'].items():
+        for mode in ('full', 'dedup'):
+            r = entry[mode]
+            print(f"{os.path.basename(path):<24} {entry['train_rows']:>9} {entry['unique_rows']:>9} "
+                  f"{entry['compression']:>6.2f} {mode:<6} {r['features_s']:>7.2f} {r['fit_s']:>7.2f} "
+                  f"{r['train_s']:>8.2f} {r['epochs']:>6.1f} {r['auc']:>6.3f} {r['log_loss']:>8.4f} "
+                  f"{r['hit_at_5']:>6.1%} {r['mrr']:>6.3f} {r['mrr_min']:>6.3f}-{r['mrr_max']:.3f}")
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[BENCH] Results written to '{args.out}'")
+
+
+if __name__ == "__main__":
+    main()
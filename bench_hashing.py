@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import pickle
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# ==========================================
+# HASHING vs TF-IDF VOCABULARY BENCHMARK
+# ==========================================
+# Trains DjezzySearchAI on the same split of dataset_train4.csv with:
+#   - features='tfidf'   (TfidfVectorizer, dict vocabulary of every 1-3-gram)
+#   - features='hashing' (HashingVectorizer into HASH_BUCKETS + online idf)
+#   - features='hashing' through train_stream() (chunked CSV, partial_fit)
+# The split is by query: every row of a held-out query is held out, so the
+# quality numbers are for queries neither model has seen.
+#   quality: ROC AUC and log loss of the held-out rows, and for each held-out
+#            query with a relevant product, hit@5 / MRR of that product in
+#            the full-catalog ranking
+#   cost:    training time, Python allocation peak during train()
+#            (tracemalloc), vocabulary entries, .pkl and .brain size,
+#            search() p50 over the held-out queries
+#
+# Usage: python bench_hashing.py [--data dataset_train4.csv] [--buckets 262144 ...]
+#                                [--holdout 0.2] [--out bench_hashing.json]
+
+OUT_FILE = "bench_hashing.json"
+HOLDOUT = 0.2
+SEED = 42
+TOP_K = 5
+
+
+def split_by_query(df, holdout=HOLDOUT, seed=SEED):
+    queries = df['user_query'].dropna().unique()
+    rng = np.random.default_rng(seed)
+    held = set(rng.choice(queries, size=int(len(queries) * holdout), replace=False))
+    mask = df['user_query'].isin(held)
+    return df[~mask], df[mask]
+
+
+def evaluate(engine, test_df):
+    from sklearn.metrics import roc_auc_score, log_loss
+    from ai_test4 import make_features, preprocess_query
+    from fast_search import QueryCache
+
+    probs = engine.pipeline.predict_proba(make_features(test_df))[:, 1]
+    labels = test_df['relevance_label'].to_numpy()
+
+    # Ranking quality: where does a relevant product land in the full ranking?
+    product_row = {pid: i for i, pid in enumerate(engine.product_db['product_id'])}
+    positives = test_df[test_df['relevance_label'] == 1]
+    hits = reciprocal = 0.0
+    n_ranked = 0
+    for query, group in positives.groupby('user_query'):
+        rows = [product_row[p] for p in group['product_id'] if p in product_row]
+        if not rows:
+            continue
+        scores = engine.score_products(preprocess_query(query))
+        # Best rank among the relevant products (1 = first)
+        rank = int((scores > scores[rows].max()).sum()) + 1
+        hits += rank <= TOP_K
+        reciprocal += 1 / rank
+        n_ranked += 1
+
+    engine.cache = QueryCache(max_size=0)
+    latencies = []
+    for query in test_df['user_query'].drop_duplicates():
+        start = time.perf_counter()
+        engine.search(query, top_k=TOP_K)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        'auc': float(roc_auc_score(labels, probs)),
+        'log_loss': float(log_loss(labels, probs, labels=[0, 1])),
+        f'hit_at_{TOP_K}': hits / n_ranked if n_ranked else None,
+        'mrr': reciprocal / n_ranked if n_ranked else None,
+        'ranked_queries': n_ranked,
+        'search_p50_ms': statistics.median(latencies) * 1000,
+    }
+
+
+def run(name, train_df, test_df, work_dir, stream=False, **engine_args):
+    from ai_test4 import DjezzySearchAI
+
+    train_csv = os.path.join(work_dir, "train.csv")
+    engine = DjezzySearchAI(**engine_args)
+    tracemalloc.start()
+    start = time.perf_counter()
+    if stream:
+        engine.train_stream(train_csv)
+    else:
+        engine.train(train_csv)
+    train_s = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    pkl = os.path.join(work_dir, f"{name}.pkl")
+    brain = os.path.join(work_dir, f"{name}.brain")
+    engine.save_model(pkl)
+    engine.save_brain(brain)
+    step = engine.pipeline.named_steps['tfidf']
+    vocabulary = getattr(step, 'vocabulary_', None)
+    result = {
+        'config': name,
+        'train_s': train_s,
+        'train_peak_mb': peak / (1024 * 1024),
+        'features': len(vocabulary) if vocabulary is not None else len(step.idf_),
+        'vocabulary_entries': len(vocabulary) if vocabulary is not None else 0,
+        'vocabulary_pickle_kb': len(pickle.dumps(vocabulary)) / 1024 if vocabulary is not None else 0.0,
+        'pkl_kb': os.path.getsize(pkl) / 1024,
+        'brain_kb': sum(os.path.getsize(os.path.join(brain, f)) for f in os.listdir(brain)) / 1024
+                    if os.path.isdir(brain) else None,
+        'export_max_diff': engine.check_export(),
+    }
+    result.update(evaluate(engine, test_df))
+    return result
+
+
+def main():
+    import pandas as pd
+    from ai_test4 import DATASET_FILE, HASH_BUCKETS
+
+    parser = argparse.ArgumentParser(description="Hashing vs vocabulary TF-IDF benchmark")
+    parser.add_argument("--data", default=DATASET_FILE)
+    parser.add_argument("--buckets", type=int, nargs="*", default=[2 ** 16, HASH_BUCKETS, 2 ** 20])
+    parser.add_argument("--holdout", type=float, default=HOLDOUT)
+    parser.add_argument("--out", default=OUT_FILE)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="djezzy_hashing_")
+    df = pd.read_csv(args.data)
+    train_df, test_df = split_by_query(df, args.holdout)
+    train_df.to_csv(os.path.join(work_dir, "train.csv"), index=False)
+
+    rows = [run("tfidf", train_df, test_df, work_dir, features='tfidf')]
+    for n in args.buckets:
+        rows.append(run(f"hashing_{n}", train_df, test_df, work_dir, features='hashing', n_buckets=n))
+    rows.append(run("hashing_stream", train_df, test_df, work_dir, stream=True, features='hashing'))
+
+    print(f"\n{'config':<16} {'features':>9} {'train s':>8} {'peak MB':>8} {'pkl KB':>8} {'brain KB':>9} "
+          f"{'AUC':>6} {'logloss':>8} {'hit@' + str(TOP_K):>6} {'MRR':>6} {'p50 ms':>7}")
+    for r in rows:
+        print(f"{r['config']:<16} {r['features']:>9} {r['train_s']:>8.2f} {r['train_peak_mb']:>8.1f} "
+              f"{r['pkl_kb']:>8.0f} {r['brain_kb'] or 0:>9.0f} {r['auc']:>6.3f} {r['log_loss']:>8.4f} "
+              f"{r[f'hit_at_{TOP_K}'] or 0:>6.1%} {r['mrr'] or 0:>6.3f} {r['search_p50_ms']:>7.2f}")
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'data': args.data, 'train_rows': len(train_df), 'test_rows': len(test_df),
+                   'holdout': args.holdout, 'seed': SEED, 'results': rows}, f, indent=2)
+    print(f"\n[BENCH] Results written to '{args.out}' (models in '{work_dir}')")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import argparse
+import json
+import statistics
+import time
+import tkinter as tk
+from tkinter import ttk
+
+import pandas as pd
+
+from tkinter_interface4 import VirtualResultList
+
+# ==========================================
+# RESULTS LIST RENDER BENCHMARK
+# ==========================================
+# Compares the baseline results area (BaselineResults: destroy every card
+# and rebuild ~10 widgets per row with the original draw_card, rows from
+# DataFrame.iterrows as run_search did) with the pooled, virtualized list,
+# for 20 and 500 results.
+# Each timing covers the update plus update_idletasks() (geometry and
+# redraw), which is what the cashier waits for.
+#
+# Needs a display (run under Xvfb on a headless box). Timings are written
+# to --out so they can be recorded with the change.
+# Usage: python bench_render.py [runs] [--out bench_render.json]
+
+OUT_FILE = "bench_render.json"
+RUNS = 10
+SIZES = (20, 500)
+
+COLORS = {"primary": "#E3001B", "dark": "#2D3436", "bg": "#F0F2F5",
+          "card": "#FFFFFF", "accent": "#00B894", "medium": "#FDCB6E"}
+FONTS = {"title": ("Segoe UI", 11, "bold"), "price": ("Segoe UI", 12, "bold")}
+
+
+def fake_rows(n, offset=0):
+    return [{
+        'product_name': f"Product {offset + i}",
+        'category': "Router" if i % 2 else "Phone",
+        'description': "Dual band wifi router with four gigabit ports and a long description " * 2,
+        'price': f"{1000 + i * 10} DZD",
+        'ai_score': 0.4 + (i % 60) / 100,
+    } for i in range(n)]
+
+
+class BaselineResults:
+    """Results area of the baseline tkinter_interface4 (create_results_area,
+    the clearing loop of run_search and draw_card), copied unchanged: the
+    "before" timing is the code the pooled list replaced."""
+
+    def __init__(self, parent):
+        self.COLORS = COLORS
+        self.FONTS = FONTS
+        container = tk.Frame(parent, bg=self.COLORS["bg"])
+        container.pack(fill="both", expand=True, padx=15, pady=5)
+        self.container = container
+
+        self.canvas = tk.Canvas(container, bg=self.COLORS["bg"], highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(container, orient="vertical", command=self.canvas.yview)
+        self.scrollable_frame = tk.Frame(self.canvas, bg=self.COLORS["bg"])
+
+        self.scrollable_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+
+        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw", width=550)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+    def render(self, relevant):
+        # Clear previous results
+        for widget in self.scrollable_frame.winfo_children():
+            widget.destroy()
+        for _, row in relevant.iterrows():
+            self.draw_card(row)
+
+    def draw_card(self, row):
+        card = tk.Frame(self.scrollable_frame, bg="white", padx=15, pady=12)
+        card.pack(fill="x", pady=6)
+
+        # 1. Header: Name + Price
+        header = tk.Frame(card, bg="white")
+        header.pack(fill="x")
+
+        tk.Label(header, text=row['product_name'], font=self.FONTS["title"],
+                 bg="white", fg=self.COLORS["dark"]).pack(side="left")
+
+        tk.Label(header, text=f"{row['price']}", font=self.FONTS["price"],
+                 bg="white", fg=self.COLORS["primary"]).pack(side="right")
+
+        # 2. Category Tag
+        cat_text = row.get('category', 'Product')
+        tk.Label(card, text=f"[{cat_text}]", font=("Segoe UI", 8, "bold"),
+                 bg="white", fg="#0984e3", anchor="w").pack(fill="x", pady=(2,0))
+
+        # 3. Description
+        desc = str(row['description'])
+        if len(desc) > 80: desc = desc[:80] + "..."
+        tk.Label(card, text=desc, font=("Segoe UI", 9), bg="white", fg="#636E72", anchor="w").pack(fill="x", pady=(2, 8))
+
+        # 4. AI Confidence Bar
+        score = int(row['ai_score'] * 100)
+        bar_color = self.COLORS["accent"] if score > 75 else self.COLORS["medium"]
+
+        bar_frame = tk.Frame(card, bg="white")
+        bar_frame.pack(fill="x")
+
+        tk.Label(bar_frame, text="Match:", font=("Segoe UI", 7, "bold"), bg="white", fg="#B2BEC3").pack(side="left")
+
+        progress_bg = tk.Frame(bar_frame, bg="#F0F2F5", height=5, width=150)
+        progress_bg.pack(side="left", padx=10)
+        progress_bg.pack_propagate(False)
+
+        fill_width = int((score / 100) * 150)
+        progress_fill = tk.Frame(progress_bg, bg=bar_color, height=5, width=fill_width)
+        progress_fill.pack(side="left")
+
+        tk.Label(bar_frame, text=f"{score}%", font=("Segoe UI", 8, "bold"), bg="white", fg=bar_color).pack(side="right")
+
+
+def timed(root, render, rows_sets):
+    samples = []
+    for rows in rows_sets:
+        t0 = time.perf_counter()
+        render(rows)
+        root.update_idletasks()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Results list render benchmark")
+    parser.add_argument("runs", nargs="?", type=int, default=RUNS)
+    parser.add_argument("--out", default=OUT_FILE)
+    args = parser.parse_args()
+    runs = args.runs
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise SystemExit(f"[BENCH] No display ({e}): run under Xvfb, e.g. xvfb-run python bench_render.py")
+    root.geometry("600x850")
+
+    baseline = BaselineResults(root)
+    root.update()
+
+    results_by_size = []
+    print(f"{'results':>8} {'rebuild ms':>12} {'pooled ms':>12} {'speedup':>8}")
+    for n in SIZES:
+        rows_sets = [fake_rows(n, offset=r) for r in range(runs)]
+
+        baseline.container.pack(fill="both", expand=True, padx=15, pady=5)
+        legacy_ms = timed(root, baseline.render, [pd.DataFrame(rows) for rows in rows_sets])
+        baseline.render(pd.DataFrame())
+        baseline.container.pack_forget()
+
+        pooled_container = tk.Frame(root)
+        pooled_container.pack(fill="both", expand=True)
+        results = VirtualResultList(pooled_container, COLORS, FONTS)
+        root.update()
+        results.set_rows(rows_sets[0])  # warm the pool (first screen)
+        root.update_idletasks()
+        pooled_ms = timed(root, results.set_rows, rows_sets)
+        pooled_container.destroy()
+
+        print(f"{n:>8} {legacy_ms:>12.1f} {pooled_ms:>12.1f} {legacy_ms / pooled_ms:>7.1f}x")
+        results_by_size.append({'results': n, 'rebuild_ms': legacy_ms, 'pooled_ms': pooled_ms})
+
+    root.destroy()
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'runs': runs, 'sizes': results_by_size}, f, indent=2)
+    print(f"\n[BENCH] Results written to '{args.out}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# ==========================================
+# SEARCH LATENCY BENCHMARK
+# ==========================================
+# Targets:
+#   - the shipped models djezzy_ai_brain{1..4}.pkl (and their .brain export),
+#   - synthetic catalogs of 1k / 10k / 100k products scaled up from
+#     scraping4.json, scored by a model trained on dataset_train4.csv.
+# Every target is measured in a fresh interpreter (cold load), then
+# search() runs over a fixed query set with the result cache disabled.
+# We report cold-load time, per-query p50/p95/p99, queries/sec and RSS,
+# and write everything as JSON; --compare prints the ratios against an
+# earlier run, so regressions between commits stand out.
+#
+# Usage: python bench_search.py [--out bench_search.json] [--sizes 1000 10000 100000]
+#                               [--queries 200] [--compare previous.json]
+
+OUT_FILE = "bench_search.json"
+SIZES = [1000, 10000, 100000]
+N_QUERIES = 200
+SEED = 42
+WORK_DIR = os.path.join(tempfile.gettempdir(), "djezzy_bench")
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- Probe (runs in the fresh interpreter) ---
+
+def probe(model, queries_file):
+    t0 = time.perf_counter()
+    from ai_test4 import DjezzySearchAI
+    from fast_search import QueryCache
+    t1 = time.perf_counter()
+    engine = DjezzySearchAI()
+    if not engine.load_model(model):
+        raise RuntimeError(f"could not load '{model}'")
+    t2 = time.perf_counter()
+    # Measure the engine, not the cache
+    engine.cache = QueryCache(max_size=0)
+
+    with open(queries_file, 'r', encoding='utf-8') as f:
+        queries = json.load(f)
+    engine.search(queries[0])   # first search (lazy structures, page faults)
+    t3 = time.perf_counter()
+
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        engine.search(q)
+        latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+
+    latencies_ms = sorted(l * 1000 for l in latencies)
+    return {
+        'import_s': t1 - t0,
+        'load_s': t2 - t1,
+        'first_search_s': t3 - t2,
+        'n_products': len(engine._score_buffer),
+        'n_queries': len(latencies),
+        'p50_ms': _percentile(latencies_ms, 50),
+        'p95_ms': _percentile(latencies_ms, 95),
+        'p99_ms': _percentile(latencies_ms, 99),
+        'mean_ms': statistics.fmean(latencies_ms),
+        'qps': len(latencies) / total if total else None,
+        'rss_mb': _rss_mb(),
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def _percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(q / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:     # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# --- Driver ---
+
+def run_probe(model, queries_file):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--probe", model, queries_file],
+                         capture_output=True, text=True, cwd=HERE)
+    lines = out.stdout.strip().splitlines()
+    if out.returncode != 0 or not lines:
+        error = out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "probe failed"
+        return {'error': error}
+    return json.loads(lines[-1])
+
+
+def build_queries(n_queries):
+    """Fixed query set: the demo queries plus a seeded sample of training queries."""
+    import pandas as pd
+    from ai_test4 import DATASET_FILE
+    queries = ["tablette", "wifi d-link", "telephone zte", "kitman hoco", "modem 4g"]
+    logged = pd.read_csv(os.path.join(HERE, DATASET_FILE), usecols=['user_query'])['user_query'].dropna().astype(str)
+    queries += list(logged.drop_duplicates().sample(n=min(n_queries, logged.nunique()), random_state=SEED))
+    return queries[:max(n_queries, 5)]
+
+
+def synthetic_products(size, rng):
+    """Scales the scraped catalog to `size` products (new model variants, jittered prices)."""
+    from createdata4 import clean_text, clean_price, get_category
+    with open(os.path.join(HERE, "scraping4.json"), 'r', encoding='utf-8') as f:
+        raw_data = json.load(f)
+    base = []
+    for item in raw_data:
+        title = clean_text(item.get("title", ""))
+        desc = clean_text(item.get("description", ""))
+        base.append((title, desc, clean_price(item.get("price", "0 DA"))))
+
+    rows = []
+    for i in range(size):
+        title, desc, price = base[i % len(base)]
+        variant = i // len(base)
+        if variant:
+            desc = f"{desc} {rng.choice('ABCDEFGHKLMNPRSTVXZ')}{variant}"
+            digits = "".join(c for c in price if c.isdigit()) or "0"
+            price = f"{int(int(digits) * rng.uniform(0.8, 1.2)) // 100 * 100:,} DA".replace(",", " ")
+        name = f"{title} {desc}".strip()
+        rows.append({
+            'product_id': f"syn{i:07d}",
+            'product_name': name,
+            'category': get_category(name),
+            'description': desc,
+            'price': price,
+        })
+    return rows
+
+
+def build_synthetic(sizes, work_dir):
+    """Trains once on the repo dataset, then writes one .pkl + .brain per catalog size."""
+    import pandas as pd
+    from ai_test4 import DjezzySearchAI, DATASET_FILE
+    from brain_format import write_brain
+
+    targets = {}
+    missing = [s for s in sizes if not os.path.isdir(os.path.join(work_dir, f"synthetic_{s}.brain"))]
+    engine = None
+    if missing:
+        engine = DjezzySearchAI()
+        engine.train(os.path.join(HERE, DATASET_FILE))
+    for size in sizes:
+        pkl = os.path.join(work_dir, f"synthetic_{size}.pkl")
+        brain = os.path.join(work_dir, f"synthetic_{size}.brain")
+        if size in missing:
+            print(f"[BENCH] Building synthetic catalog of {size} products...")
+            db = pd.DataFrame(synthetic_products(size, random.Random(SEED + size)))
+            db['search_text'] = db['product_name'] + " " + db['category'] + " " + db['description'] + " " + db['price']
+            engine.product_db = db
+            engine._build_scorer()
+            engine._build_index()
+            engine._build_completer()
+            engine.save_model(pkl)
+            write_brain(brain, engine.scorer, engine.index, engine.product_db, completer=engine.completer)
+        targets[f"synthetic_{size}"] = {'pkl': pkl, 'brain': brain}
+    return targets
+
+
+def shipped_models(work_dir):
+    """djezzy_ai_brain{1..4}.pkl, plus a .brain export when the pickle loads."""
+    targets = {}
+    for i in range(1, 5):
+        name = f"djezzy_ai_brain{i}"
+        pkl = os.path.join(HERE, name + ".pkl")
+        if not os.path.exists(pkl):
+            targets[name] = {'pkl': None}
+            continue
+        brain = os.path.join(work_dir, name + ".brain")
+        export = subprocess.run(
+            [sys.executable, "-c", "import sys; from ai_test4 import DjezzySearchAI; e = DjezzySearchAI(); "
+                                   "sys.exit(0 if e.load_model(sys.argv[1]) and e.save_brain(sys.argv[2]) else 1)",
+             pkl, brain], capture_output=True, text=True, cwd=HERE)
+        targets[name] = {'pkl': pkl, 'brain': brain if export.returncode == 0 else None}
+    return targets
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=HERE)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, previous_file):
+    with open(previous_file, 'r', encoding='utf-8') as f:
+        previous = {(r['target'], r['format']): r for r in json.load(f)['results']}
+    print(f"\nvs {previous_file} (ratio new/old, > 1 is slower):")
+    for r in results:
+        old = previous.get((r['target'], r['format']))
+        if old is None or 'error' in r or 'error' in old:
+            continue
+        ratios = "  ".join(f"{key} {r[key] / old[key]:.2f}x" for key in ('load_s', 'p50_ms', 'p99_ms')
+                           if r.get(key) and old.get(key))
+        print(f"  {r['target']:<22} {r['format']:<6} {ratios}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search latency benchmark")
+    parser.add_argument("--out", default=OUT_FILE)
+    parser.add_argument("--sizes", type=int, nargs="*", default=SIZES)
+    parser.add_argument("--queries", type=int, default=N_QUERIES)
+    parser.add_argument("--work-dir", default=WORK_DIR)
+    parser.add_argument("--compare", default=None, help="previous JSON output")
+    parser.add_argument("--probe", nargs=2, metavar=("MODEL", "QUERIES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(*args.probe)))
+        return
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    queries_file = os.path.join(args.work_dir, "queries.json")
+    with open(queries_file, 'w', encoding='utf-8') as f:
+        json.dump(build_queries(args.queries), f, ensure_ascii=False)
+
+    targets = shipped_models(args.work_dir)
+    targets.update(build_synthetic(args.sizes, args.work_dir))
+
+    results = []
+    print(f"\n{'target':<22} {'format':<6} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'q/s':>8} {'RSS MB':>8}")
+    for target, formats in targets.items():
+        for fmt, model in formats.items():
+            r = run_probe(model, queries_file) if model else {'error': "not available"}
+            r.update({'target': target, 'format': fmt, 'model': model})
+            results.append(r)
+            if 'error' in r:
+                print(f"{target:<22} {fmt:<6} ERROR: {r['error']}")
+            else:
+                rss = f"{r['rss_mb']:.0f}" if r['rss_mb'] is not None else "-"
+                print(f"{target:<22} {fmt:<6} {r['load_s']:>8.3f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+                      f"{r['p99_ms']:>8.2f} {r['qps']:>8.0f} {rss:>8}")
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'n_queries': args.queries,
+        'results': results,
+    }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[BENCH] Results written to '{args.out}'")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
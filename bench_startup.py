@@ -0,0 +1,83 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# ==========================================
+# POS COLD-START BENCHMARK
+# ==========================================
+# Every measurement runs in a fresh interpreter (that's what a store
+# terminal pays when the app starts). We time:
+#   1. importing the Tk interface module,
+#   2. loading the model and answering the first query,
+# and compare with importing the legacy pandas + sklearn stack.
+#
+# Usage: python bench_startup.py [model (.brain folder or .pkl)] [runs]
+
+MODEL = "djezzy_ai_brain4.brain"
+RUNS = 5
+
+GUI_PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import tkinter_interface4 as gui
+t1 = time.perf_counter()
+engine = gui.DjezzySearchAI()
+loaded = engine.load_model(sys.argv[1])
+t2 = time.perf_counter()
+engine.search("modem wifi")
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_s": t1 - t0,
+    "load_s": t2 - t1,
+    "first_search_s": t3 - t2,
+    "loaded": loaded,
+    "sklearn_imported": "sklearn" in sys.modules,
+    "pandas_imported": "pandas" in sys.modules,
+}))
+"""
+
+LEGACY_PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import pandas
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+print(json.dumps({"import_s": time.perf_counter() - t0}))
+"""
+
+
+def run_probe(code, *args):
+    out = subprocess.run([sys.executable, "-c", code, *args], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr else "probe failed")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def median_of(samples, key):
+    return statistics.median(s[key] for s in samples)
+
+
+if __name__ == "__main__":
+    model = sys.argv[1] if len(sys.argv) > 1 else MODEL
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else RUNS
+
+    gui = [run_probe(GUI_PROBE, model) for _ in range(runs)]
+    try:
+        legacy = [run_probe(LEGACY_PROBE) for _ in range(runs)]
+    except RuntimeError:
+        legacy = None   # pandas / sklearn not installed: nothing to compare with
+
+    print("=" * 50)
+    print("   POS COLD START (median of %d runs)   " % runs)
+    print("=" * 50)
+    print(f"Model: {model}  (loaded: {gui[0]['loaded']})")
+    print(f"GUI module import      : {median_of(gui, 'import_s') * 1000:8.1f} ms")
+    print(f"Model load             : {median_of(gui, 'load_s') * 1000:8.1f} ms")
+    print(f"First search           : {median_of(gui, 'first_search_s') * 1000:8.1f} ms")
+    if legacy:
+        print(f"pandas + sklearn import: {median_of(legacy, 'import_s') * 1000:8.1f} ms  (legacy stack)")
+    print(f"sklearn imported: {gui[0]['sklearn_imported']}   pandas imported: {gui[0]['pandas_imported']}")
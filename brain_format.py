@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import scipy.sparse as sp
+
+from fast_search import FactorizedScorer, CandidateIndex, HashedVocabulary, PrefixCompleter, SortedVocabulary
+
+# ==========================================
+# BRAIN ARTIFACT FORMAT (memory-mappable)
+# ==========================================
+# A ".brain" folder replaces the monolithic pickle:
+#
+#   manifest.json            format version, text settings, query synonym table,
+#                            scalars, fingerprint
+#   vocab_terms.npy          sorted n-gram strings      (SortedVocabulary; absent for
+#                            hashed models, see manifest 'hashing')
+#   vocab_columns.npy        feature column of each term (absent = term position)
+#   idf.npy, coef.npy        TF-IDF weights and SGD coefficients (coef is dropped
+#                            by compress_brain.py: inference only needs weighted_coef)
+#   product_counts_*.npy     CSR product n-gram counts (data/indices/indptr)
+#   product_linear.npy       precomputed SGD dot product per product
+#   product_sq_norm.npy      precomputed squared TF-IDF norm per product
+#   weighted_coef.npy        coef * idf (optional, recomputed when absent)
+#   head_keys.npy            leading product tokens per boundary group
+#   head_groups.npy          boundary group of each product
+#   index_*.npy              candidate index keys, postings and fallback
+#   completion_*.npy         prefix autocomplete keys, ranks and labels (optional)
+#   column_<i>.npy           product table, one array per column
+#   row_labels.npy           product_db index labels
+#
+# Every .npy is plain (uncompressed) so np.load(mmap_mode='r') maps it:
+# loading reads only the manifest and several processes share the pages.
+
+BRAIN_FORMAT = "djezzy-brain"
+BRAIN_VERSION = 1
+BRAIN_SUFFIX = ".brain"
+MANIFEST_FILE = "manifest.json"
+# Pickles trained by an older generation: the module whose SYNONYMS its
+# queries were cleaned with (the converter stores them in the manifest)
+PICKLE_GENERATIONS = {"djezzy_ai_brain1.pkl": "ai_test1", "djezzy_ai_brain2.pkl": "ai_test2"}
+
+
+def brain_path_for(model_file):
+    """'djezzy_ai_brain4.pkl' -> 'djezzy_ai_brain4.brain'."""
+    return os.path.splitext(model_file)[0] + BRAIN_SUFFIX
+
+
+def write_brain(path, scorer, index, product_db, source=None, completer=None, compression=None, synonyms=None):
+    """Writes scorer + candidate index + product table as a .brain folder.
+
+    `synonyms` is the query synonym table of the model's preprocess_query
+    (None: the current text_normalization.SYNONYMS).
+
+    The folder is written next to `path` and swapped in at the end, so a
+    reader never sees a half-written brain.
+    """
+    vocabulary = scorer.vocabulary
+    hashing = None
+    if isinstance(vocabulary, HashedVocabulary):
+        hashing = {'n_features': vocabulary.n_features}
+    elif not isinstance(vocabulary, SortedVocabulary):
+        vocabulary = SortedVocabulary.from_dict(vocabulary)
+    index_keys = index.keys
+    if not isinstance(index_keys, SortedVocabulary):
+        index_keys = SortedVocabulary.from_dict(index_keys)
+
+    counts = scorer.product_counts
+    postings = index.postings
+    arrays = {
+        'idf': scorer.idf,
+        'product_counts_data': counts.data,
+        'product_counts_indices': counts.indices,
+        'product_counts_indptr': counts.indptr,
+        'product_linear': scorer.product_linear,
+        'product_sq_norm': scorer.product_sq_norm,
+        'weighted_coef': scorer.weighted_coef,
+        'head_keys': np.array([" ".join(k) for k in scorer.head_keys], dtype=str),
+        'head_groups': scorer.head_groups,
+        'index_terms': index_keys.terms,
+        'index_rows': index_keys.columns,
+        'index_postings_data': postings.data,
+        'index_postings_indices': postings.indices,
+        'index_postings_indptr': postings.indptr,
+        'index_fallback': index.fallback,
+        'row_labels': _column_array(product_db.index.to_numpy()),
+    }
+    if hashing is None:
+        arrays['vocab_terms'] = vocabulary.terms
+        if vocabulary.columns is not None:
+            arrays['vocab_columns'] = vocabulary.columns
+    if scorer.coef is not None:
+        arrays['coef'] = scorer.coef
+    columns = []
+    for i, name in enumerate(product_db.columns):
+        arrays[f'column_{i}'] = _column_array(product_db[name].to_numpy())
+        columns.append(str(name))
+    if completer is not None:
+        arrays['completion_keys'] = completer.keys
+        arrays['completion_ranks'] = completer.ranks
+        arrays['completion_labels'] = completer.labels
+
+    manifest = {
+        'format': BRAIN_FORMAT,
+        'version': BRAIN_VERSION,
+        'source': source,
+        'text_params': scorer.text_params,
+        'hashing': hashing,
+        'sublinear_tf': scorer.sublinear_tf,
+        'binary': scorer.binary,
+        'norm': scorer.norm,
+        'intercept': scorer.intercept,
+        'weight_scale': float(scorer.weight_scale),
+        'n_features': len(scorer.idf),
+        'n_products': scorer.n_products,
+        'n_index_keys': postings.shape[0],
+        'max_candidates': index.max_candidates,
+        'min_candidates': index.min_candidates,
+        'columns': columns,
+        'n_completions': len(completer) if completer is not None else None,
+        'compression': compression,
+        'synonyms': dict(synonyms) if synonyms is not None else None,
+    }
+
+    tmp_path = path.rstrip(os.sep) + ".tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        np.save(os.path.join(tmp_path, name + ".npy"), array, allow_pickle=False)
+        digest.update(name.encode())
+        digest.update(array.tobytes())
+    # Same arrays with other synonyms answer queries differently
+    digest.update(json.dumps(manifest['synonyms'], sort_keys=True).encode())
+    manifest['fingerprint'] = digest.hexdigest()[:16]
+
+    with open(os.path.join(tmp_path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_brain(path, mmap=True):
+    """Opens a .brain folder.
+
+    Returns a dict with 'manifest', 'scorer' (FactorizedScorer), 'index'
+    (CandidateIndex), 'completer' (PrefixCompleter, None in brains saved
+    without one), 'columns' (name -> array), 'row_labels' and 'synonyms'
+    (query synonym table, None for the current SYNONYMS). With
+    mmap=True the arrays are memory-mapped, not read.
+    """
+    with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != BRAIN_FORMAT:
+        raise ValueError(f"'{path}' is not a {BRAIN_FORMAT} artifact")
+    if manifest.get('version') != BRAIN_VERSION:
+        raise ValueError(f"Unsupported brain version {manifest.get('version')} (expected {BRAIN_VERSION})")
+
+    mmap_mode = 'r' if mmap else None
+
+    def load(name):
+        return np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode, allow_pickle=False)
+
+    def load_optional(name):
+        return load(name) if os.path.exists(os.path.join(path, name + ".npy")) else None
+
+    n_products = manifest['n_products']
+    product_counts = sp.csr_matrix(
+        (load('product_counts_data'), load('product_counts_indices'), load('product_counts_indptr')),
+        shape=(n_products, manifest['n_features'])
+    )
+    head_keys = [tuple(k.split(" ")) if k else () for k in load('head_keys')]
+    if manifest.get('hashing'):
+        vocabulary = HashedVocabulary(manifest['hashing']['n_features'])
+    else:
+        vocabulary = SortedVocabulary(load('vocab_terms'), load_optional('vocab_columns'))
+    scorer = FactorizedScorer(
+        vocabulary=vocabulary,
+        idf=load('idf'),
+        coef=load_optional('coef'),
+        intercept=manifest['intercept'],
+        text_params=manifest['text_params'],
+        product_counts=product_counts,
+        head_keys=head_keys,
+        head_groups=load('head_groups'),
+        sublinear_tf=manifest['sublinear_tf'],
+        binary=manifest['binary'],
+        norm=manifest['norm'],
+        product_linear=load('product_linear'),
+        product_sq_norm=load('product_sq_norm'),
+        weighted_coef=load_optional('weighted_coef'),
+        weight_scale=manifest.get('weight_scale', 1.0),
+    )
+
+    postings = sp.csr_matrix(
+        (load('index_postings_data'), load('index_postings_indices'), load('index_postings_indptr')),
+        shape=(manifest['n_index_keys'], n_products)
+    )
+    index = CandidateIndex(
+        SortedVocabulary(load('index_terms'), load('index_rows')),
+        postings,
+        load('index_fallback'),
+        max_candidates=manifest['max_candidates'],
+        min_candidates=manifest['min_candidates'],
+    )
+
+    completer = None
+    if manifest.get('n_completions') is not None:
+        completer = PrefixCompleter(load('completion_keys'), load('completion_ranks'), load('completion_labels'))
+
+    columns = {name: load(f'column_{i}') for i, name in enumerate(manifest['columns'])}
+    return {
+        'manifest': manifest,
+        'scorer': scorer,
+        'index': index,
+        'completer': completer,
+        'columns': columns,
+        'row_labels': load('row_labels'),
+        'synonyms': manifest.get('synonyms'),
+    }
+
+
+def _column_array(values):
+    """Numeric columns stay numeric, everything else becomes a 'U' string array."""
+    values = np.asarray(values)
+    if values.dtype.kind in 'biuf':
+        return values
+    return np.array(["" if v is None or (isinstance(v, float) and np.isnan(v)) else str(v) for v in values], dtype=str)
+
+
+def pickle_synonyms(pkl):
+    """Synonym table a pickle's queries were cleaned with (None: the current one)."""
+    generation = PICKLE_GENERATIONS.get(os.path.basename(pkl))
+    if generation is None:
+        return None
+    import importlib
+    return importlib.import_module(generation).SYNONYMS
+
+
+# --- Converter for the existing pickles ---
+if __name__ == "__main__":
+    from ai_test4 import DjezzySearchAI
+
+    pickles = sys.argv[1:] or [f"djezzy_ai_brain{i}.pkl" for i in (1, 2, 4)]
+    for pkl in pickles:
+        engine = DjezzySearchAI()
+        if not engine.load_model(pkl, synonyms=pickle_synonyms(pkl)):
+            continue
+        engine.save_brain(brain_path_for(pkl))
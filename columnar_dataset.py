@@ -0,0 +1,196 @@
+import os
+
+# ==========================================
+# COLUMNAR (PARQUET / ARROW) DATASETS
+# ==========================================
+# The generators can write their dataset as Parquet or as an Arrow IPC file
+# instead of CSV (--format parquet|arrow). Columns that repeat the catalog
+# on every row (DICTIONARY_COLUMNS) are dictionary-encoded: each distinct
+# value is stored once and rows hold small integer codes, so the file is a
+# fraction of the CSV and loading does not parse the same text again and
+# again. DjezzySearchAI.train reads these files memory-mapped and only the
+# columns it needs.
+#
+# Conversion streams the CSV the generator wrote, batch by batch. Each
+# column's dictionary only grows from one batch to the next, so every batch
+# is a delta of the previous one: the Arrow IPC file format allows deltas
+# but not replaced dictionaries.
+#
+# pyarrow is optional: it is imported when a columnar file is written or
+# read, and plain CSV datasets never need it.
+
+FORMATS = ('csv', 'parquet', 'arrow')
+EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow'}
+DICTIONARY_COLUMNS = ['product_id', 'product_name', 'category', 'description', 'price']
+# Always read as text: type inference on the first block could make ids numbers
+TEXT_COLUMNS = ['product_id', 'product_name', 'category', 'description', 'user_query']
+BATCH_BYTES = 1 << 24   # CSV bytes per conversion batch
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet/Arrow datasets need pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def dataset_format(path):
+    """'parquet', 'arrow' or 'csv', from the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, fmt_ext in EXTENSIONS.items():
+        if ext == fmt_ext:
+            return fmt
+    return 'csv'
+
+
+def output_path(csv_path, fmt):
+    """Path of the `fmt` version of a CSV dataset (same name, other extension)."""
+    return csv_path if fmt == 'csv' else os.path.splitext(csv_path)[0] + EXTENSIONS[fmt]
+
+
+def requested_format(argv):
+    """Value of a `--format X` / `--format=X` command-line option ('csv' if absent)."""
+    for i, arg in enumerate(argv):
+        value = None
+        if arg == '--format' and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith('--format='):
+            value = arg.split('=', 1)[1]
+        if value is not None:
+            if value not in FORMATS:
+                raise SystemExit(f"--format must be one of {', '.join(FORMATS)}, got '{value}'")
+            return value
+    return 'csv'
+
+
+class _DictionaryEncoder:
+    """Dictionary-encodes the batches of one column against a growing dictionary."""
+
+    def __init__(self):
+        self.dictionary = None
+
+    def encode(self, values):
+        pa = _pyarrow()
+        import pyarrow.compute as pc
+
+        uniques = pc.unique(values).drop_null()
+        if self.dictionary is None:
+            self.dictionary = uniques
+        else:
+            new = uniques.filter(pc.invert(pc.is_in(uniques, value_set=self.dictionary)))
+            if len(new):
+                self.dictionary = pa.concat_arrays([self.dictionary, new])
+        indices = pc.index_in(values, value_set=self.dictionary).cast(pa.int32())
+        return pa.DictionaryArray.from_arrays(indices, self.dictionary)
+
+
+def _csv_batches(csv_path, text_price):
+    pa = _pyarrow()
+    import pyarrow.csv as pcsv
+
+    text = TEXT_COLUMNS + (['price'] if text_price else [])
+    reader = pcsv.open_csv(csv_path, read_options=pcsv.ReadOptions(block_size=BATCH_BYTES),
+                           convert_options=pcsv.ConvertOptions(column_types={c: pa.string() for c in text}))
+    for batch in reader:
+        yield batch
+
+
+def _encoded_batches(csv_path, text_price):
+    pa = _pyarrow()
+    encoders = {}
+    for batch in _csv_batches(csv_path, text_price):
+        arrays = []
+        for name, column in zip(batch.schema.names, batch.columns):
+            if name in DICTIONARY_COLUMNS:
+                column = encoders.setdefault(name, _DictionaryEncoder()).encode(column)
+            arrays.append(column)
+        yield pa.record_batch(arrays, names=batch.schema.names)
+
+
+def _write_batches(batches, path, fmt):
+    pa = _pyarrow()
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            if writer is None:
+                if fmt == 'parquet':
+                    writer = pq.ParquetWriter(path, batch.schema, compression='zstd')
+                else:
+                    writer = ipc.new_file(path, batch.schema,
+                                          options=ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+            if fmt == 'parquet':
+                writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def convert_csv(csv_path, fmt, out_path=None, keep_csv=False):
+    """Writes the CSV dataset as Parquet / Arrow; returns (out_path, rows).
+
+    The CSV is removed afterwards unless keep_csv (or fmt == 'csv').
+    """
+    if fmt == 'csv':
+        return csv_path, None
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}, got '{fmt}'")
+    pa = _pyarrow()
+    out_path = out_path or output_path(csv_path, fmt)
+    try:
+        rows = _write_batches(_encoded_batches(csv_path, text_price=False), out_path, fmt)
+    except pa.ArrowInvalid:
+        # A later batch has a non-numeric price: keep the whole column as text
+        rows = _write_batches(_encoded_batches(csv_path, text_price=True), out_path, fmt)
+    if not keep_csv:
+        os.remove(csv_path)
+    return out_path, rows
+
+
+def read_table(path, columns=None):
+    """Memory-mapped pyarrow Table of a .parquet / .arrow dataset, `columns` only."""
+    pa = _pyarrow()
+    if dataset_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=columns, memory_map=True)
+    import pyarrow.ipc as ipc
+    # Zero-copy: the table's buffers point into the mapping, selecting is free
+    table = ipc.open_file(pa.memory_map(path)).read_all()
+    return table.select(columns) if columns else table
+
+
+def decode_dictionaries(table):
+    """Same table with dictionary columns turned back into plain value columns."""
+    pa = _pyarrow()
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return table
+
+
+def plain_frame(df):
+    """Copy of a pandas frame with categorical columns back to plain values (same index)."""
+    pa = _pyarrow()
+    plain = decode_dictionaries(pa.Table.from_pandas(df, preserve_index=False)).to_pandas()
+    plain.index = df.index
+    return plain
+
+
+def iter_frames(path, columns, batch_rows):
+    """pandas DataFrames of up to batch_rows rows with plain (decoded) columns."""
+    pa = _pyarrow()
+    if dataset_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_rows, columns=columns)
+    else:
+        batches = read_table(path, columns).to_batches(max_chunksize=batch_rows)
+    for batch in batches:
+        yield decode_dictionaries(pa.Table.from_batches([batch])).to_pandas()
@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from ai_test4 import DjezzySearchAI, MODEL_FILE
+from brain_format import write_brain, brain_path_for
+from fast_search import FactorizedScorer, HashedVocabulary, QueryCache, SortedVocabulary
+
+# ==========================================
+# BRAIN COMPRESSION
+# ==========================================
+# The word (1,3)-gram vocabulary covers the whole "query | product" string,
+# so most n-grams end up with SGD weights that barely move a score. The
+# compressed brain:
+#   - prunes features whose effective weight |coef * idf| is below
+#     `prune` x the largest one, together with their vocabulary entries,
+#     idf and product-count columns,
+#   - stores weights as float32, or int8 with one scale,
+#   - stores the vocabulary as UTF-8 bytes in term order (no column
+#     array) and drops `coef`: inference only needs coef * idf.
+# The product-side dot products and norms are kept exact (float64, from
+# the full model); only the query-side corrections see the pruned
+# vocabulary. report() measures what that costs.
+#
+# With no options the converter is lossless in practice (float32, nothing
+# pruned): pruning and int8 shift probabilities and are opt-in.
+#
+# Usage: python compress_brain.py [source .brain/.pkl] [--dtype float32|int8] [--prune 0.001] [--out DIR]
+#        python compress_brain.py [source] --report   (sweep of variants, JSON report)
+
+DTYPES = ('float64', 'float32', 'int8')
+PRUNE = 0.0     # opt-in: 1e-3 shifts probabilities by up to ~0.03-0.12 (see --report)
+REPORT_FILE = "compression_report.json"
+REPORT_VARIANTS = [('float32', 0.0), ('float32', 1e-3), ('int8', 0.0), ('int8', 1e-3), ('int8', 1e-2), ('int8', 5e-2)]
+TOP_K = 10
+
+
+def compress_scorer(scorer, prune=PRUNE, dtype='float32'):
+    """Pruned / quantized copy of a FactorizedScorer (same scores up to the pruning)."""
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {DTYPES}")
+    weights = np.asarray(scorer.weighted_coef, dtype=np.float64) * scorer.weight_scale
+    largest = float(np.abs(weights).max()) if len(weights) else 0.0
+    keep = np.abs(weights) > prune * largest
+
+    scale = 1.0
+    if dtype == 'int8':
+        scale = largest / 127 if largest > 0 else 1.0
+        stored = np.clip(np.rint(weights / scale), -127, 127).astype(np.int8)
+    else:
+        stored = weights.astype(dtype)
+
+    value_dtype = np.float64 if dtype == 'float64' else np.float32
+    if isinstance(scorer.vocabulary, HashedVocabulary):
+        # Buckets cannot be dropped (the hash decides the column): quantize only
+        return FactorizedScorer(
+            scorer.vocabulary, np.asarray(scorer.idf, dtype=value_dtype), None, scorer.intercept,
+            scorer.text_params, scorer.product_counts.astype(value_dtype), scorer.head_keys, scorer.head_groups,
+            sublinear_tf=scorer.sublinear_tf, binary=scorer.binary, norm=scorer.norm,
+            product_linear=np.asarray(scorer.product_linear, dtype=np.float64),
+            product_sq_norm=np.asarray(scorer.product_sq_norm, dtype=np.float64),
+            weighted_coef=stored, weight_scale=scale,
+        )
+
+    # Kept features are renumbered in term order, so no column array is stored
+    vocabulary = scorer.vocabulary
+    if not isinstance(vocabulary, SortedVocabulary):
+        vocabulary = SortedVocabulary.from_dict(vocabulary)
+    positions = np.arange(len(vocabulary.terms))
+    term_columns = positions if vocabulary.columns is None else np.asarray(vocabulary.columns)
+    in_vocab = keep[term_columns]
+    kept = term_columns[in_vocab]
+    terms = vocabulary.terms[in_vocab]
+    if terms.dtype.kind == 'U':
+        terms = np.char.encode(terms, 'utf-8')
+    # UTF-8 bytes sort like the code points; re-fit the width to the longest KEPT term
+    terms = np.array(terms.tolist(), dtype=bytes)
+
+    product_counts = scorer.product_counts.tocsc()[:, kept].tocsr().astype(value_dtype)
+    return FactorizedScorer(
+        SortedVocabulary(terms),
+        np.asarray(scorer.idf, dtype=value_dtype)[kept],
+        None,
+        scorer.intercept,
+        scorer.text_params,
+        product_counts,
+        scorer.head_keys,
+        scorer.head_groups,
+        sublinear_tf=scorer.sublinear_tf,
+        binary=scorer.binary,
+        norm=scorer.norm,
+        # Product side stays exact: computed on the full vocabulary
+        product_linear=np.asarray(scorer.product_linear, dtype=np.float64),
+        product_sq_norm=np.asarray(scorer.product_sq_norm, dtype=np.float64),
+        weighted_coef=stored[kept],
+        weight_scale=scale,
+    )
+
+
+def compress(engine, out_dir, prune=PRUNE, dtype='float32'):
+    """Writes a compressed .brain of a loaded/trained engine; returns its manifest."""
+    scorer = compress_scorer(engine.scorer, prune=prune, dtype=dtype)
+    compression = {
+        'dtype': dtype,
+        'prune': prune,
+        'features': len(scorer.idf),
+        'original_features': len(engine.scorer.idf),
+    }
+    return write_brain(out_dir, scorer, engine.index, engine.product_db,
+                       source=engine.fingerprint, completer=engine.completer, compression=compression,
+                       synonyms=engine.preprocess.synonyms)
+
+
+def folder_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def measure(brain_dir, queries, reference=None, runs=3):
+    """Size, load time, latency and (vs `reference` engine) ranking agreement."""
+    load_times = []
+    for _ in range(runs):
+        engine = DjezzySearchAI()
+        start = time.perf_counter()
+        engine.load_model(brain_dir)
+        load_times.append(time.perf_counter() - start)
+    engine.cache = QueryCache(max_size=0)
+
+    latencies = []
+    rankings = []
+    for q in queries:
+        start = time.perf_counter()
+        hits = engine.search(q, top_k=TOP_K)
+        latencies.append(time.perf_counter() - start)
+        rankings.append(list(hits.index))
+
+    result = {
+        'brain': brain_dir,
+        'size_bytes': folder_size(brain_dir),
+        'features': len(engine.scorer.idf),
+        'load_ms': statistics.median(load_times) * 1000,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'rankings': rankings,
+        'engine': engine,
+    }
+    if reference is not None:
+        top1 = overlap = 0.0
+        max_diff = 0.0
+        for q, ranked, ref_ranked in zip(queries, rankings, reference['rankings']):
+            top1 += bool(ranked) and bool(ref_ranked) and ranked[0] == ref_ranked[0]
+            overlap += len(set(ranked) & set(ref_ranked)) / max(len(ref_ranked), 1)
+            clean_query = engine.preprocess(q)
+            diff = engine.score_products(clean_query) - reference['engine'].score_products(clean_query)
+            max_diff = max(max_diff, float(np.abs(diff).max(initial=0.0)))
+        result.update({
+            'top1_agreement': top1 / len(queries),
+            f'overlap_at_{TOP_K}': overlap / len(queries),
+            'max_score_diff': max_diff,
+        })
+    return result
+
+
+def report(source, variants=REPORT_VARIANTS, out_file=REPORT_FILE, n_queries=200):
+    from bench_search import build_queries
+
+    work_dir = tempfile.mkdtemp(prefix="djezzy_compress_")
+    engine = DjezzySearchAI()
+    if not engine.load_model(source):
+        return None
+    reference_dir = source if os.path.isdir(source) else os.path.join(work_dir, "reference.brain")
+    if reference_dir != source and not engine.save_brain(reference_dir):
+        return None
+
+    queries = build_queries(n_queries)
+    reference = measure(reference_dir, queries)
+    rows = [dict(reference, variant="reference")]
+    for dtype, prune in variants:
+        out_dir = os.path.join(work_dir, f"{dtype}_prune{prune:g}.brain")
+        compress(engine, out_dir, prune=prune, dtype=dtype)
+        rows.append(dict(measure(out_dir, queries, reference), variant=f"{dtype} prune={prune:g}"))
+
+    base = rows[0]
+    print(f"\n{'variant':<22} {'features':>9} {'size KB':>9} {'size':>6} {'load ms':>8} {'p50 ms':>7} "
+          f"{'top1':>6} {'@' + str(TOP_K):>6} {'max diff':>9}")
+    for r in rows:
+        print(f"{r['variant']:<22} {r['features']:>9} {r['size_bytes'] / 1024:>9.0f} "
+              f"{r['size_bytes'] / base['size_bytes']:>5.0%} {r['load_ms']:>8.2f} {r['p50_ms']:>7.2f} "
+              f"{r.get('top1_agreement', 1.0):>6.1%} {r.get(f'overlap_at_{TOP_K}', 1.0):>6.1%} "
+              f"{r.get('max_score_diff', 0.0):>9.2e}")
+
+    with open(out_file, 'w', encoding='utf-8') as f:
+        json.dump({'source': source, 'n_queries': len(queries), 'top_k': TOP_K,
+                   'variants': [{k: v for k, v in r.items() if k not in ('engine', 'rankings')} for r in rows]},
+                  f, indent=2)
+    print(f"\n[COMPRESS] Report written to '{out_file}' (variants in '{work_dir}')")
+    return rows
+
+
+# --- Command line ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune / quantize a .brain")
+    parser.add_argument("source", nargs="?", default=MODEL_FILE, help=".brain folder or .pkl")
+    parser.add_argument("--dtype", choices=DTYPES, default='float32')
+    parser.add_argument("--prune", type=float, default=PRUNE)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--report", action="store_true", help="sweep variants and write a report")
+    args = parser.parse_args()
+
+    if args.report:
+        report(args.source)
+    else:
+        engine = DjezzySearchAI()
+        if engine.load_model(args.source):
+            out_dir = args.out or brain_path_for(args.source).replace(".brain", f".{args.dtype}.brain")
+            manifest = compress(engine, out_dir, prune=args.prune, dtype=args.dtype)
+            c = manifest['compression']
+            print(f"[SUCCESS] '{out_dir}': {c['features']}/{c['original_features']} features kept, "
+                  f"{folder_size(out_dir) / 1024:.0f} KB")
@@ -4,9 +4,13 @@ import re
 import random
 import sys
 
+from columnar_dataset import convert_csv, requested_format
+
 # --- CONFIGURATION ---
 JSON_FILES = ['scraping1.json', 'scraping2.json', 'scraping3.json']
 OUTPUT_CSV = 'dataset_train1.csv'
+# `python createdata1.py --format parquet|arrow`: the dataset as Parquet / Arrow IPC (needs pyarrow)
+OUTPUT_FORMAT = requested_format(sys.argv[1:])
 TARGET_ROWS = 12000  
 
 # --- 1. THE "GOLD STANDARD" CATALOG ---
@@ -180,6 +184,9 @@ df.to_csv(OUTPUT_CSV, index=False, encoding='utf-8-sig')
 
 print(f"[SUCCESS] Generated {len(df)} rows.")
 print(f"[SUCCESS] Saved to '{OUTPUT_CSV}'")
+if OUTPUT_FORMAT != 'csv':
+    converted, _ = convert_csv(OUTPUT_CSV, OUTPUT_FORMAT)
+    print(f"[SUCCESS] Converted to '{converted}'")
 
 # --- SAFE PRINT BLOCK (FIX FOR WINDOWS ERRORS) ---
 try:
@@ -1,13 +1,24 @@
+import csv
 import json
-import pandas as pd
+import os
 import re
 import random
 import math
+import sys
+
+from columnar_dataset import convert_csv, requested_format
+from external_shuffle import ShuffledCSVWriter, buckets_for
+from product_identity import text_id
 
 # --- CONFIGURATION ---
 JSON_FILES = ['scraping1.json', 'scraping2.json', 'scraping3.json', 'scraping4.json']
 OUTPUT_CSV = 'dataset_train2.csv'
 TARGET_ROWS = 12000
+COLUMNS = ["product_id", "product_name", "category", "description", "price", "user_query", "relevance_label"]
+# `python createdata2.py --normalized`: products table once + (query, product_id, label) pairs
+# `python createdata2.py --format parquet|arrow`: the dataset as Parquet / Arrow IPC (needs pyarrow)
+NORMALIZED_DIR = 'dataset_train2_normalized'
+PAIR_COLUMNS = ["user_query", "product_id", "relevance_label"]
 
 # ==========================================
 # 1. THE "GOLD STANDARD" CATALOG (Expanded)
@@ -134,12 +145,15 @@ def load_scraped_data():
                             elif any(x in name.lower() for x in ['internet', 'go', 'data']):
                                 cat = "Offer_Internet"
 
+                            desc = clean_text(item.get('description', name))
                             scraped_products.append({
-                                "id": f"SCRAP_{random.randint(10000,99999)}",
+                                # Hash of title, description and raw price: random 5-digit ids
+                                # could collide, and `price` keeps only the first digit group
+                                "id": f"SCRAP_{text_id(name, desc, price_raw)}",
                                 "name": name,
                                 "cat": cat,
                                 "price": price,
-                                "desc": clean_text(item.get('description', name)),
+                                "desc": desc,
                                 "tags": name.lower().split()
                             })
 
@@ -156,120 +170,142 @@ def load_scraped_data():
     print(f"[INFO] Loaded {len(scraped_products)} extra products from JSONs.")
     return scraped_products
 
+def check_ids(catalog):
+    """Raises if two different products share an id: their pairs would point at the wrong text."""
+    products = {}
+    for product in catalog:
+        fields = (product['name'], product['cat'], product['desc'], product['price'])
+        if products.setdefault(product['id'], fields) != fields:
+            raise ValueError(f"Product id {product['id']} is shared by {products[product['id']]} and {fields}")
+
 # ==========================================
 # 4. MAIN GENERATION LOOP
 # ==========================================
-full_catalog = base_catalog + load_scraped_data()
-data_rows = []
-
-print(f"[INFO] Total Catalog Size: {len(full_catalog)} products.")
-print("[INFO] Generating 10,000+ Synthetic Rows with Context-Aware Logic...")
-
-while len(data_rows) < TARGET_ROWS:
-    # Pick a product
-    product = random.choice(full_catalog)
+def generate_rows(full_catalog, n_rows):
+    """Yields n_rows synthetic (query, product, label) rows, one at a time."""
+    for _ in range(n_rows):
+        # Pick a product
+        product = random.choice(full_catalog)
     
-    # Decide Query Strategy
-    strategy = random.choice(['exact', 'general_cat', 'price_search', 'spec_search', 'typo_heavy'])
+        # Decide Query Strategy
+        strategy = random.choice(['exact', 'general_cat', 'price_search', 'spec_search', 'typo_heavy'])
     
-    query = ""
+        query = ""
     
-    # --- 1. Exact / Name Search ---
-    if strategy == 'exact':
-        query = product['name'].lower()
+        # --- 1. Exact / Name Search ---
+        if strategy == 'exact':
+            query = product['name'].lower()
     
-    # --- 2. Category / Synonym Search (CONTEXT AWARE) ---
-    elif strategy == 'general_cat':
-        # Get synonyms specific to THIS product's category
-        cat_syns = get_category_synonyms(product['cat'], product['name'])
-        if cat_syns:
-            query = random.choice(cat_syns)
-            # Sometimes add brand name for phones
-            if product['cat'] == "Smartphone":
-                brand = next((t for t in product['tags'] if t in ['samsung', 'xiaomi', 'oppo', 'apple']), "")
-                if brand and random.random() > 0.5:
-                    query += f" {brand}"
+        # --- 2. Category / Synonym Search (CONTEXT AWARE) ---
+        elif strategy == 'general_cat':
+            # Get synonyms specific to THIS product's category
+            cat_syns = get_category_synonyms(product['cat'], product['name'])
+            if cat_syns:
+                query = random.choice(cat_syns)
+                # Sometimes add brand name for phones
+                if product['cat'] == "Smartphone":
+                    brand = next((t for t in product['tags'] if t in ['samsung', 'xiaomi', 'oppo', 'apple']), "")
+                    if brand and random.random() > 0.5:
+                        query += f" {brand}"
+            else:
+                query = product['name'].lower()
+
+        # --- 3. Price Search ---
+        elif strategy == 'price_search':
+            # e.g. "telephone 50000 da" or "internet 2000"
+            base_word = random.choice(get_category_synonyms(product['cat'], product['name']) or [product['cat']])
+            if product['price'] > 0:
+                query = f"{base_word} {product['price']}"
+                if random.random() > 0.5: query += " da"
+            else:
+                query = f"{base_word} gratuit"
+
+        # --- 4. Specific Spec Search (Tags) ---
+        elif strategy == 'spec_search':
+            # e.g. "redmi 128go" or "modem 4g"
+            relevant_tags = [t for t in product['tags'] if len(t) > 2]
+            if relevant_tags:
+                t1 = random.choice(relevant_tags)
+                # Maybe add a synonym
+                syn = random.choice(get_category_synonyms(product['cat'], product['name']) or [""])
+                query = f"{syn} {t1}".strip()
+            else:
+                query = product['name'].lower()
+
+        # --- 5. Heavy Typo (Raw User Input) ---
         else:
-            query = product['name'].lower()
+            query = product['name'].lower() 
+            # We will apply heavy typos below
 
-    # --- 3. Price Search ---
-    elif strategy == 'price_search':
-        # e.g. "telephone 50000 da" or "internet 2000"
-        base_word = random.choice(get_category_synonyms(product['cat'], product['name']) or [product['cat']])
-        if product['price'] > 0:
-            query = f"{base_word} {product['price']}"
-            if random.random() > 0.5: query += " da"
-        else:
-            query = f"{base_word} gratuit"
-
-    # --- 4. Specific Spec Search (Tags) ---
-    elif strategy == 'spec_search':
-        # e.g. "redmi 128go" or "modem 4g"
-        relevant_tags = [t for t in product['tags'] if len(t) > 2]
-        if relevant_tags:
-            t1 = random.choice(relevant_tags)
-            # Maybe add a synonym
-            syn = random.choice(get_category_synonyms(product['cat'], product['name']) or [""])
-            query = f"{syn} {t1}".strip()
-        else:
-            query = product['name'].lower()
-
-    # --- 5. Heavy Typo (Raw User Input) ---
-    else:
-        query = product['name'].lower() 
-        # We will apply heavy typos below
-
-    # --- APPLY NOISE (TYPOS) ---
-    # The rule: Typos must be based on the CURRENT query, which is already context-aware.
-    if strategy == 'typo_heavy' or random.random() < 0.3:
-        # Apply typo generation 1 or 2 times
-        query = generate_typo(query)
-        if random.random() < 0.3:
+        # --- APPLY NOISE (TYPOS) ---
+        # The rule: Typos must be based on the CURRENT query, which is already context-aware.
+        if strategy == 'typo_heavy' or random.random() < 0.3:
+            # Apply typo generation 1 or 2 times
             query = generate_typo(query)
-
-    # --- GENERATE ROW ---
-    # 90% Positive Samples, 10% Negative
-    if random.random() > 0.1:
-        data_rows.append({
-            "product_id": product['id'],
-            "product_name": product['name'],
-            "category": product['cat'],
-            "description": product['desc'],
-            "price": product['price'],
-            "user_query": clean_text(query),
-            "relevance_label": 1
-        })
-    else:
-        # Negative Sample: User asks for Phone, we show Internet? -> Label 0
-        # Pick a random DIFFERENT product
-        wrong = random.choice(full_catalog)
-        # Ensure it's actually different
-        while wrong['id'] == product['id']:
+            if random.random() < 0.3:
+                query = generate_typo(query)
+
+        # --- GENERATE ROW ---
+        # 90% Positive Samples, 10% Negative
+        if random.random() > 0.1:
+            yield {
+                "product_id": product['id'],
+                "product_name": product['name'],
+                "category": product['cat'],
+                "description": product['desc'],
+                "price": product['price'],
+                "user_query": clean_text(query),
+                "relevance_label": 1
+            }
+        else:
+            # Negative Sample: User asks for Phone, we show Internet? -> Label 0
+            # Pick a random DIFFERENT product
             wrong = random.choice(full_catalog)
+            # Ensure it's actually different
+            while wrong['id'] == product['id']:
+                wrong = random.choice(full_catalog)
             
-        data_rows.append({
-            "product_id": wrong['id'],
-            "product_name": wrong['name'],
-            "category": wrong['cat'],
-            "description": wrong['desc'],
-            "price": wrong['price'],
-            "user_query": clean_text(query), # The query was for the Original product
-            "relevance_label": 0
-        })
+            yield {
+                "product_id": wrong['id'],
+                "product_name": wrong['name'],
+                "category": wrong['cat'],
+                "description": wrong['desc'],
+                "price": wrong['price'],
+                "user_query": clean_text(query), # The query was for the Original product
+                "relevance_label": 0
+            }
+
+full_catalog = base_catalog + load_scraped_data()
+check_ids(full_catalog)
+
+print(f"[INFO] Total Catalog Size: {len(full_catalog)} products.")
+print("[INFO] Generating 10,000+ Synthetic Rows with Context-Aware Logic...")
 
 # ==========================================
 # 5. SAVE & PREVIEW
 # ==========================================
-df = pd.DataFrame(data_rows)
-df = df.sample(frac=1).reset_index(drop=True)
-
-# Export
-df.to_csv(OUTPUT_CSV, index=False, encoding='utf-8-sig')
-
-print(f"[SUCCESS] Saved '{OUTPUT_CSV}' with {len(df)} rows.")
-
-# Safe Preview
-try:
-    print(df[['product_name', 'category', 'user_query', 'relevance_label']].head(10))
-except:
-    print("[INFO] Done. Check CSV file.")
\ No newline at end of file
+# Rows stream straight into on-disk shuffle buckets (external_shuffle.py),
+# so memory stays flat whatever TARGET_ROWS is.
+if "--normalized" in sys.argv[1:]:
+    os.makedirs(NORMALIZED_DIR, exist_ok=True)
+    products_path = os.path.join(NORMALIZED_DIR, "products.csv")
+    with open(products_path, 'w', newline='', encoding='utf-8') as f:
+        table = csv.writer(f)
+        table.writerow(COLUMNS[:5])
+        seen = set()
+        for product in full_catalog:
+            if product['id'] not in seen:   # the same scraped item can appear in several files (check_ids)
+                seen.add(product['id'])
+                table.writerow([product['id'], product['name'], product['cat'], product['desc'], product['price']])
+    pairs_path = os.path.join(NORMALIZED_DIR, "pairs.csv")
+    with ShuffledCSVWriter(pairs_path, PAIR_COLUMNS, n_buckets=buckets_for(TARGET_ROWS)) as writer:
+        writer.writerows(generate_rows(full_catalog, TARGET_ROWS))
+    print(f"[SUCCESS] Saved {len(seen)} products and {writer.rows} pairs in '{NORMALIZED_DIR}'.")
+else:
+    with ShuffledCSVWriter(OUTPUT_CSV, COLUMNS, n_buckets=buckets_for(TARGET_ROWS), encoding='utf-8-sig') as writer:
+        writer.writerows(generate_rows(full_catalog, TARGET_ROWS))
+
+    print(f"[SUCCESS] Saved '{OUTPUT_CSV}' with {writer.rows} rows.")
+    if requested_format(sys.argv[1:]) != 'csv':
+        path, _ = convert_csv(OUTPUT_CSV, requested_format(sys.argv[1:]))
+        print(f"[SUCCESS] Converted to '{path}'.")
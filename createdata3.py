@@ -2,8 +2,11 @@ import json
 import csv
 import random
 import re
+import sys
 import uuid
 
+from columnar_dataset import convert_csv, requested_format
+
 # ==========================================
 # CONFIGURATION & HELPERS
 # ==========================================
@@ -206,7 +209,8 @@ def process_services(json_data):
 # MAIN EXECUTION
 # ==========================================
 
-def main():
+def main(output_format='csv'):
+    """Writes OUTPUT_FILE; output_format 'parquet' / 'arrow' converts it (needs pyarrow)."""
     all_items = []
 
     # 1. Load and Process Mobiles (Scraping 4)
@@ -265,6 +269,10 @@ def main():
             writer.writerow(row)
 
     print(f"Successfully created {OUTPUT_FILE} with {len(csv_rows)} training examples.")
+    if output_format != 'csv':
+        path, _ = convert_csv(OUTPUT_FILE, output_format)
+        print(f"Converted to {output_format}: '{path}'.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # --format parquet|arrow: the dataset as Parquet / Arrow IPC instead of CSV
+    main(requested_format(sys.argv[1:]))
\ No newline at end of file
@@ -1,8 +1,17 @@
+import argparse
+import hashlib
 import json
 import csv
+import math
+import os
 import random
 import re
-import uuid
+import shutil
+from multiprocessing import Pool
+
+from columnar_dataset import FORMATS, convert_csv
+from external_shuffle import ShuffledCSVWriter, buckets_for
+from product_identity import content_id, unique_sku_positions
 
 # ==========================================
 # CONFIGURATION
@@ -10,6 +19,18 @@ import uuid
 INPUT_FILE = 'scraping4.json'
 OUTPUT_FILE = 'dataset_train4.csv'
 TARGET_DATASET_SIZE = 10500  # Aiming for >10k
+HEADERS = ["product_id", "product_name", "category", "description", "price", "user_query", "relevance_label"]
+
+# Normalized layout (--normalized): a folder with every product once in PRODUCTS_FILE
+# and (query, product_id, label) rows in PAIRS_FILE, or in part-*.csv with --workers
+PRODUCTS_FILE = "products.csv"
+PAIRS_FILE = "pairs.csv"
+PRODUCT_HEADERS = HEADERS[:5]
+PAIR_HEADERS = ["user_query", "product_id", "relevance_label"]
+
+# Sharded mode (--workers N): rows per shard partition, default seed
+SHARD_ROWS = 250000
+SEED = 42
 
 # Keywords to identify categories
 CATEGORY_KEYWORDS = {
@@ -64,50 +85,57 @@ def get_category(text):
             return cat
     return "Autre"
 
-def generate_typo(text):
+def generate_typo(text, rng=random):
     """Randomly swaps characters or drops one to simulate typing errors."""
     if len(text) < 4: return text
-    if random.random() > 0.5: # Swap
-        idx = random.randint(0, len(text) - 2)
+    if rng.random() > 0.5: # Swap
+        idx = rng.randint(0, len(text) - 2)
         chars = list(text)
         chars[idx], chars[idx+1] = chars[idx+1], chars[idx]
         return "".join(chars)
     else: # Drop char
-        idx = random.randint(0, len(text) - 1)
+        idx = rng.randint(0, len(text) - 1)
         return text[:idx] + text[idx+1:]
 
-def augment_query(base_query):
+def augment_query(base_query, rng=random):
     """Creates a variation of the query using prefixes, suffixes, or typos."""
-    method = random.choice(["prefix", "suffix", "typo", "raw", "combination"])
+    method = rng.choice(["prefix", "suffix", "typo", "raw", "combination"])
     query = base_query.lower()
     
     if method == "typo":
-        return generate_typo(query)
+        return generate_typo(query, rng)
     elif method == "prefix":
-        return f"{random.choice(INTENTS_PREFIX)} {query}"
+        return f"{rng.choice(INTENTS_PREFIX)} {query}"
     elif method == "suffix":
-        return f"{query} {random.choice(INTENTS_SUFFIX)}"
+        return f"{query} {rng.choice(INTENTS_SUFFIX)}"
     elif method == "combination":
-        return f"{random.choice(INTENTS_PREFIX)} {query} {random.choice(INTENTS_SUFFIX)}"
+        return f"{rng.choice(INTENTS_PREFIX)} {query} {rng.choice(INTENTS_SUFFIX)}"
     
     return query
 
+def derive_seed(seed, *keys):
+    """Stable 64-bit seed for a sub-stream (same on every run, process and platform)."""
+    digest = hashlib.sha256(":".join(str(k) for k in (seed,) + keys).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
 # ==========================================
 # MAIN GENERATOR
 # ==========================================
 
-def create_large_dataset():
+def load_products():
+    """Cleaned products of INPUT_FILE, one per SKU (None if the file is missing).
+
+    Listings of the same SKU (see product_identity.sku_key) are collapsed
+    into the first one, and ids are content hashes: stable across runs.
+    """
     try:
         with open(INPUT_FILE, 'r', encoding='utf-8') as f:
             raw_data = json.load(f)
     except FileNotFoundError:
         print(f"Error: {INPUT_FILE} not found. Make sure it is in the same folder.")
-        return
+        return None
 
-    # 1. Clean and Structure Data
     products = []
-    print("Cleaning product data and fixing prices...")
-    
     for item in raw_data:
         title = clean_text(item.get("title", ""))
         desc = clean_text(item.get("description", ""))
@@ -119,7 +147,7 @@ def create_large_dataset():
         full_name = f"{title} {desc}".strip()
         
         products.append({
-            "id": str(uuid.uuid4())[:8],
+            "id": content_id(full_name, fixed_price, desc),
             "brand": title,
             "model": desc,
             "name": full_name,
@@ -127,7 +155,75 @@ def create_large_dataset():
             "price": fixed_price 
         })
 
-    dataset_rows = []
+    unique = [products[i] for i in unique_sku_positions([p['name'] for p in products], [p['price'] for p in products],
+                                                        [p['model'] for p in products])]
+    if len(unique) < len(products):
+        print(f"Collapsed {len(products) - len(unique)} duplicate listings ({len(unique)} unique products).")
+    return unique
+
+def write_products_table(products, path):
+    """Writes the product table of the normalized layout (one row per product id)."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(PRODUCT_HEADERS)
+        writer.writerows([p['id'], p['name'], p['category'], p['model'], p['price']] for p in products)
+
+def product_rows(prod, products, n_pos, n_neg, rng=random):
+    """Yields the positive then the negative training rows of one product."""
+    # === A. POSITIVE SAMPLES (User wants THIS product) ===
+    base_positives = [
+        prod['name'],                   
+        prod['model'],                  
+        f"{prod['category']} {prod['brand']}", 
+        prod['brand'],                  
+        f"{prod['model']} {prod['price']}" 
+    ]
+    
+    for _ in range(n_pos):
+        base = rng.choice(base_positives)
+        query = augment_query(base, rng)
+        yield {
+            "product_id": prod['id'],
+            "product_name": prod['name'],
+            "category": prod['category'],
+            "description": prod['model'],
+            "price": prod['price'], # Uses the fixed price
+            "user_query": query,
+            "relevance_label": 1 # MATCH
+        }
+
+    # === B. NEGATIVE SAMPLES (User wants SOMETHING ELSE) ===
+    for _ in range(n_neg):
+        other = rng.choice(products)
+        while other['id'] == prod['id']:
+            other = rng.choice(products)
+        
+        if other['category'] == prod['category'] and rng.random() < 0.5:
+            query_base = other['brand'] if rng.random() < 0.5 else other['model']
+        else:
+            query_base = other['name']
+        
+        query = augment_query(query_base, rng)
+        
+        yield {
+            "product_id": prod['id'],
+            "product_name": prod['name'],
+            "category": prod['category'],
+            "description": prod['model'],
+            "price": prod['price'], # Uses the fixed price
+            "user_query": query,
+            "relevance_label": 0 # NO MATCH
+        }
+
+def create_large_dataset(target=TARGET_DATASET_SIZE, normalized_dir=None, fmt='csv'):
+    """Writes OUTPUT_FILE (as Parquet / Arrow with fmt), or with normalized_dir
+    the products table + pairs.csv in that folder."""
+    # 1. Clean and Structure Data
+    print("Cleaning product data and fixing prices...")
+    products = load_products()
+    if products is None:
+        return
+
     total_products = len(products)
     
     # We need ~100 rows per product to reach target size
@@ -135,73 +231,144 @@ def create_large_dataset():
         print("Error: No products found in JSON.")
         return
 
-    rows_per_product = max(1, TARGET_DATASET_SIZE // total_products)
+    rows_per_product = max(1, target // total_products)
     
     print(f"Processing {total_products} products. Generating ~{rows_per_product} rows per product...")
 
+    n_pos = int(rows_per_product * 0.4)
+    dataset_rows = (row for prod in products
+                    for row in product_rows(prod, products, n_pos, rows_per_product - n_pos))
+
+    # Rows stream into on-disk buckets; the global shuffle happens bucket by bucket
+    n_buckets = buckets_for(rows_per_product * total_products)
+    if normalized_dir:
+        os.makedirs(normalized_dir, exist_ok=True)
+        write_products_table(products, os.path.join(normalized_dir, PRODUCTS_FILE))
+        pairs_path = os.path.join(normalized_dir, PAIRS_FILE)
+        with ShuffledCSVWriter(pairs_path, PAIR_HEADERS, n_buckets=n_buckets, rng=random) as writer:
+            writer.writerows(dataset_rows)
+        print(f"Done! Generated {writer.rows} training pairs for {total_products} products in '{normalized_dir}'.")
+        return
+
+    with ShuffledCSVWriter(OUTPUT_FILE, HEADERS, n_buckets=n_buckets, rng=random) as writer:
+        writer.writerows(dataset_rows)
+
+    print(f"Done! Generated {writer.rows} training examples in '{OUTPUT_FILE}'.")
+    with open(OUTPUT_FILE, 'r', newline='', encoding='utf-8') as f:
+        first = next(csv.DictReader(f), None)
+    if first is not None:
+        print(f"Sample Price Check: {first['price']}")
+    if fmt != 'csv':
+        path, _ = convert_csv(OUTPUT_FILE, fmt)
+        print(f"Converted to {fmt}: '{path}'.")
+
+# ==========================================
+# SHARDED (PARALLEL) GENERATOR
+# ==========================================
+# The dataset is cut into a fixed number of shards that depends only on
+# the target size (SHARD_ROWS per shard), never on the worker count.
+# Shard k holds the k-th slice of EVERY product's positives and negatives
+# and draws from its own random stream, derive_seed(seed, "shard", k), so:
+#   - the same seed gives the same rows whatever --workers is,
+#   - every partition is already a shuffled mix of all products, and can
+#     be read on its own (train / train_stream accept the partition folder).
+# With normalized=True the partitions hold (query, product_id, label) pairs
+# and the folder gets the products table: the folder itself is the dataset.
+
+def _split(total, shard, n_shards):
+    """Size of the `shard`-th of `n_shards` near-equal slices of `total`."""
+    return total * (shard + 1) // n_shards - total * shard // n_shards
+
+def generate_shard(task):
+    """Writes partition `shard` to out_dir; returns (path, rows)."""
+    shard, n_shards, products, rows_per_product, seed, out_dir, headers = task
+    rng = random.Random(derive_seed(seed, "shard", shard))
+    n_pos = int(rows_per_product * 0.4)
+    n_neg = rows_per_product - n_pos
+
+    rows = []
     for prod in products:
-        # === A. POSITIVE SAMPLES (User wants THIS product) ===
-        n_pos = int(rows_per_product * 0.4)
-        
-        base_positives = [
-            prod['name'],                   
-            prod['model'],                  
-            f"{prod['category']} {prod['brand']}", 
-            prod['brand'],                  
-            f"{prod['model']} {prod['price']}" 
-        ]
-        
-        for _ in range(n_pos):
-            base = random.choice(base_positives)
-            query = augment_query(base)
-            dataset_rows.append({
-                "product_id": prod['id'],
-                "product_name": prod['name'],
-                "category": prod['category'],
-                "description": prod['model'],
-                "price": prod['price'], # Uses the fixed price
-                "user_query": query,
-                "relevance_label": 1 # MATCH
-            })
-
-        # === B. NEGATIVE SAMPLES (User wants SOMETHING ELSE) ===
-        n_neg = rows_per_product - n_pos
-        
-        for _ in range(n_neg):
-            other = random.choice(products)
-            while other['id'] == prod['id']:
-                other = random.choice(products)
-            
-            if other['category'] == prod['category'] and random.random() < 0.5:
-                query_base = other['brand'] if random.random() < 0.5 else other['model']
-            else:
-                query_base = other['name']
-            
-            query = augment_query(query_base)
-            
-            dataset_rows.append({
-                "product_id": prod['id'],
-                "product_name": prod['name'],
-                "category": prod['category'],
-                "description": prod['model'],
-                "price": prod['price'], # Uses the fixed price
-                "user_query": query,
-                "relevance_label": 0 # NO MATCH
-            })
-
-    # Shuffle final dataset
-    random.shuffle(dataset_rows)
-
-    # Write to CSV
-    headers = ["product_id", "product_name", "category", "description", "price", "user_query", "relevance_label"]
-    
-    with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
+        rows.extend(product_rows(prod, products, _split(n_pos, shard, n_shards), _split(n_neg, shard, n_shards), rng))
+    rng.shuffle(rows)
+
+    path = os.path.join(out_dir, f"part-{shard:05d}.csv")
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=headers, extrasaction='ignore')
         writer.writeheader()
-        writer.writerows(dataset_rows)
+        writer.writerows(rows)
+    return path, len(rows)
 
-    print(f"Done! Generated {len(dataset_rows)} training examples in '{OUTPUT_FILE}'.")
-    print(f"Sample Price Check: {dataset_rows[0]['price']}")
+def create_sharded_dataset(target=TARGET_DATASET_SIZE, workers=None, seed=SEED, out_dir=None, merge=True,
+                           normalized=False, fmt='csv'):
+    """Process-pool generation: one CSV partition per shard in out_dir, then
+    (merge=True) concatenated in shard order into OUTPUT_FILE, converted to
+    Parquet / Arrow with fmt. normalized=True writes pair partitions +
+    PRODUCTS_FILE and never merges."""
+    products = load_products()
+    if not products:
+        print("Error: No products found in JSON.")
+        return None
+
+    rows_per_product = max(1, target // len(products))
+    n_shards = max(1, math.ceil(rows_per_product * len(products) / SHARD_ROWS))
+    out_dir = out_dir or os.path.splitext(OUTPUT_FILE)[0] + "_parts"
+    os.makedirs(out_dir, exist_ok=True)
+    for name in os.listdir(out_dir):
+        if name.startswith("part-") and name.endswith(".csv"):
+            os.remove(os.path.join(out_dir, name))
+
+    headers = PAIR_HEADERS if normalized else HEADERS
+    if normalized:
+        write_products_table(products, os.path.join(out_dir, PRODUCTS_FILE))
+        merge = False
+
+    workers = workers or os.cpu_count() or 1
+    print(f"Generating {rows_per_product * len(products)} rows: {n_shards} shards, {workers} workers, seed {seed}...")
+    tasks = [(k, n_shards, products, rows_per_product, seed, out_dir, headers) for k in range(n_shards)]
+    if workers == 1:
+        parts = [generate_shard(t) for t in tasks]
+    else:
+        with Pool(min(workers, n_shards)) as pool:
+            parts = pool.map(generate_shard, tasks)
+    total = sum(n for _, n in parts)
+
+    if merge:
+        with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as out:
+            out.write(",".join(HEADERS) + "\r\n")
+            for path, _ in parts:
+                with open(path, 'r', newline='', encoding='utf-8') as f:
+                    f.readline()    # partition header
+                    shutil.copyfileobj(f, out)
+        print(f"Done! Generated {total} training examples in '{OUTPUT_FILE}' (partitions in '{out_dir}').")
+        if fmt != 'csv':
+            path, _ = convert_csv(OUTPUT_FILE, fmt)
+            print(f"Converted to {fmt}: '{path}'.")
+    else:
+        print(f"Done! Generated {total} training examples in {len(parts)} partitions in '{out_dir}'.")
+    return out_dir
 
 if __name__ == "__main__":
-    create_large_dataset()
\ No newline at end of file
+    # No options: the original single-loop generator. --workers: sharded, seeded generation.
+    # --normalized: products table + pairs instead of product columns on every row.
+    # --format parquet|arrow: the dataset file as Parquet / Arrow IPC (needs pyarrow).
+    parser = argparse.ArgumentParser(description="Generate the training dataset from INPUT_FILE")
+    parser.add_argument("--workers", type=int, default=None, help="process-pool mode with N workers (0 = all cores)")
+    parser.add_argument("--target", type=int, default=TARGET_DATASET_SIZE)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--out-dir", default=None, help="partition folder (default: <OUTPUT_FILE>_parts)")
+    parser.add_argument("--no-merge", action="store_true", help="keep the partitions only")
+    parser.add_argument("--normalized", action="store_true",
+                        help=f"write {PRODUCTS_FILE} + pairs into --out-dir (default: <OUTPUT_FILE>_normalized)")
+    parser.add_argument("--format", choices=FORMATS, default='csv',
+                        help="file format of the dataset (parquet / arrow: dictionary-encoded product columns)")
+    args = parser.parse_args()
+    if args.format != 'csv' and (args.normalized or args.no_merge):
+        parser.error("--format applies to the single dataset file (not --normalized or --no-merge)")
+
+    if args.workers is None:
+        normalized_dir = args.out_dir or os.path.splitext(OUTPUT_FILE)[0] + "_normalized"
+        create_large_dataset(args.target, normalized_dir if args.normalized else None, args.format)
+    else:
+        out_dir = args.out_dir or (os.path.splitext(OUTPUT_FILE)[0] + "_normalized" if args.normalized else None)
+        create_sharded_dataset(args.target, args.workers or None, args.seed, out_dir, merge=not args.no_merge,
+                               normalized=args.normalized, fmt=args.format)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import csv
+import os
+import random
+import shutil
+import tempfile
+
+# ==========================================
+# STREAMING CSV WRITER WITH EXTERNAL SHUFFLE (stdlib only)
+# ==========================================
+# The dataset generators yield rows one by one into this writer instead of
+# collecting them in a list for random.shuffle. Shuffling is a two-pass
+# "random buckets" shuffle on disk:
+#   1. every row goes to one of n_buckets temporary files, chosen uniformly
+#      at random (only the file buffers are in memory),
+#   2. on close, each bucket is loaded alone, shuffled in memory and
+#      appended to the output.
+# This gives a uniformly random order, and memory is bounded by one bucket
+# (about total_rows / n_buckets rows) however many rows are generated.
+# Pick n_buckets with buckets_for(expected_rows).
+#
+#   with ShuffledCSVWriter("out.csv", HEADERS, n_buckets=buckets_for(n)) as writer:
+#       for row in rows:
+#           writer.write(row)
+
+BUCKET_ROWS = 100000     # target rows per bucket (the in-memory shuffle unit)
+WRITE_BUFFER = 1 << 16   # bytes buffered per open bucket file
+
+
+def buckets_for(expected_rows, bucket_rows=BUCKET_ROWS):
+    """Number of buckets that keeps each one around `bucket_rows` rows."""
+    return max(1, -(-expected_rows // bucket_rows))
+
+
+class ShuffledCSVWriter:
+    """csv.DictWriter-like sink whose output rows come out globally shuffled."""
+
+    def __init__(self, path, fieldnames, n_buckets=1, rng=None, encoding='utf-8', tmp_dir=None):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.n_buckets = max(1, n_buckets)
+        self.rng = rng or random.Random()
+        self.encoding = encoding
+        self.rows = 0
+        self._tmp = tempfile.mkdtemp(prefix="shuffle_", dir=tmp_dir or os.path.dirname(os.path.abspath(path)))
+        self._files = []
+        self._writers = []
+        for i in range(self.n_buckets):
+            f = open(os.path.join(self._tmp, f"bucket-{i:05d}.csv"), 'w', newline='', encoding='utf-8',
+                     buffering=WRITE_BUFFER)
+            self._files.append(f)
+            self._writers.append(csv.writer(f))
+
+    def write(self, row):
+        """Adds one row (a dict keyed by fieldnames)."""
+        self._writers[self.rng.randrange(self.n_buckets)].writerow([row[k] for k in self.fieldnames])
+        self.rows += 1
+
+    def writerows(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def close(self):
+        """Shuffles bucket by bucket into `path`; returns the number of rows written."""
+        if self._tmp is None:
+            return self.rows
+        for f in self._files:
+            f.close()
+        try:
+            with open(self.path, 'w', newline='', encoding=self.encoding, buffering=WRITE_BUFFER) as out:
+                writer = csv.writer(out)
+                writer.writerow(self.fieldnames)
+                for f in self._files:
+                    with open(f.name, 'r', newline='', encoding='utf-8') as bucket:
+                        rows = list(csv.reader(bucket))
+                    self.rng.shuffle(rows)
+                    writer.writerows(rows)
+        finally:
+            self.abort()
+        return self.rows
+
+    def abort(self):
+        """Drops the temporary buckets without writing the output."""
+        if self._tmp is None:
+            return
+        for f in self._files:
+            f.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        self._tmp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
@@ -0,0 +1,787 @@
+import hashlib
+import re
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import scipy.sparse as sp
+
+# ==========================================
+# FAST SEARCH RUNTIME (NumPy / SciPy only, no sklearn / pandas imports)
+# ==========================================
+# The training pipeline scores strings shaped like "QUERY | PRODUCT INFO".
+# Re-vectorizing that string for every product on every keystroke is what
+# made search() linear in the catalog with a big constant (string building +
+# tokenization). Here the product side is vectorized ONCE, and at query time
+# only the query is tokenized.
+
+SEPARATOR = " | "
+
+# The factorized scores match pipeline.predict_proba up to float rounding.
+# In practice the gap is ~1e-15; we promise (and check against) this bound.
+SCORE_TOLERANCE = 1e-9
+
+# Candidate generation: how many products at most go to the classifier,
+# and how many we always want (padded with the best query-independent ones)
+MAX_CANDIDATES = 300
+MIN_CANDIDATES = 50
+
+# Query result cache (POS users repeat the same chips all day)
+CACHE_SIZE = 256
+CACHE_TTL_SECONDS = 600
+
+# Hashed vocabularies: n-gram -> bucket results kept per process
+HASH_CACHE_SIZE = 65536
+
+
+def _sigmoid(z, out=None):
+    """Logistic function, written into `out` when a buffer is given."""
+    out = np.negative(z, out=out)
+    np.exp(out, out=out)
+    out += 1.0
+    return np.reciprocal(out, out=out)
+
+
+def top_k_positions(scores, k):
+    """Positions of the k best scores, best first (argpartition + sort of k only)."""
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        best = np.sort(np.argpartition(scores, n - k)[n - k:])
+    else:
+        best = np.arange(n)
+    # Stable on sorted positions: ties keep catalog order
+    return best[np.argsort(-scores[best], kind='stable')]
+
+
+def build_text_functions(text_params):
+    """(analyze, tokenize) callables matching the training TfidfVectorizer.
+
+    Pure-Python replica of scikit-learn's 'word' and 'char_wb' analyzers
+    (lowercase, strip_accents, token_pattern, stop words, n-grams), driven
+    by the plain settings saved with the model, so inference never imports
+    sklearn. tokenize is None for char_wb models.
+    """
+    min_n, max_n = text_params['ngram_range']
+    lowercase = text_params['lowercase']
+    strip = {
+        None: None,
+        'unicode': _strip_accents_unicode,
+        'ascii': _strip_accents_ascii,
+    }[text_params['strip_accents']]
+
+    def preprocess(doc):
+        if lowercase:
+            doc = doc.lower()
+        if strip is not None:
+            doc = strip(doc)
+        return doc
+
+    if text_params['analyzer'] == 'char_wb':
+        white_spaces = re.compile(r"\s\s+")
+
+        def analyze(doc):
+            ngrams = []
+            for w in white_spaces.sub(" ", preprocess(doc)).split():
+                w = " " + w + " "
+                w_len = len(w)
+                for n in range(min_n, max_n + 1):
+                    offset = 0
+                    ngrams.append(w[offset:offset + n])
+                    while offset + n < w_len:
+                        offset += 1
+                        ngrams.append(w[offset:offset + n])
+                    if offset == 0:  # a short word is counted only once
+                        break
+            return ngrams
+
+        return analyze, None
+
+    token_pattern = re.compile(text_params['token_pattern'])
+    stop_words = text_params['stop_words']
+    stop_words = frozenset(stop_words) if stop_words is not None else None
+
+    def tokenize(doc):
+        tokens = token_pattern.findall(preprocess(doc))
+        if stop_words is not None:
+            tokens = [t for t in tokens if t not in stop_words]
+        return tokens
+
+    def analyze(doc):
+        tokens = tokenize(doc)
+        if max_n == 1:
+            return tokens
+        ngrams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n + 1, len(tokens) + 1)):
+            for i in range(len(tokens) - n + 1):
+                ngrams.append(" ".join(tokens[i:i + n]))
+        return ngrams
+
+    return analyze, tokenize
+
+
+def _strip_accents_unicode(s):
+    try:
+        s.encode("ASCII", errors="strict")
+        return s
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", s)
+        return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _strip_accents_ascii(s):
+    return unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
+
+
+class SortedVocabulary:
+    """Read-only term -> column mapping over a sorted string array.
+
+    Replaces the vectorizer's dict in loaded brains: nothing is built at
+    load time and the arrays can stay memory-mapped (shared between
+    processes). Lookups are binary searches. Terms may also be UTF-8
+    bytes ('S', 4x smaller than 'U', same order), and columns=None means
+    the column of a term is its position (compressed brains).
+    """
+
+    def __init__(self, terms, columns=None):
+        self.terms = terms          # sorted 'U' (or UTF-8 'S') array
+        self.columns = columns      # feature column of each term (None = position)
+
+    @classmethod
+    def from_dict(cls, vocabulary):
+        terms = np.array(sorted(vocabulary), dtype=str)
+        columns = np.array([vocabulary[t] for t in terms], dtype=np.int64)
+        return cls(terms, columns)
+
+    def lookup(self, grams):
+        """Feature columns of `grams` (-1 where a gram is not in the vocabulary)."""
+        if not len(grams) or not len(self.terms):
+            return np.full(len(grams), -1, dtype=np.int64)
+        if self.terms.dtype.kind == 'S':
+            grams = np.array([str(g).encode('utf-8') for g in grams], dtype=bytes)
+        else:
+            grams = np.asarray(grams, dtype=str)
+        pos = np.minimum(np.searchsorted(self.terms, grams), len(self.terms) - 1)
+        found = self.terms[pos] == grams
+        return np.where(found, pos if self.columns is None else self.columns[pos], -1)
+
+    def __contains__(self, term):
+        return self.lookup([term])[0] >= 0
+
+    def __getitem__(self, term):
+        column = self.lookup([term])[0]
+        if column < 0:
+            raise KeyError(term)
+        return int(column)
+
+    def __len__(self):
+        return len(self.terms)
+
+
+class HashedVocabulary:
+    """Term -> column by feature hashing (sklearn HashingVectorizer, alternate_sign=False).
+
+    Nothing is stored: the column of an n-gram is murmurhash3_32 of its UTF-8
+    bytes modulo n_features, so memory does not grow with the vocabulary.
+    Every n-gram has a column (collisions share one).
+    """
+
+    def __init__(self, n_features):
+        self.n_features = int(n_features)
+
+    def lookup(self, grams):
+        return np.fromiter((_bucket(g, self.n_features) for g in grams), dtype=np.int64, count=len(grams))
+
+    def __contains__(self, term):
+        return True
+
+    def __getitem__(self, term):
+        return _bucket(term, self.n_features)
+
+    def __len__(self):
+        return self.n_features
+
+
+@lru_cache(maxsize=HASH_CACHE_SIZE)
+def _bucket(gram, n_features):
+    h = murmurhash3_32(gram.encode('utf-8'))
+    # Same bucket rule as sklearn's hashing (abs, with INT_MIN kept positive)
+    return (2 ** 31 if h == -2 ** 31 else abs(h)) % n_features
+
+
+def murmurhash3_32(data, seed=0):
+    """MurmurHash3 x86_32 of bytes, as a signed int32 (sklearn's murmurhash3_32)."""
+    c1, c2 = 0xcc9e2d51, 0x1b873593
+    length = len(data)
+    h = seed & 0xFFFFFFFF
+    n_blocks = length // 4
+    for i in range(0, n_blocks * 4, 4):
+        k = data[i] | (data[i + 1] << 8) | (data[i + 2] << 16) | (data[i + 3] << 24)
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & 0xFFFFFFFF
+        h = (h * 5 + 0xe6546b64) & 0xFFFFFFFF
+    tail = data[n_blocks * 4:]
+    k = 0
+    if len(tail) >= 3:
+        k ^= tail[2] << 16
+    if len(tail) >= 2:
+        k ^= tail[1] << 8
+    if len(tail) >= 1:
+        k ^= tail[0]
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85ebca6b) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * 0xc2b2ae35) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+
+class FactorizedScorer:
+    """Product-side TF-IDF computed once, query-side vectorized per search.
+
+    The TF-IDF row of "q | p" is built from three count vectors:
+      - the query n-grams (plus the n-grams of the "|" token for char_wb),
+      - the product n-grams (precomputed, one sparse row per product),
+      - the word n-grams that SPAN the " | " boundary. '|' is not a word
+        character so it vanishes from the token stream, which glues the last
+        query tokens to the first product tokens ("zte | zte blade" yields
+        the bigram "zte zte"). These depend only on the last (n-1) query
+        tokens and the first (n-1) product tokens, so products are grouped
+        by their first tokens and the boundary n-grams are looked up once
+        per group.
+    Only the features touched by the query side can differ from the
+    precomputed product row, so the dot product with the SGD weights and
+    the L2 norm are corrected on those entries only.
+    """
+
+    def __init__(self, vocabulary, idf, coef, intercept, text_params,
+                 product_counts, head_keys, head_groups,
+                 sublinear_tf=False, binary=False, norm='l2',
+                 product_linear=None, product_sq_norm=None, weighted_coef=None, weight_scale=1.0):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.coef = coef
+        self.intercept = intercept
+        self.text_params = text_params
+        self.analyzer = text_params['analyzer']
+        self.ngram_range = tuple(text_params['ngram_range'])
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self.norm = norm
+        self.analyze, self.tokenize = build_text_functions(text_params)
+
+        # Product side (counts restricted to the vocabulary)
+        self.product_counts = product_counts.tocsr()
+        self.head_keys = head_keys          # one tuple of leading tokens per group
+        self.head_groups = head_groups      # group index of every product
+
+        # Precomputed per-product contributions (stored in the brain artifact)
+        # coef * idf, possibly quantized (int8): the real weight is weighted_coef * weight_scale.
+        # coef itself is only needed to derive these and may be None in compressed brains.
+        self.weighted_coef = self.coef * self.idf if weighted_coef is None else weighted_coef
+        self.weight_scale = weight_scale
+        if product_linear is None or product_sq_norm is None:
+            product_tfidf = self._tf(self.product_counts) @ sp.diags(self.idf)
+            product_linear = np.asarray(product_tfidf @ self.coef).ravel()
+            product_sq_norm = np.asarray(product_tfidf.multiply(product_tfidf).sum(axis=1)).ravel()
+        self.product_linear = product_linear
+        self.product_sq_norm = product_sq_norm
+
+        self.n_products = self.product_counts.shape[0]
+
+    # --- Construction ---
+
+    @classmethod
+    def from_pipeline(cls, pipeline, search_texts):
+        """Builds the scorer from a fitted TF-IDF + SGD pipeline.
+
+        Returns None when the pipeline does not factorize (unsupported
+        analyzer, custom callables, non-linear classifier...); callers then
+        fall back to pipeline.predict_proba.
+        """
+        steps = pipeline.named_steps
+        clf = steps.get('clf')
+        if 'hash' in steps:
+            # HashingVectorizer (raw counts) + idf / norm transformer
+            vec, transformer = steps['hash'], steps.get('tfidf')
+            if vec.alternate_sign or vec.norm is not None or vec.binary or not hasattr(transformer, 'idf_'):
+                return None
+            vocabulary = HashedVocabulary(vec.n_features)
+            idf, norm = transformer.idf_, transformer.norm
+            sublinear_tf, binary = bool(transformer.sublinear_tf), False
+        else:
+            vec = steps.get('tfidf')
+            if vec is None or not hasattr(vec, 'vocabulary_'):
+                return None
+            vocabulary = vec.vocabulary_
+            idf = vec.idf_ if vec.use_idf else np.ones(len(vec.vocabulary_))
+            norm, sublinear_tf, binary = vec.norm, bool(vec.sublinear_tf), bool(vec.binary)
+        if clf is None or vec.analyzer not in ('word', 'char_wb') or norm not in ('l2', None):
+            return None
+        if vec.preprocessor is not None or vec.tokenizer is not None or not isinstance(vec.strip_accents, (str, type(None))):
+            return None
+        if getattr(clf, 'loss', None) != 'log_loss' or len(getattr(clf, 'classes_', [])) != 2:
+            return None
+
+        stop_words = vec.get_stop_words()
+        text_params = {
+            'analyzer': vec.analyzer,
+            'ngram_range': list(vec.ngram_range),
+            'lowercase': bool(vec.lowercase),
+            'strip_accents': vec.strip_accents,
+            'token_pattern': vec.token_pattern,
+            'stop_words': sorted(stop_words) if stop_words is not None else None,
+        }
+        # The separator must not produce word tokens of its own
+        if vec.analyzer == 'word' and build_text_functions(text_params)[1](SEPARATOR):
+            return None
+
+        return cls.from_texts(
+            vocabulary=vocabulary,
+            idf=np.asarray(idf, dtype=np.float64),
+            coef=np.asarray(clf.coef_[0], dtype=np.float64),
+            intercept=float(clf.intercept_[0]),
+            text_params=text_params,
+            search_texts=search_texts,
+            sublinear_tf=sublinear_tf,
+            binary=binary,
+            norm=norm,
+        )
+
+    @classmethod
+    def from_texts(cls, vocabulary, idf, coef, intercept, text_params, search_texts, **kwargs):
+        """Vectorizes the product texts once and groups them by leading tokens."""
+        analyze, tokenize = build_text_functions(text_params)
+        texts = ["" if t is None else str(t) for t in search_texts]
+        product_counts = _count_matrix([analyze(t) for t in texts], vocabulary)
+
+        head_len = text_params['ngram_range'][1] - 1 if text_params['analyzer'] == 'word' else 0
+        keys = [tuple(tokenize(t)[:head_len]) if head_len else () for t in texts]
+        head_keys = sorted(set(keys))
+        key_index = {k: i for i, k in enumerate(head_keys)}
+        head_groups = np.array([key_index[k] for k in keys], dtype=np.int64)
+
+        return cls(vocabulary, idf, coef, intercept, text_params,
+                   product_counts, head_keys, head_groups, **kwargs)
+
+    # --- Scoring ---
+
+    def _tf(self, counts):
+        """Applies binary / sublinear tf to a sparse count matrix (f(0) = 0)."""
+        tf = counts.astype(np.float64, copy=True)
+        if self.binary:
+            tf.data[:] = 1.0
+        elif self.sublinear_tf:
+            np.log(tf.data, tf.data)
+            tf.data += 1
+        return tf
+
+    def _query_grams(self, clean_query):
+        """Query-only n-grams (+ the separator's for char_wb)."""
+        grams = list(self.analyze(clean_query))
+        if self.analyzer == 'char_wb':
+            grams += self.analyze(SEPARATOR)
+        return grams
+
+    def _boundary_grams(self, clean_query, heads):
+        """N-grams spanning ' | ', one list per product head."""
+        min_n, max_n = self.ngram_range
+        if self.analyzer != 'word' or max_n < 2:
+            return [[] for _ in heads]
+
+        tail = self.tokenize(clean_query)[-(max_n - 1):]
+        rows = []
+        for head in heads:
+            joined = list(tail) + list(head)
+            grams = []
+            for n in range(max(min_n, 2), max_n + 1):
+                # start inside the query, end inside the product
+                for start in range(max(0, len(tail) - n + 1), len(tail)):
+                    if start + n <= len(joined):
+                        grams.append(" ".join(joined[start:start + n]))
+            rows.append(grams)
+        return rows
+
+    def decision_function(self, clean_query, rows=None):
+        """Raw SGD margins for 'clean_query | product' (all products or `rows`)."""
+        return self.decision_function_many([clean_query], [rows])[0]
+
+    def decision_function_many(self, clean_queries, rows_list=None):
+        """Margins for several queries in ONE sparse pass, one array per query.
+
+        Every (query, product) pair becomes a row of a single sparse matrix of
+        query-side counts; callers bound memory by chunking the queries.
+        """
+        if rows_list is None:
+            rows_list = [None] * len(clean_queries)
+
+        pair_rows = []
+        pair_query = []
+        pair_head = []
+        head_grams = []
+        for q, (clean_query, rows) in enumerate(zip(clean_queries, rows_list)):
+            rows = np.arange(self.n_products) if rows is None else np.asarray(rows, dtype=np.int64)
+            # Boundary n-grams only for the head groups present in these rows
+            used_groups, group_of_row = np.unique(self.head_groups[rows], return_inverse=True)
+            pair_head.append(group_of_row + len(head_grams))
+            head_grams += self._boundary_grams(clean_query, [self.head_keys[g] for g in used_groups])
+            pair_rows.append(rows)
+            pair_query.append(np.full(len(rows), q, dtype=np.int64))
+
+        sizes = [len(rows) for rows in pair_rows]
+        if not sum(sizes):
+            return [np.zeros(0) for _ in sizes]
+
+        query_counts = _count_matrix([self._query_grams(q) for q in clean_queries], self.vocabulary)
+        boundary = _count_matrix(head_grams, self.vocabulary)
+        added = query_counts[np.concatenate(pair_query)] + boundary[np.concatenate(pair_head)]
+        margins = self._pair_margins(np.concatenate(pair_rows), added.tocsr())
+        return np.split(margins, np.cumsum(sizes)[:-1])
+
+    def _pair_margins(self, pair_rows, added):
+        """Margins of product rows `pair_rows` once the query-side counts are added."""
+        counts = self.product_counts[pair_rows]
+        linear = self.product_linear[pair_rows]
+        sq_norm = self.product_sq_norm[pair_rows]
+        added.eliminate_zeros()
+
+        # Correct only the entries where the query side lands
+        mask = added.copy()
+        mask.data[:] = 1.0
+        before = counts.multiply(mask).tocsr()
+        after = (before + added).tocsr()
+
+        tf_before = self._tf(before)
+        tf_after = self._tf(after)
+        delta = tf_after @ self.weighted_coef - tf_before @ self.weighted_coef
+        linear = linear + (delta if self.weight_scale == 1.0 else self.weight_scale * delta)
+
+        if self.norm == 'l2':
+            idf_sq = self.idf ** 2
+            sq_norm = sq_norm + (tf_after.multiply(tf_after) @ idf_sq - tf_before.multiply(tf_before) @ idf_sq)
+            norm = np.sqrt(np.maximum(sq_norm, 0.0))
+            linear = np.divide(linear, norm, out=np.zeros_like(linear), where=norm > 0)
+
+        return linear + self.intercept
+
+    def score(self, clean_query, rows=None, out=None):
+        """Match probability (predict_proba[:, 1]) for every product or `rows`.
+
+        `out` is an optional preallocated buffer of the right length.
+        """
+        return _sigmoid(self.decision_function(clean_query, rows), out=out)
+
+    def score_many(self, clean_queries, rows_list=None):
+        """score() for a batch of queries, one probability array per query."""
+        return [_sigmoid(m) for m in self.decision_function_many(clean_queries, rows_list)]
+
+class CandidateIndex:
+    """Inverted index over product tokens used to pick classifier candidates.
+
+    Stage 1 of a two-stage search: the query tokens (already synonym-expanded
+    by preprocess_query) are looked up in postings built from the product
+    name, category and description. Model codes are indexed both as written
+    ("dwr", "g403") and glued ("dwrg403"), and every token also posts under
+    its 3-letter prefix so typos like "samsng" still reach "samsung".
+    Products are ranked by summed idf of the matched keys and at most
+    max_candidates of them are returned.
+
+    Recall safety net: catalogs no bigger than max_candidates are scored in
+    full (exactly the old behaviour), and weak matches are padded up to
+    min_candidates with the products that score best on an empty query.
+    """
+
+    PREFIX_LEN = 3
+    PREFIX_WEIGHT = 0.5
+
+    def __init__(self, keys, postings, fallback, max_candidates=MAX_CANDIDATES, min_candidates=MIN_CANDIDATES):
+        self.keys = keys                # index key -> row of `postings` (dict or SortedVocabulary)
+        self.postings = postings        # (n_keys x n_products) CSR of idf weights
+        self.n_products = postings.shape[1]
+        self.max_candidates = max_candidates
+        self.min_candidates = min_candidates
+        # Fallback order when the query matches (almost) nothing
+        self.fallback = fallback
+
+    @classmethod
+    def from_texts(cls, product_texts, prior=None, **kwargs):
+        """Builds the postings from one text (name + category + description) per product."""
+        keys = {}
+        rows = []
+        cols = []
+        for product, text in enumerate(product_texts):
+            for key in sorted(set(index_keys(text))):
+                rows.append(keys.setdefault(key, len(keys)))
+                cols.append(product)
+
+        n_products = len(product_texts)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        df = np.bincount(rows, minlength=len(keys)) if len(keys) else np.zeros(0)
+        idf = np.log((1 + n_products) / (1 + df)) + 1
+        weights = idf[rows] * np.asarray(
+            [cls.PREFIX_WEIGHT if k.startswith('^') else 1.0 for k in keys], dtype=np.float64)[rows]
+
+        postings = sp.csr_matrix((weights, (rows, cols)), shape=(len(keys), n_products))
+        if prior is None:
+            prior = np.zeros(n_products)
+        min_candidates = kwargs.get('min_candidates', MIN_CANDIDATES)
+        fallback = np.argsort(-np.asarray(prior, dtype=np.float64), kind='stable')[:max(min_candidates, 0)]
+        return cls(keys, postings, fallback, **kwargs)
+
+    def candidates(self, clean_query):
+        """Sorted row positions of the products worth scoring (None = all)."""
+        if self.n_products <= self.max_candidates:
+            return None
+
+        key_rows = np.unique(_lookup(self.keys, index_keys(clean_query)))
+        key_rows = key_rows[key_rows >= 0]
+        hits = self.postings[key_rows]
+        products, position = np.unique(hits.indices, return_inverse=True)
+        weight = np.bincount(position, weights=hits.data) if len(products) else np.zeros(0)
+
+        if len(products) > self.max_candidates:
+            best = np.argpartition(-weight, self.max_candidates - 1)[:self.max_candidates]
+            products = products[best]
+
+        if len(products) < self.min_candidates:
+            padding = self.fallback[~np.isin(self.fallback, products)]
+            products = np.concatenate([products, padding])[:max(self.max_candidates, len(products))]
+        return np.sort(products)
+
+
+class QueryCache:
+    """Bounded LRU cache of search results with an optional TTL.
+
+    Keys are built by the engine from the preprocessed query and top_k.
+    The cache is bound to a model fingerprint (hash of the artifact):
+    binding a different fingerprint drops every entry.
+    """
+
+    def __init__(self, max_size=CACHE_SIZE, ttl=CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.fingerprint = None
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def bind(self, fingerprint):
+        """Attaches the cache to a model; a new fingerprint invalidates it."""
+        if fingerprint != self.fingerprint:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.fingerprint = fingerprint
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, value = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class PrefixCompleter:
+    """Ranked prefix completions for the search entry (sorted-array trie).
+
+    Suggestions (product names, model codes, synonym keys, popular past
+    queries) are ranked once at build time by popularity. Each one is
+    indexed under its full text and under every later word, so "g4" finds
+    "DWR G403" too. Keys are folded (lowercase, no accents) and sorted; a
+    keystroke costs two binary searches for the prefix range plus a partial
+    sort of the ranks inside it. Matches at the start of a suggestion rank
+    before matches on a later word.
+    """
+
+    MAX_KEY = chr(0x10FFFF)
+    MIN_QUERY_COUNT = 2
+
+    def __init__(self, keys, ranks, labels):
+        self.keys = keys        # sorted folded key strings
+        self.ranks = ranks      # rank of each key (suggestion id, + n for later-word keys)
+        self.labels = labels    # display text of each suggestion, best first
+
+    @classmethod
+    def from_catalog(cls, product_names, product_texts=(), synonyms=(), queries=(),
+                     min_query_count=MIN_QUERY_COUNT):
+        """Builds the completions from the catalog and a log of past queries.
+
+        A past query is kept when it was seen at least `min_query_count`
+        times and every word of it occurs in the catalog or the synonyms,
+        which keeps frequent typos ("hcoo") out of the dropdown.
+        """
+        weights = Counter()
+        display = {}
+
+        def add(label, weight):
+            label = " ".join(str(label).split())
+            key = completion_key(label)
+            if key:
+                weights[key] += weight
+                display.setdefault(key, label)
+
+        known = set()
+        for text in list(product_names) + list(product_texts) + list(synonyms):
+            known.update(completion_key(text).split())
+
+        for name in product_names:
+            name = str(name)
+            add(name, 1)
+            for code in model_codes(name):
+                add(code, 1)
+        for word in synonyms:
+            add(word, 1)
+        for query, count in Counter(completion_key(q) for q in queries).items():
+            if count >= min_query_count and query and all(w in known for w in query.split()):
+                add(query, count)
+
+        # Most popular first, then shorter, then alphabetical
+        ordered = sorted(weights, key=lambda k: (-weights[k], len(k), k))
+        n = len(ordered)
+        keys, ranks = [], []
+        for rank, key in enumerate(ordered):
+            for start in [0] + [i + 1 for i, c in enumerate(key) if c == " "]:
+                keys.append(key[start:])
+                ranks.append(rank if start == 0 else rank + n)
+
+        keys = np.array(keys, dtype=str)
+        order = np.argsort(keys, kind='stable')
+        labels = np.array([display[k] for k in ordered], dtype=str)
+        return cls(keys[order], np.asarray(ranks, dtype=np.int64)[order], labels)
+
+    def complete(self, prefix, k=8):
+        """Up to k suggestion labels starting with `prefix` (best first)."""
+        prefix = completion_key(prefix)
+        n = len(self.labels)
+        if not prefix or not n:
+            return []
+        lo = np.searchsorted(self.keys, prefix, side='left')
+        hi = np.searchsorted(self.keys, prefix + self.MAX_KEY, side='left')
+        ranks = self.ranks[lo:hi]
+        if not len(ranks):
+            return []
+
+        # One suggestion can match on several words: take a few extra, dedupe
+        take = min(len(ranks), 4 * k)
+        while True:
+            best = np.sort(ranks[np.argpartition(ranks, take - 1)[:take]] if take < len(ranks) else ranks)
+            seen = []
+            for entry in best % n:
+                if entry not in seen:
+                    seen.append(entry)
+                    if len(seen) == k:
+                        break
+            if len(seen) == k or take == len(ranks):
+                return [str(self.labels[e]) for e in seen]
+            take = min(len(ranks), take * 4)
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def fingerprint_bytes(data):
+    """Short content hash of a model artifact."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def fold_accents(text):
+    """'Écouteur' -> 'ecouteur' (lowercase, combining marks dropped)."""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def index_keys(text):
+    """Tokens, glued model codes and 3-letter prefixes used by CandidateIndex."""
+    tokens = [t for t in re.findall(r'[^\W_]+', fold_accents(text)) if len(t) > 1]
+    keys = list(tokens)
+    for left, right in zip(tokens, tokens[1:]):
+        # Model codes split by a space: "dwr g403" -> "dwrg403", "ew 26" -> "ew26"
+        if left.isalpha() and any(c.isdigit() for c in right):
+            keys.append(left + right)
+    keys += ['^' + t[:CandidateIndex.PREFIX_LEN] for t in tokens if len(t) > CandidateIndex.PREFIX_LEN]
+    return keys
+
+
+def completion_key(text):
+    """Folded, whitespace-collapsed form used by PrefixCompleter."""
+    return " ".join(fold_accents(text).split())
+
+
+def model_codes(name):
+    """Model codes in a product name: 'A35', 'EW26', and split ones like 'DWR G403'."""
+    tokens = re.findall(r'[^\W_]+', str(name))
+    codes = [t for t in tokens if len(t) > 1 and any(c.isdigit() for c in t) and any(c.isalpha() for c in t)]
+    for left, right in zip(tokens, tokens[1:]):
+        if left.isalpha() and left.isupper() and any(c.isdigit() for c in right):
+            codes.append(f"{left} {right}")
+    return codes
+
+
+def _lookup(vocabulary, terms):
+    """Columns of `terms` in a dict, SortedVocabulary or HashedVocabulary (-1 when missing)."""
+    if isinstance(vocabulary, (SortedVocabulary, HashedVocabulary)):
+        return vocabulary.lookup(terms)
+    return np.array([vocabulary.get(t, -1) for t in terms], dtype=np.int64)
+
+
+def _count_matrix(gram_lists, vocabulary):
+    """Sparse count matrix of in-vocabulary n-grams, one row per list."""
+    rows = np.repeat(np.arange(len(gram_lists)), [len(grams) for grams in gram_lists])
+    columns = _lookup(vocabulary, [g for grams in gram_lists for g in grams])
+    keep = columns >= 0
+    # Duplicate (row, column) pairs are summed into counts
+    matrix = sp.csr_matrix(
+        (np.ones(int(keep.sum())), (rows[keep], columns[keep])),
+        shape=(len(gram_lists), len(vocabulary))
+    )
+    matrix.sum_duplicates()
+    return matrix
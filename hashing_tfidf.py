@@ -0,0 +1,67 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.preprocessing import normalize
+
+# ==========================================
+# ONLINE IDF FOR HASHED FEATURES
+# ==========================================
+# Used after a HashingVectorizer(norm=None, alternate_sign=False) in the
+# 'hashing' engine configuration. Document frequencies are one counter
+# per hash bucket, updated by partial_fit, so memory is fixed by
+# n_features however large the dataset or its n-gram vocabulary gets.
+# The idf formula and normalization are TfidfTransformer's
+# (smooth_idf=True), so the factorized scorer treats both the same way.
+# Empty buckets get idf 0: an n-gram never seen in training is ignored,
+# as TfidfVectorizer ignores terms outside its vocabulary.
+# sample_weight counts a row as that many documents (training rows that
+# stand for several identical rows, see DjezzySearchAI dedup_rows).
+#
+# Kept in its own module: pickled pipelines reference this class by
+# module path, which must not be __main__.
+
+
+class OnlineTfidfTransformer(TransformerMixin, BaseEstimator):
+    """TF-IDF weighting with document frequencies accumulated batch by batch."""
+
+    def __init__(self, norm='l2', sublinear_tf=False):
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+
+    def fit(self, X, y=None, sample_weight=None):
+        self.n_docs_ = 0
+        self.df_ = None
+        return self.partial_fit(X, sample_weight=sample_weight)
+
+    def partial_fit(self, X, y=None, sample_weight=None):
+        X = sp.csr_matrix(X)
+        if getattr(self, 'df_', None) is None:
+            self.n_docs_ = 0
+            self.df_ = np.zeros(X.shape[1], dtype=np.float64)
+        if sample_weight is None:
+            self.df_ += np.bincount(X.indices, minlength=X.shape[1])[:X.shape[1]]
+            self.n_docs_ += X.shape[0]
+        else:
+            sample_weight = np.asarray(sample_weight, dtype=np.float64)
+            weights = np.repeat(sample_weight, np.diff(X.indptr))
+            self.df_ += np.bincount(X.indices, weights=weights, minlength=X.shape[1])[:X.shape[1]]
+            self.n_docs_ += sample_weight.sum()
+        return self
+
+    @property
+    def idf_(self):
+        # Buckets no fitted document touched get 0, so unseen n-grams drop out
+        # of the vector (and its norm) like out-of-vocabulary terms do
+        idf = np.log((1 + self.n_docs_) / (1 + self.df_)) + 1
+        idf[self.df_ == 0] = 0.0
+        return idf
+
+    def transform(self, X):
+        X = sp.csr_matrix(X, dtype=np.float64, copy=True)
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        X = X @ sp.diags(self.idf_)
+        if self.norm is not None:
+            X = normalize(X, norm=self.norm, copy=False)
+        return X
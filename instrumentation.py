@@ -0,0 +1,186 @@
+import bisect
+import cProfile
+import io
+import pstats
+import time
+
+# ==========================================
+# STAGE TIMING (stdlib only, safe to import from the Tk interface)
+# ==========================================
+# Usage inside the engine:
+#
+#   with self.timer.call('search'):
+#       with self.timer.stage('candidates'):
+#           ...
+#
+# Disabled (the default) both return a shared no-op context, so the cost
+# is one attribute check per stage. Enabled, every call leaves a per-stage
+# breakdown in timer.last and feeds cumulative histograms (timer.stats(),
+# timer.report()). With profile=True the calls also run under cProfile
+# (timer.profile_report()).
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000, float('inf'))
+
+
+class StageTimer:
+    """Toggleable monotonic timers around the stages of engine calls."""
+
+    def __init__(self, enabled=False, profile=False):
+        self.enabled = enabled
+        self.profile = profile
+        self.last = None            # breakdown of the last finished call
+        self._current = None        # breakdown being filled
+        self._series = {}           # "call.stage" -> _Series
+        self._profiler = None
+
+    def call(self, name):
+        """Context manager around one engine call (search, train, ...)."""
+        if not self.enabled:
+            return _NULL
+        return _Call(self, name)
+
+    def stage(self, name):
+        """Context manager around one stage of the current call."""
+        if not self.enabled:
+            return _NULL
+        return _Stage(self, name)
+
+    def reset(self):
+        self.last = None
+        self._series.clear()
+        self._profiler = None
+
+    def stats(self):
+        """Cumulative histogram per "call.stage" (and "call.total")."""
+        return {key: series.stats() for key, series in sorted(self._series.items())}
+
+    def report(self):
+        """Text table of the cumulative statistics."""
+        lines = [f"{'stage':<32} {'count':>7} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>9}"]
+        for key, s in self.stats().items():
+            lines.append(f"{key:<32} {s['count']:>7} {s['mean_ms']:>9.3f} {_bound(s['p50_ms']):>8} "
+                         f"{_bound(s['p95_ms']):>8} {s['max_ms']:>9.3f}")
+        return "\n".join(lines)
+
+    def profile_report(self, limit=25, sort='cumulative'):
+        """cProfile statistics of the profiled calls (empty when profile was off)."""
+        if self._profiler is None:
+            return ""
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def _record(self, key, seconds):
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        series.add(seconds * 1000)
+
+
+class _Series:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def stats(self):
+        cumulative = []
+        running = 0
+        for n in self.buckets:
+            running += n
+            cumulative.append(running)
+        return {
+            'count': self.count,
+            'total_ms': self.total_ms,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'max_ms': self.max_ms,
+            # Percentiles as bucket upper bounds (what a histogram can tell)
+            'p50_ms': self._quantile(cumulative, 0.50),
+            'p95_ms': self._quantile(cumulative, 0.95),
+            'buckets': {_bound(le): c for le, c in zip(BUCKETS_MS, cumulative)},
+        }
+
+    def _quantile(self, cumulative, q):
+        target = q * self.count
+        for le, c in zip(BUCKETS_MS, cumulative):
+            if c >= target and c > 0:
+                return le
+        return 0.0
+
+
+class _Call:
+    __slots__ = ('timer', 'name', 'start', 'outer')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        timer = self.timer
+        self.outer = timer._current
+        timer._current = {'call': self.name, 'stages': {}}
+        if timer.profile and self.outer is None:
+            if timer._profiler is None:
+                timer._profiler = cProfile.Profile()
+            timer._profiler.enable()
+        self.start = time.perf_counter()
+        return timer._current
+
+    def __exit__(self, *exc):
+        total = time.perf_counter() - self.start
+        timer = self.timer
+        if timer.profile and self.outer is None and timer._profiler is not None:
+            timer._profiler.disable()
+        breakdown = timer._current
+        breakdown['total_ms'] = total * 1000
+        timer._record(f"{self.name}.total", total)
+        timer.last = breakdown
+        timer._current = self.outer
+        return False
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        current = self.timer._current
+        call = current['call'] if current is not None else "-"
+        if current is not None:
+            current['stages'][self.name] = current['stages'].get(self.name, 0.0) + seconds * 1000
+        self.timer._record(f"{call}.{self.name}", seconds)
+        return False
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullContext()
+
+
+def _bound(le):
+    return "inf" if le == float('inf') else f"{le:g}"
@@ -0,0 +1,75 @@
+import hashlib
+import re
+
+from fast_search import model_codes
+
+# ==========================================
+# CANONICAL PRODUCT IDENTITY
+# ==========================================
+# Scraped listings repeat: the same SKU appears twice in scraping4.json,
+# or as "ZTE ZTE BLADE A35" next to "ZTE BLADE A35", or as "DWR-G403"
+# next to "DWR G403". Each listing used to get its own uuid, so the engine
+# scored and displayed every copy.
+#
+# sku_key() is the identity of a product:
+#   - the name and the description are lowercased and split into words,
+#     punctuation dropped,
+#   - split model codes are fused ("DWR G403", "dwr-g403" -> "dwrg403"),
+#   - words are taken as a set (order and repeats do not matter),
+#   - the price keeps its digits only.
+# A shared model code alone is not enough: "HOCO C72Q micro" and "HOCO
+# C72Q type c" are two SKUs at the same price, and so are the same name
+# at two prices. The description is part of the key because the v2
+# catalogs often name a product by its brand only ("D-Link", "EL DJAZIRA")
+# and keep the model in the description: two listings with different
+# descriptions are two products.
+# content_id() hashes the key, so an id is the same on every run and every
+# machine; text_id() hashes exact field values when listings must keep
+# distinct ids. unique_sku_positions() keeps the first listing of each SKU.
+
+ID_LENGTH = 8
+
+
+def price_digits(price):
+    return "".join(c for c in str(price) if c.isdigit())
+
+
+def normalized_words(text):
+    """Sorted set of the words of a name or description, split model codes fused."""
+    text = "" if text != text or text is None else str(text)     # NaN / None -> ""
+    words = " ".join(re.findall(r'[^\W_]+', text.lower()))
+    # Upper-cased so "Dwr g403" and "DWR G403" fuse the same way
+    for code in model_codes(text.upper()):
+        if " " in code:
+            code = code.lower()
+            words = re.sub(rf'\b{re.escape(code)}\b', code.replace(" ", ""), words)
+    return " ".join(sorted(set(words.split())))
+
+
+def sku_key(name, price, description=""):
+    """Canonical identity of a product: normalized name and description words + price digits."""
+    return normalized_words(name) + "|" + normalized_words(description) + "|" + price_digits(price)
+
+
+def content_id(name, price, description="", length=ID_LENGTH):
+    """Stable product id: hash of sku_key (same width as the old uuid ids)."""
+    return hashlib.sha1(sku_key(name, price, description).encode('utf-8')).hexdigest()[:length]
+
+
+def text_id(*fields, length=ID_LENGTH):
+    """Stable id of exact field values: hash of the fields, without sku_key's normalization."""
+    return hashlib.sha1("\x1f".join(str(field) for field in fields).encode('utf-8')).hexdigest()[:length]
+
+
+def unique_sku_positions(names, prices, descriptions=None):
+    """Positions of the first listing of every SKU, in catalog order."""
+    names, prices = list(names), list(prices)
+    descriptions = [""] * len(names) if descriptions is None else list(descriptions)
+    seen = set()
+    positions = []
+    for i, (name, price, description) in enumerate(zip(names, prices, descriptions)):
+        key = sku_key(name, price, description)
+        if key not in seen:
+            seen.add(key)
+            positions.append(i)
+    return positions
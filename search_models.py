@@ -0,0 +1,278 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool
+
+# ==========================================
+# PARALLEL MODEL SEARCH (VECTORIZER x SGD GRID)
+# ==========================================
+# Each generation of the engine fixed its model by hand (ai_test1/2: char_wb
+# 2-5-grams, ai_test4: word 1-3-grams, all with alpha=1e-4). This driver
+# evaluates a grid of vectorizer and SGDClassifier settings on the same
+# split by query (bench_hashing.split_by_query) in two process-pool phases:
+#   1. features: every distinct vectorizer is fitted once on the training
+#      rows and its matrix is cached on disk (X.npz, y.npy, fitted steps),
+#      keyed by the dataset content, the split, the vectorizer settings, the
+#      query synonyms, the scikit-learn version and CACHE_FORMAT, so reruns
+#      and other classifier settings reuse it and upgrades do not,
+#   2. candidates: every (vectorizer, classifier) pair loads the cached
+#      matrix, fits the classifier and is turned into a full DjezzySearchAI
+#      (factorized scorer, index) for the held-out evaluation.
+# Reported per candidate:
+#   quality: AUC, log loss, hit@5 and MRR of held-out queries (bench_hashing.evaluate)
+#   cost:    vectorize (once per vectorizer) and fit time, search() p50,
+#            .pkl and .brain size
+# Candidates fit every training row (like dedup_rows=False) with the
+# vectorizer's own fit on the "QUERY | PRODUCT INFO" strings, so char_wb
+# settings are searched the same way as word ones.
+#
+# Usage: python search_models.py [--data dataset_train4.csv] [--vectorizers word_1_3 char_wb_2_5 ...]
+#                                [--classifiers alpha_0.0001 ...] [--workers N] [--cache-dir .feature_cache]
+#                                [--out search_models.json]
+
+OUT_FILE = "search_models.json"
+CACHE_DIR = ".feature_cache"
+# Bump when make_features, build_steps or the cached files change
+CACHE_FORMAT = 1
+HOLDOUT = 0.2
+SEED = 42
+
+# Vectorizer settings: features='tfidf' (TfidfVectorizer) or 'hashing'
+# (HashingVectorizer + OnlineTfidfTransformer), other keys are their parameters
+VECTORIZERS = {
+    'word_1_3': {'features': 'tfidf', 'analyzer': 'word', 'ngram_range': [1, 3]},            # ai_test4
+    'word_1_2': {'features': 'tfidf', 'analyzer': 'word', 'ngram_range': [1, 2]},
+    'word_1_3_sublinear': {'features': 'tfidf', 'analyzer': 'word', 'ngram_range': [1, 3], 'sublinear_tf': True},
+    'char_wb_2_5': {'features': 'tfidf', 'analyzer': 'char_wb', 'ngram_range': [2, 5]},      # ai_test1/2
+    'char_wb_3_5': {'features': 'tfidf', 'analyzer': 'char_wb', 'ngram_range': [3, 5]},
+    'hashing_word_1_3': {'features': 'hashing', 'analyzer': 'word', 'ngram_range': [1, 3], 'n_features': 2 ** 18},
+}
+# SGDClassifier settings on top of loss='log_loss', penalty='l2', random_state=42
+CLASSIFIERS = {
+    'alpha_1e-05': {'alpha': 1e-5},
+    'alpha_3e-05': {'alpha': 3e-5},
+    'alpha_0.0001': {'alpha': 1e-4},                                    # every engine so far
+    'alpha_0.0003': {'alpha': 3e-4},
+    'alpha_0.001': {'alpha': 1e-3},
+    'elasticnet_0.0001': {'alpha': 1e-4, 'penalty': 'elasticnet', 'l1_ratio': 0.15},
+}
+
+_DATA = {}   # (path, holdout, seed) -> (train_df, test_df), loaded once per worker process
+
+
+def build_steps(spec):
+    """Unfitted pipeline steps (before 'clf') of a VECTORIZERS entry."""
+    from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
+    from hashing_tfidf import OnlineTfidfTransformer
+
+    params = {k: tuple(v) if k == 'ngram_range' else v for k, v in spec.items() if k != 'features'}
+    if spec['features'] == 'hashing':
+        sublinear_tf = params.pop('sublinear_tf', False)
+        return [('hash', HashingVectorizer(alternate_sign=False, norm=None, **params)),
+                ('tfidf', OnlineTfidfTransformer(sublinear_tf=sublinear_tf))]
+    if spec['features'] == 'tfidf':
+        return [('tfidf', TfidfVectorizer(**params))]
+    raise ValueError(f"features must be 'tfidf' or 'hashing', got '{spec['features']}'")
+
+
+def dataset_fingerprint(path):
+    """sha1 of the dataset bytes (all partitions of a folder)."""
+    from ai_test4 import dataset_files
+
+    digest = hashlib.sha1()
+    for name in dataset_files(path):
+        with open(name, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def load_split(path, holdout, seed):
+    """(train_df, test_df) of a CSV / partition folder / Parquet / Arrow dataset."""
+    key = (path, holdout, seed)
+    if key not in _DATA:
+        import pandas as pd
+        from ai_test4 import TRAIN_COLUMNS, dataset_files
+        from bench_hashing import split_by_query
+        from columnar_dataset import dataset_format, plain_frame, read_table
+
+        if dataset_format(path) != 'csv':
+            df = plain_frame(read_table(path, TRAIN_COLUMNS).to_pandas())
+        else:
+            df = pd.concat([pd.read_csv(f) for f in dataset_files(path)], ignore_index=True)
+        _DATA[key] = split_by_query(df, holdout, seed)
+    return _DATA[key]
+
+
+def cache_path(cache_dir, data_key, holdout, seed, spec):
+    import sklearn
+    from text_normalization import SYNONYMS
+
+    key = json.dumps({'data': data_key, 'holdout': holdout, 'seed': seed, 'vectorizer': spec,
+                      'synonyms': SYNONYMS, 'sklearn': sklearn.__version__, 'format': CACHE_FORMAT},
+                     sort_keys=True)
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+
+def build_features(task):
+    """Phase 1: fits one vectorizer and caches its training matrix; returns its metadata."""
+    import numpy as np
+    import scipy.sparse as sp
+    from ai_test4 import make_features
+
+    name, spec, data_path, path, holdout, seed = task
+    meta_file = os.path.join(path, "meta.json")
+    if os.path.exists(meta_file):
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            return dict(json.load(f), cached=True)
+
+    train_df, _ = load_split(data_path, holdout, seed)
+    steps = build_steps(spec)
+    start = time.perf_counter()
+    X = make_features(train_df)
+    for _, step in steps:
+        X = step.fit_transform(X)
+    vectorize_s = time.perf_counter() - start
+
+    # Written to a temporary folder and renamed: a cache entry is complete or absent
+    tmp = tempfile.mkdtemp(prefix="tmp_", dir=os.path.dirname(path))
+    sp.save_npz(os.path.join(tmp, "X.npz"), sp.csr_matrix(X))
+    np.save(os.path.join(tmp, "y.npy"), train_df['relevance_label'].to_numpy())
+    with open(os.path.join(tmp, "steps.pkl"), 'wb') as f:
+        pickle.dump(steps, f)
+    meta = {'vectorizer': name, 'spec': spec, 'rows': X.shape[0], 'n_features': X.shape[1],
+            'nnz': int(X.nnz), 'vectorize_s': vectorize_s}
+    with open(os.path.join(tmp, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    try:
+        os.rename(tmp, path)
+    except OSError:     # built meanwhile by another run
+        shutil.rmtree(tmp, ignore_errors=True)
+    return dict(meta, cached=False)
+
+
+def evaluate_candidate(task):
+    """Phase 2: fits one classifier on a cached matrix and evaluates the engine built from it."""
+    import numpy as np
+    import scipy.sparse as sp
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import Pipeline
+    from ai_test4 import DjezzySearchAI, PRODUCT_COLUMNS
+    from bench_hashing import evaluate
+
+    vec_name, clf_name, clf_params, path, data_path, holdout, seed, work_dir = task
+    train_df, test_df = load_split(data_path, holdout, seed)
+    X = sp.load_npz(os.path.join(path, "X.npz"))
+    y = np.load(os.path.join(path, "y.npy"))
+    with open(os.path.join(path, "steps.pkl"), 'rb') as f:
+        steps = pickle.load(f)
+
+    params = dict({'loss': 'log_loss', 'penalty': 'l2', 'random_state': 42}, **clf_params)
+    classifier = SGDClassifier(**params)
+    start = time.perf_counter()
+    classifier.fit(X, y)
+    fit_s = time.perf_counter() - start
+
+    # The same engine train() would build: catalog, factorized scorer, index, completer
+    engine = DjezzySearchAI()
+    engine.pipeline = Pipeline(steps + [('clf', classifier)])
+    start = time.perf_counter()
+    engine._set_products(train_df[PRODUCT_COLUMNS].drop_duplicates(subset=['product_id']).copy())
+    engine._finish_training(train_df.loc[train_df['relevance_label'] == 1, 'user_query'])
+    build_s = time.perf_counter() - start
+
+    name = f"{vec_name}__{clf_name}"
+    pkl = os.path.join(work_dir, f"{name}.pkl")
+    brain = os.path.join(work_dir, f"{name}.brain")
+    engine.save_model(pkl)
+    engine.save_brain(brain)
+    result = {
+        'candidate': name,
+        'vectorizer': vec_name,
+        'classifier': clf_name,
+        'classifier_params': params,
+        'fit_s': fit_s,
+        'build_s': build_s,
+        'epochs': int(classifier.n_iter_),
+        'pkl_kb': os.path.getsize(pkl) / 1024,
+        'brain_kb': sum(os.path.getsize(os.path.join(brain, f)) for f in os.listdir(brain)) / 1024
+                    if os.path.isdir(brain) else None,
+        'export_max_diff': engine.check_export(),
+    }
+    result.update(evaluate(engine, test_df))
+    return result
+
+
+def run_tasks(fn, tasks, workers):
+    if workers == 1 or len(tasks) <= 1:
+        return [fn(t) for t in tasks]
+    with Pool(min(workers, len(tasks))) as pool:
+        return pool.map(fn, tasks)
+
+
+def main():
+    from ai_test4 import DATASET_FILE
+
+    parser = argparse.ArgumentParser(description="Parallel vectorizer x SGD model search")
+    parser.add_argument("--data", default=DATASET_FILE)
+    parser.add_argument("--vectorizers", nargs="*", choices=list(VECTORIZERS), default=list(VECTORIZERS))
+    parser.add_argument("--classifiers", nargs="*", choices=list(CLASSIFIERS), default=list(CLASSIFIERS))
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--holdout", type=float, default=HOLDOUT)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--out", default=OUT_FILE)
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    data_key = dataset_fingerprint(args.data)
+    paths = {name: cache_path(args.cache_dir, data_key, args.holdout, args.seed, VECTORIZERS[name])
+             for name in args.vectorizers}
+
+    print(f"[SEARCH] Phase 1: {len(paths)} feature matrices ({workers} workers, cache '{args.cache_dir}')...")
+    start = time.perf_counter()
+    features = run_tasks(build_features, [(name, VECTORIZERS[name], args.data, paths[name], args.holdout, args.seed)
+                                          for name in args.vectorizers], workers)
+    features_s = time.perf_counter() - start
+    for meta in features:
+        print(f"  {meta['vectorizer']:<22} {meta['n_features']:>8} features  {meta['vectorize_s']:>6.2f} s"
+              f"{'  (cached)' if meta['cached'] else ''}")
+
+    work_dir = tempfile.mkdtemp(prefix="djezzy_search_")
+    tasks = [(v, c, CLASSIFIERS[c], paths[v], args.data, args.holdout, args.seed, work_dir)
+             for v in args.vectorizers for c in args.classifiers]
+    print(f"[SEARCH] Phase 2: {len(tasks)} candidates...")
+    start = time.perf_counter()
+    results = run_tasks(evaluate_candidate, tasks, workers)
+    candidates_s = time.perf_counter() - start
+
+    vectorize_s = {meta['vectorizer']: meta['vectorize_s'] for meta in features}
+    n_features = {meta['vectorizer']: meta['n_features'] for meta in features}
+    for r in results:
+        r['vectorize_s'] = vectorize_s[r['vectorizer']]
+        r['n_features'] = n_features[r['vectorizer']]
+    results.sort(key=lambda r: (r['mrr'] or 0, r['auc']), reverse=True)
+
+    print(f"\n{'candidate':<42} {'features':>9} {'vec s':>6} {'fit s':>6} {'AUC':>6} {'logloss':>8} "
+          f"{'hit@5':>6} {'MRR':>6} {'p50 ms':>7} {'pkl KB':>8} {'brain KB':>9}")
+    for r in results:
+        print(f"{r['candidate']:<42} {r['n_features']:>9} {r['vectorize_s']:>6.2f} {r['fit_s']:>6.2f} "
+              f"{r['auc']:>6.3f} {r['log_loss']:>8.4f} {r['hit_at_5'] or 0:>6.1%} {r['mrr'] or 0:>6.3f} "
+              f"{r['search_p50_ms']:>7.2f} {r['pkl_kb']:>8.0f} {r['brain_kb'] or 0:>9.0f}")
+    print(f"\n[SEARCH] features {features_s:.1f} s ({sum(not m['cached'] for m in features)} built), "
+          f"candidates {candidates_s:.1f} s. Best: {results[0]['candidate']}")
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'data': args.data, 'data_sha1': data_key, 'holdout': args.holdout, 'seed': args.seed,
+                   'workers': workers, 'features': features, 'results': results}, f, indent=2)
+    print(f"[SEARCH] Results written to '{args.out}' (models in '{work_dir}')")
+
+
+if __name__ == "__main__":
+    main()
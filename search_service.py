@@ -0,0 +1,294 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from ai_test4 import DjezzySearchAI, MODEL_FILE
+from brain_format import brain_path_for
+
+# ==========================================
+# LOCAL SEARCH SERVICE (HTTP/JSON, asyncio, stdlib only)
+# ==========================================
+# Several POS terminals and the web front end share ONE loaded model.
+# Requests that arrive within BATCH_WINDOW_MS of each other are coalesced
+# and answered by a single DjezzySearchAI.search_many() call, which runs
+# on one inference thread so the event loop keeps accepting connections.
+#
+#   GET  /search?q=modem+wifi&top_k=5    -> {"query", "results": [...]}
+#   POST /search {"query": "...", "top_k": 5}
+#   GET  /complete?q=dwr                 -> {"prefix", "suggestions": [...]}
+#   GET  /stats                          -> latency p50/p99, queue depth, batches
+#   GET  /health
+#
+# Pre-fork mode (workers > 1): one process per core, all accepting on the
+# same listening socket. The model is a .brain folder (a .pkl is exported
+# once) that every worker memory-maps: vocabulary, idf, coefficients,
+# product counts and the product table sit ONCE in the OS page cache, and
+# each worker only owns its score buffer and request state. /stats is per
+# worker.
+#
+# Usage: python search_service.py [model (.brain folder or .pkl)] [port] [workers]
+# Binds 127.0.0.1 only.
+
+HOST = "127.0.0.1"
+PORT = 8765
+BATCH_WINDOW_MS = 3      # how long the first request of a batch waits for company
+MAX_BATCH = 64           # queries per search_many() call
+MAX_TOP_K = 50
+LATENCY_WINDOW = 2000    # latencies kept for the percentiles
+WORKERS = 1
+
+
+class MicroBatcher:
+    """Coalesces concurrent search requests into batched inference calls."""
+
+    def __init__(self, engine, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH):
+        self.engine = engine
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        # One inference thread: the engine is not shared between threads
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.batches = 0
+
+    async def search(self, query, top_k):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((query, top_k, future, time.perf_counter()))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Grab whatever queued up meanwhile, still within max_batch
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            queries = [item[0] for item in batch]
+            top_k = max(item[1] for item in batch)
+            try:
+                results = await loop.run_in_executor(self.executor, self.engine.search_many, queries, top_k)
+            except Exception as e:
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            done = time.perf_counter()
+            for (query, k, future, started), hits in zip(batch, results):
+                self.requests += 1
+                self.latencies.append(done - started)
+                if not future.done():
+                    future.set_result(_records(hits.head(k)))
+
+    def stats(self):
+        latencies = np.asarray(self.latencies) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+            'latency_p50_ms': float(p50),
+            'latency_p99_ms': float(p99),
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+        }
+
+
+class SearchService:
+    """Minimal HTTP/1.1 front end (keep-alive, JSON only) over a MicroBatcher."""
+
+    def __init__(self, engine, host=HOST, port=PORT, worker=0):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.worker = worker
+        self.batcher = None
+        self.started = time.time()
+
+    async def serve(self, sock=None):
+        """Serves on host:port, or on an already listening `sock` (pre-fork workers)."""
+        self.batcher = MicroBatcher(self.engine)
+        batch_task = asyncio.create_task(self.batcher.run())
+        if sock is not None:
+            server = await asyncio.start_server(self.handle, sock=sock)
+        else:
+            server = await asyncio.start_server(self.handle, self.host, self.port)
+            print(f"[SERVICE] Listening on http://{self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batch_task.cancel()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.route(method, target, body)
+                data = json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if method == "POST" and body:
+            try:
+                params.update(json.loads(body))
+            except (ValueError, TypeError):
+                return "400 Bad Request", {'error': "body must be a JSON object"}
+
+        if url.path == "/search":
+            query = str(params.get('query', params.get('q', ''))).strip()
+            if not query:
+                return "400 Bad Request", {'error': "missing 'q' (or JSON 'query')"}
+            try:
+                top_k = min(max(int(params.get('top_k', 5)), 1), MAX_TOP_K)
+            except (TypeError, ValueError):
+                return "400 Bad Request", {'error': "'top_k' must be an integer"}
+            results = await self.batcher.search(query, top_k)
+            return "200 OK", {'query': query, 'results': results}
+        if url.path == "/complete":
+            prefix = str(params.get('q', ''))
+            return "200 OK", {'prefix': prefix, 'suggestions': self.engine.complete(prefix)}
+        if url.path == "/stats":
+            stats = self.batcher.stats()
+            stats['uptime_s'] = time.time() - self.started
+            stats['model_fingerprint'] = self.engine.fingerprint
+            stats['worker'] = self.worker
+            stats['pid'] = os.getpid()
+            return "200 OK", stats
+        if url.path == "/health":
+            return "200 OK", {'status': "ok"}
+        return "404 Not Found", {'error': f"unknown path '{url.path}'"}
+
+
+def serve_prefork(model, host=HOST, port=PORT, workers=WORKERS):
+    """Runs `workers` processes that share one listening socket and one mapped brain."""
+    brain = model if os.path.isdir(model) else export_brain(model)
+    if brain is None:
+        return False
+
+    sock = socket.create_server((host, port))
+    processes = [multiprocessing.Process(target=_worker_main, args=(brain, sock, i), daemon=True)
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    print(f"[SERVICE] {workers} workers listening on http://{host}:{port} (brain '{brain}')")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+    finally:
+        sock.close()
+    return True
+
+
+def export_brain(pkl_file):
+    """The .brain folder next to a .pkl, (re)exported when missing or older."""
+    brain = brain_path_for(pkl_file)
+    if os.path.isdir(brain) and os.path.getmtime(brain) >= os.path.getmtime(pkl_file):
+        return brain
+    engine = DjezzySearchAI()
+    if not engine.load_model(pkl_file) or not engine.save_brain(brain):
+        return None
+    return brain
+
+
+def _worker_main(brain, sock, worker):
+    engine = DjezzySearchAI()
+    if not engine.load_model(brain):
+        return
+    try:
+        asyncio.run(SearchService(engine, worker=worker).serve(sock=sock))
+    except KeyboardInterrupt:
+        pass
+
+
+def _records(df):
+    """Result DataFrame -> list of JSON-ready dicts (best first)."""
+    return [{c: _jsonable(v) for c, v in row.items()} for row in df.to_dict('records')]
+
+
+def _jsonable(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None   # NaN is not valid JSON
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+# --- Run the service ---
+if __name__ == "__main__":
+    model = sys.argv[1] if len(sys.argv) > 1 else brain_path_for(MODEL_FILE)
+    if not os.path.exists(model):
+        model = MODEL_FILE
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else WORKERS
+
+    if workers > 1:
+        sys.exit(0 if serve_prefork(model, port=port, workers=workers) else 1)
+
+    engine = DjezzySearchAI()
+    if not engine.load_model(model):
+        sys.exit(1)
+    try:
+        asyncio.run(SearchService(engine, port=port).serve())
+    except KeyboardInterrupt:
+        print("[SERVICE] Stopped.")
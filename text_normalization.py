@@ -0,0 +1,150 @@
+import re
+
+import numpy as np
+
+# ==========================================
+# QUERY NORMALIZATION (shared by training, batch search and the Tk interfaces)
+# ==========================================
+# One definition of "clean the text and expand synonyms", in two modes:
+#
+#   normalizer(query)          scalar, for one search
+#   normalizer.many(values)    a pandas Series / array / list at once, for
+#                              training features and batch search
+#
+# many() gives exactly the scalar output for every element. It gets its
+# speed from two things:
+#   - each distinct value is normalized once (queries repeat a lot in logs
+#     and generated datasets), then the results are spread back by code,
+#   - lowercasing and the punctuation regex run ONCE over all distinct
+#     values joined by SEPARATOR. The regex removes single characters
+#     without context, and SEPARATOR is whitespace it keeps, so the joined
+#     pass is the per-value pass. (A str.translate deletion table measured
+#     5x slower than this on non-ASCII text.)
+# No pandas import: the Tk interface loads this module too. Series input is
+# recognized by duck typing and returned as a Series with the same index.
+#
+# Each model generation keeps its own synonym table (ai_test1/2 and
+# tkinter_interface1/2 build a QueryNormalizer from theirs). SYNONYMS below
+# is the current (v4) table.
+
+PUNCTUATION = re.compile(r'[^\w\s]')
+SEPARATOR = "\x1f"   # joins the values of a batch (whitespace for both re and str.split)
+
+# --- 1. THE BRAIN: SYNONYM MAPPING (STRICTLY HARDWARE) ---
+# Removed: legend, storm, flexy, puce, net (User requirement: No internet offers)
+SYNONYMS = {
+    # Smartphones
+    "telephone": "smartphone",
+    "mobile": "smartphone",
+    "portable": "smartphone",
+    "jawl": "smartphone",
+    "hètf": "smartphone",
+    "tel": "smartphone",
+    "cellulaire": "smartphone",
+
+    # Accessories (Audio/Charge)
+    "kitman": "ecouteurs",     # Common slang for earphones
+    "ecouteur": "ecouteurs",
+    "casque": "ecouteurs",
+    "airpods": "ecouteurs",
+    "earbuds": "ecouteurs",
+    "chargeur": "accessoire",
+    "cable": "accessoire",
+    "fil": "accessoire",
+    "usb": "accessoire",
+    "powerbank": "accessoire",
+
+    # Modems/Routers
+    "wifi": "modem",           # Users say "wifi" when looking for a modem
+    "routeur": "modem",
+    "box": "modem",
+    "4g": "modem",
+
+    # Tablets
+    "tab": "tablette",
+    "ipad": "tablette"
+}
+
+
+def is_missing(value):
+    """None / NaN / NaT / pd.NA, without importing pandas."""
+    if value is None:
+        return True
+    try:
+        return bool(value != value)
+    except TypeError:   # pd.NA refuses bool()
+        return True
+
+
+class QueryNormalizer:
+    """Lowercase, drop punctuation, append the synonym after each known word."""
+
+    def __init__(self, synonyms):
+        self.synonyms = dict(synonyms)
+
+    def __call__(self, query):
+        """Cleans text and expands synonyms."""
+        if is_missing(query):
+            return ""
+        text = str(query).lower().strip()
+        text = PUNCTUATION.sub('', text)
+
+        words = text.split()
+        expanded = []
+        for w in words:
+            expanded.append(w)
+            if w in self.synonyms:
+                expanded.append(self.synonyms[w])
+
+        return " ".join(expanded)
+
+    def many(self, values):
+        """Normalizes a Series / array / list; same results as calling the scalar form on each."""
+        if hasattr(values, 'factorize'):
+            # pandas: distinct values + codes in C, missing values get code -1
+            codes, uniques = values.factorize()
+            cleaned = self._normalize_unique(list(uniques)) + [""]
+            result = np.array(cleaned, dtype=object)[codes]
+            return type(values)(result, index=values.index, name=values.name)
+
+        codes, uniques = [], {}
+        for v in values:
+            if is_missing(v):
+                v = None
+            codes.append(uniques.setdefault(v, len(uniques)))
+        cleaned = self._normalize_unique([v for v in uniques])
+        return [cleaned[c] for c in codes]
+
+    def _normalize_unique(self, values):
+        if not values:
+            return []
+        texts = ["" if v is None else str(v) for v in values]
+        joined = SEPARATOR.join(texts)
+        if joined.count(SEPARATOR) == len(texts) - 1:
+            # str.lower never creates or removes SEPARATOR, so the split realigns
+            texts = PUNCTUATION.sub('', joined.lower()).split(SEPARATOR)
+        else:   # a value contains the separator itself
+            texts = [PUNCTUATION.sub('', text.lower()) for text in texts]
+
+        synonyms = self.synonyms
+        out = []
+        for text in texts:
+            words = text.split()
+            if synonyms.keys().isdisjoint(words):
+                out.append(" ".join(words))
+                continue
+            expanded = []
+            for w in words:
+                expanded.append(w)
+                if w in synonyms:
+                    expanded.append(synonyms[w])
+            out.append(" ".join(expanded))
+        return out
+
+
+preprocess_query = QueryNormalizer(SYNONYMS)
+
+
+def normalizer_for(synonyms):
+    """preprocess_query, or a QueryNormalizer with another generation's synonym table."""
+    return preprocess_query if synonyms is None else QueryNormalizer(synonyms)
@@ -2,11 +2,11 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import pickle
 import pandas as pd
-import re
 import os
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import SGDClassifier
 from sklearn.pipeline import Pipeline
+from text_normalization import QueryNormalizer
 
 # ==========================================
 # 1. THE AI BACKEND (Synced with 10k Training)
@@ -25,19 +25,8 @@ SYNONYMS = {
     "jawl": "telephone"
 }
 
-def preprocess_query(query):
-    """Must match exactly the training preprocessing."""
-    text = str(query).lower().strip()
-    text = re.sub(r'[^\w\s]', '', text)
-    
-    words = text.split()
-    expanded = []
-    for w in words:
-        expanded.append(w)
-        if w in SYNONYMS:
-            expanded.append(SYNONYMS[w])
-            
-    return " ".join(expanded)
+# Same cleaning as every generation (text_normalization.py), with this generation's synonyms
+preprocess_query = QueryNormalizer(SYNONYMS)
 
 class DjezzySearchAI:
     def __init__(self):
@@ -1,104 +1,356 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import pickle
-import pandas as pd
-import re
+import numpy as np
 import os
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import SGDClassifier
-from sklearn.pipeline import Pipeline
+import queue
+import threading
+import time
+# NOTE: no pandas / sklearn imports here. The .brain runtime is pure
+# NumPy/SciPy, which keeps the POS cold start short (see bench_startup.py).
+# Legacy .pkl models still work: unpickling pulls those libraries in.
+from fast_search import FactorizedScorer, CandidateIndex, PrefixCompleter, QueryCache, fingerprint_bytes, top_k_positions
+from brain_format import read_brain
+from product_identity import unique_sku_positions
+from text_normalization import normalizer_for, preprocess_query
 
 # ==========================================
 # 1. THE AI BACKEND (Synced with Training)
 # ==========================================
-# STRICTLY Hardware Synonyms (No Offers/Plans)
-SYNONYMS = {
-    # Smartphones
-    "telephone": "smartphone",
-    "mobile": "smartphone",
-    "portable": "smartphone",
-    "jawl": "smartphone",
-    "hètf": "smartphone",
-    "tel": "smartphone",
-    "cellulaire": "smartphone",
-    
-    # Accessories (Audio/Charge)
-    "kitman": "ecouteurs",
-    "ecouteur": "ecouteurs",
-    "casque": "ecouteurs",
-    "airpods": "ecouteurs",
-    "earbuds": "ecouteurs",
-    "chargeur": "accessoire",
-    "cable": "accessoire",
-    "fil": "accessoire",
-    "usb": "accessoire",
-    "powerbank": "accessoire",
-    
-    # Modems/Routers
-    "wifi": "modem",
-    "routeur": "modem",
-    "box": "modem",
-    "4g": "modem",
-    
-    # Tablets
-    "tab": "tablette",
-    "ipad": "tablette"
-}
-
-def preprocess_query(query):
-    """Must match exactly the training preprocessing."""
-    text = str(query).lower().strip()
-    text = re.sub(r'[^\w\s]', '', text)
-    
-    words = text.split()
-    expanded = []
-    for w in words:
-        expanded.append(w)
-        if w in SYNONYMS:
-            expanded.append(SYNONYMS[w])
-            
-    return " ".join(expanded)
+CARD_FIELDS = ['product_name', 'category', 'description', 'price']
 
 class DjezzySearchAI:
     def __init__(self):
-        self.product_db = None
         self.pipeline = None
+        self.scorer = None
+        self.index = None
+        self.completer = None
+        # Suggestion chips repeat all day: cache results per (query, top_k)
+        self.cache = QueryCache()
+        self.score_buffer = None
+        # Card fields as plain arrays: a search only gathers the k winners
+        self.card_arrays = None
+        self.row_labels = None
+        self.search_texts = None
+        # Query cleaning of the loaded model (a converted older brain keeps its synonyms)
+        self.preprocess = preprocess_query
 
     def load_model(self, filename):
+        if os.path.isdir(filename):
+            return self.load_brain(filename)
         try:
             with open(filename, 'rb') as f:
-                model_package = pickle.load(f)
+                artifact = f.read()
+            model_package = pickle.loads(artifact)
             self.pipeline = model_package['pipeline']
-            self.product_db = model_package['database']
+            product_db = model_package['database']
+            # One card per SKU: older pickles list some products under several ids
+            product_db = product_db.iloc[unique_sku_positions(product_db['product_name'], product_db['price'],
+                                                              product_db['description'])]
+            self.search_texts = product_db['search_text'].astype(str).to_numpy()
+            self.preprocess = preprocess_query
+            self._set_catalog({c: product_db[c].to_numpy() for c in CARD_FIELDS}, product_db.index.to_numpy())
+            # Precompute product-side TF-IDF once (None -> full predict_proba)
+            self.scorer = FactorizedScorer.from_pipeline(self.pipeline, self.search_texts)
+            # Inverted index: only the best-matching products reach the classifier
+            self.index = CandidateIndex.from_texts(self._product_texts(), prior=self._score("", None))
+            # Older pickles carry no completer: build one from the catalog
+            self.completer = model_package.get('completer') or self._build_completer()
+            # A different .pkl drops the cached results of the previous one
+            self.cache.bind(fingerprint_bytes(artifact))
             return True
         except Exception as e:
             print(f"Error loading model: {e}")
             return False
 
+    def load_brain(self, dirname):
+        """Memory-maps a .brain folder (no unpickling, no re-vectorizing)."""
+        try:
+            brain = read_brain(dirname)
+            self.scorer = brain['scorer']
+            self.index = brain['index']
+            self._set_catalog({c: brain['columns'][c] for c in CARD_FIELDS}, brain['row_labels'])
+            self.preprocess = normalizer_for(brain['synonyms'])
+            self.completer = brain['completer'] or self._build_completer()
+            self.cache.bind(brain['manifest']['fingerprint'])
+            return True
+        except Exception as e:
+            print(f"Error loading brain: {e}")
+            return False
+
+    def _set_catalog(self, card_arrays, row_labels):
+        self.card_arrays = card_arrays
+        self.row_labels = row_labels
+        self.score_buffer = np.empty(len(row_labels))
+
+    def _product_texts(self):
+        # (v != v) is the NaN test without pandas
+        return [" ".join("" if v != v else str(v) for v in values)
+                for values in zip(*(self.card_arrays[c] for c in ['product_name', 'category', 'description']))]
+
+    def _build_completer(self):
+        names = ["" if v != v else str(v) for v in self.card_arrays['product_name']]
+        return PrefixCompleter.from_catalog(names, self._product_texts(), synonyms=list(self.preprocess.synonyms))
+
+    def complete(self, prefix, k=8):
+        """Autocomplete suggestions (cheap enough to run on every key press)."""
+        if self.completer is None: return []
+        return self.completer.complete(prefix, k)
+
     def search(self, user_query, top_k=15):
-        if self.product_db is None: return pd.DataFrame()
+        """Top products as a list of card dicts (best first)."""
+        if self.card_arrays is None: return []
         
-        clean_query = preprocess_query(user_query)
+        clean_query = self.preprocess(user_query)
+        cached = self.cache.get((clean_query, top_k))
+        if cached is not None:
+            return cached
         
-        # Create candidates matching training feature format
-        candidates = self.product_db.copy()
-        candidate_features = clean_query + " | " + candidates['search_text']
+        rows = self.index.candidates(clean_query) if self.index is not None else None
+        n_rows = len(self.row_labels) if rows is None else len(rows)
         
         try:
-            # Get AI Probability
-            probs = self.pipeline.predict_proba(candidate_features)[:, 1]
-            candidates['ai_score'] = probs
+            # Get AI Probability (written into the reusable buffer)
+            probs = self._score(clean_query, rows, out=self.score_buffer[:n_rows])
             
-            # Return top results
-            return candidates.sort_values(by='ai_score', ascending=False).head(top_k)
+            # Return top results: partial selection, only k rows materialized
+            best = top_k_positions(probs, top_k)
+            positions = best if rows is None else rows[best]
+            results = []
+            for pos, score in zip(positions, probs[best]):
+                card = {c: values[pos] for c, values in self.card_arrays.items()}
+                card['ai_score'] = float(score)
+                results.append(card)
+            self.cache.put((clean_query, top_k), results)
+            return results
         except Exception as e:
             print(f"Search error: {e}")
-            return pd.DataFrame()
+            return []
+
+    def _score(self, clean_query, rows, out=None):
+        if self.scorer is not None:
+            return self.scorer.score(clean_query, rows, out=out)
+        # Create candidates matching training feature format
+        search_texts = self.search_texts if rows is None else self.search_texts[rows]
+        probs = self.pipeline.predict_proba([clean_query + " | " + t for t in search_texts])[:, 1]
+        if out is None:
+            return probs
+        out[:] = probs
+        return out
+
+class SearchWorker(threading.Thread):
+    """Runs engine.search off the Tk main thread.
+
+    Every submit() gets a new generation number; only the newest one
+    matters. Requests that were superseded before starting are skipped and
+    results of superseded ones are dropped, so a fast typist never waits
+    for (or sees) stale queries. The UI collects results with poll(),
+    called from Tk's after() loop (Tk itself is not thread-safe).
+    """
+
+    def __init__(self, engine):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.latest = 0
+        self._lock = threading.Lock()
+
+    def submit(self, query, top_k):
+        with self._lock:
+            self.latest += 1
+            generation = self.latest
+        self.requests.put((generation, query, top_k))
+        return generation
+
+    def cancel(self):
+        """Makes every queued or running request stale."""
+        with self._lock:
+            self.latest += 1
+
+    def is_current(self, generation):
+        return generation == self.latest
+
+    def run(self):
+        while True:
+            generation, query, top_k = self.requests.get()
+            if not self.is_current(generation):
+                continue   # superseded before it started
+            start = time.perf_counter()
+            try:
+                results = self.engine.search(query, top_k=top_k)
+            except Exception as e:
+                print(f"Search error: {e}")
+                results = []
+            if self.is_current(generation):
+                self.results.put((generation, query, results, time.perf_counter() - start))
+
+    def poll(self):
+        """Newest still-current result as (query, results, seconds), or None."""
+        latest = None
+        while True:
+            try:
+                generation, query, results, seconds = self.results.get_nowait()
+            except queue.Empty:
+                return latest
+            if self.is_current(generation):
+                latest = (query, results, seconds)
+
+class ResultCard:
+    """One reusable result card; fill() rebinds it to another product row."""
+
+    BAR_WIDTH = 150
+
+    def __init__(self, parent, colors, fonts):
+        self.colors = colors
+        self.frame = tk.Frame(parent, bg="white", padx=15, pady=12)
+        
+        # 1. Header: Name + Price
+        header = tk.Frame(self.frame, bg="white")
+        header.pack(fill="x")
+        self.name_lbl = tk.Label(header, font=fonts["title"], bg="white", fg=colors["dark"])
+        self.name_lbl.pack(side="left")
+        self.price_lbl = tk.Label(header, font=fonts["price"], bg="white", fg=colors["primary"])
+        self.price_lbl.pack(side="right")
+        
+        # 2. Category Tag
+        self.cat_lbl = tk.Label(self.frame, font=("Segoe UI", 8, "bold"), bg="white", fg="#0984e3", anchor="w")
+        self.cat_lbl.pack(fill="x", pady=(2,0))
+
+        # 3. Description
+        self.desc_lbl = tk.Label(self.frame, font=("Segoe UI", 9), bg="white", fg="#636E72", anchor="w")
+        self.desc_lbl.pack(fill="x", pady=(2, 8))
+
+        # 4. AI Confidence Bar
+        bar_frame = tk.Frame(self.frame, bg="white")
+        bar_frame.pack(fill="x")
+        tk.Label(bar_frame, text="Match:", font=("Segoe UI", 7, "bold"), bg="white", fg="#B2BEC3").pack(side="left")
+        progress_bg = tk.Frame(bar_frame, bg="#F0F2F5", height=5, width=self.BAR_WIDTH)
+        progress_bg.pack(side="left", padx=10)
+        progress_bg.pack_propagate(False)
+        self.progress_fill = tk.Frame(progress_bg, height=5, width=0)
+        self.progress_fill.pack(side="left")
+        self.score_lbl = tk.Label(bar_frame, font=("Segoe UI", 8, "bold"), bg="white")
+        self.score_lbl.pack(side="right")
+
+    def fill(self, row):
+        """Updates labels and bar width in place (no widget is created)."""
+        self.name_lbl.config(text=row['product_name'])
+        self.price_lbl.config(text=f"{row['price']}")
+        self.cat_lbl.config(text=f"[{row.get('category', 'Product')}]")
+
+        desc = str(row['description'])
+        if len(desc) > 80: desc = desc[:80] + "..." 
+        self.desc_lbl.config(text=desc)
+
+        score = int(row['ai_score'] * 100)
+        bar_color = self.colors["accent"] if score > 75 else self.colors["medium"]
+        self.progress_fill.config(width=int((score / 100) * self.BAR_WIDTH), bg=bar_color)
+        self.score_lbl.config(text=f"{score}%", fg=bar_color)
+
+
+class VirtualResultList:
+    """Scrollable results canvas that only realizes the cards in the viewport.
+
+    Cards come from a small pool (about one screen's worth). Row i is shown
+    by pool slot i % pool size, placed at i * ROW_HEIGHT, so scrolling only
+    re-fills the rows that come into view and a new result set is a handful
+    of label updates, whether it has 20 rows or 500.
+    """
+
+    ROW_HEIGHT = 124    # card + vertical gap
+    CARD_HEIGHT = 112
+    GAP = 6
+    WIDTH = 550
+
+    def __init__(self, container, colors, fonts):
+        self.colors = colors
+        self.fonts = fonts
+        self.canvas = tk.Canvas(container, bg=colors["bg"], highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(container, orient="vertical", command=self.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.rows = []
+        self.pool = []          # (ResultCard, canvas window id)
+        self.slot_rows = []     # row index currently shown by each slot
+        self.message_item = self.canvas.create_text(self.WIDTH // 2, 60, text="", fill="#b2bec3",
+                                                    font=("Segoe UI", 11), justify="center")
+
+        self.canvas.bind("<Configure>", lambda e: self.render())
+        # Mouse wheel only while the pointer is over the results
+        self.canvas.bind("<Enter>", lambda e: self._bind_wheel(True))
+        self.canvas.bind("<Leave>", lambda e: self._bind_wheel(False))
+
+    def set_rows(self, rows):
+        self.rows = list(rows)
+        self.slot_rows = [None] * len(self.pool)
+        self.canvas.itemconfigure(self.message_item, text="")
+        self.canvas.configure(scrollregion=(0, 0, self.WIDTH, max(1, len(self.rows) * self.ROW_HEIGHT)))
+        self.canvas.yview_moveto(0)
+        self.render()
+
+    def show_message(self, text):
+        self.set_rows([])
+        self.canvas.itemconfigure(self.message_item, text=text)
+
+    def clear(self):
+        self.set_rows([])
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.render()
+
+    def render(self):
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.ROW_HEIGHT)
+        first = max(0, int(top // self.ROW_HEIGHT))
+        last = min(len(self.rows), int((top + height) // self.ROW_HEIGHT) + 1)
+
+        # Grow the pool to one screen's worth; slots are re-bound afterwards
+        needed = last - first
+        if needed > len(self.pool):
+            while len(self.pool) < needed:
+                card = ResultCard(self.canvas, self.colors, self.fonts)
+                item = self.canvas.create_window(0, 0, window=card.frame, anchor="nw",
+                                                 width=self.WIDTH, height=self.CARD_HEIGHT, state="hidden")
+                self.pool.append((card, item))
+            self.slot_rows = [None] * len(self.pool)
+
+        shown = set()
+        for i in range(first, last):
+            slot = i % len(self.pool)
+            card, item = self.pool[slot]
+            if self.slot_rows[slot] != i:
+                card.fill(self.rows[i])
+                self.slot_rows[slot] = i
+            self.canvas.coords(item, 0, i * self.ROW_HEIGHT + self.GAP)
+            self.canvas.itemconfigure(item, state="normal")
+            shown.add(slot)
+        for slot, (card, item) in enumerate(self.pool):
+            if slot not in shown:
+                self.canvas.itemconfigure(item, state="hidden")
+                self.slot_rows[slot] = None
+
+    def _bind_wheel(self, active):
+        if active:
+            self.canvas.bind_all("<MouseWheel>", lambda e: self.yview("scroll", int(-e.delta / 120), "units"))
+            self.canvas.bind_all("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+            self.canvas.bind_all("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+        else:
+            for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.canvas.unbind_all(seq)
 
 # ==========================================
 # 2. THE MODERN UI
 # ==========================================
 class DjezzySearchApp(tk.Tk):
+    DEBOUNCE_MS = 250      # pause in typing before a live search fires
+    POLL_MS = 30           # how often the UI picks up worker results
+    MIN_LIVE_CHARS = 2     # no live search for a single letter
+    MAX_SUGGESTIONS = 8    # autocomplete dropdown rows
+
     def __init__(self):
         super().__init__()
 
@@ -128,8 +380,10 @@ class DjezzySearchApp(tk.Tk):
         self.engine = DjezzySearchAI()
         self.model_loaded = False
         
-        # SYNCED FILENAME
+        # SYNCED FILENAME (the memory-mapped .brain folder is preferred when present)
         model_filename = "djezzy_ai_brain4.pkl"
+        if os.path.isdir("djezzy_ai_brain4.brain"):
+            model_filename = "djezzy_ai_brain4.brain"
         
         if os.path.exists(model_filename):
             if self.engine.load_model(model_filename):
@@ -150,6 +404,14 @@ class DjezzySearchApp(tk.Tk):
         # Press Enter to search
         self.bind('<Return>', lambda event: self.run_search())
 
+        # Search-as-you-type: debounced, executed by the background worker
+        self.worker = SearchWorker(self.engine)
+        self.worker.start()
+        self._debounce_id = None
+        self._last_live_query = ""
+        self.entry.bind('<KeyRelease>', self.on_key_release)
+        self.after(self.POLL_MS, self.poll_results)
+
     def create_header(self):
         header = tk.Frame(self, bg=self.COLORS["primary"], height=100)
         header.pack(fill="x")
@@ -179,6 +441,17 @@ class DjezzySearchApp(tk.Tk):
         self.entry.pack(fill="x", padx=15, pady=12)
         self.entry.focus()
 
+        # Autocomplete dropdown, placed under the entry while there are suggestions
+        self.entry_frame = entry_frame
+        self.suggest_box = tk.Listbox(self, font=self.FONTS["body"], bd=1, relief="solid",
+                                      activestyle="none", selectbackground=self.COLORS["primary"],
+                                      height=self.MAX_SUGGESTIONS)
+        self.suggest_box.bind('<ButtonRelease-1>', self.on_suggestion_click)
+        self.entry.bind('<Down>', lambda e: self.move_suggestion(1))
+        self.entry.bind('<Up>', lambda e: self.move_suggestion(-1))
+        self.entry.bind('<Escape>', lambda e: self.hide_suggestions())
+        self.entry.bind('<Return>', self.on_entry_return)
+
         # Buttons
         btn_frame = tk.Frame(frame, bg=self.COLORS["bg"])
         btn_frame.pack(fill="x", pady=(15,0))
@@ -221,17 +494,8 @@ class DjezzySearchApp(tk.Tk):
         container = tk.Frame(self, bg=self.COLORS["bg"])
         container.pack(fill="both", expand=True, padx=15, pady=5)
 
-        self.canvas = tk.Canvas(container, bg=self.COLORS["bg"], highlightthickness=0)
-        self.scrollbar = ttk.Scrollbar(container, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = tk.Frame(self.canvas, bg=self.COLORS["bg"])
-
-        self.scrollable_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-        
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw", width=550)
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-
-        self.canvas.pack(side="left", fill="both", expand=True)
-        self.scrollbar.pack(side="right", fill="y")
+        # Virtualized list: pooled cards, only the visible ones are realized
+        self.results_list = VirtualResultList(container, self.COLORS, self.FONTS)
 
     def create_footer(self):
         footer = tk.Frame(self, bg="#DFE6E9", height=35)
@@ -246,15 +510,95 @@ class DjezzySearchApp(tk.Tk):
 
     def fill_search(self, text):
         self.search_var.set(text)
+        self.entry.icursor("end")
         self.run_search()
 
+    # --- Autocomplete ---
+
+    def update_suggestions(self):
+        suggestions = self.engine.complete(self.search_var.get(), self.MAX_SUGGESTIONS) if self.model_loaded else []
+        self.suggest_box.delete(0, "end")
+        if not suggestions:
+            self.hide_suggestions()
+            return
+        for text in suggestions:
+            self.suggest_box.insert("end", text)
+        self.suggest_box.config(height=len(suggestions))
+        self.suggest_box.place(in_=self.entry_frame, relx=0, rely=1, relwidth=1)
+        self.suggest_box.lift()
+
+    def hide_suggestions(self):
+        self.suggest_box.selection_clear(0, "end")
+        self.suggest_box.place_forget()
+
+    def move_suggestion(self, step):
+        size = self.suggest_box.size()
+        if not size or not self.suggest_box.winfo_ismapped():
+            return "break"
+        current = self.suggest_box.curselection()
+        index = (current[0] + step) % size if current else (0 if step > 0 else size - 1)
+        self.suggest_box.selection_clear(0, "end")
+        self.suggest_box.selection_set(index)
+        self.suggest_box.see(index)
+        return "break"
+
+    def on_suggestion_click(self, event):
+        index = self.suggest_box.nearest(event.y)
+        if index >= 0:
+            self.pick_suggestion(self.suggest_box.get(index))
+
+    def on_entry_return(self, event):
+        current = self.suggest_box.curselection()
+        if current and self.suggest_box.winfo_ismapped():
+            self.pick_suggestion(self.suggest_box.get(current[0]))
+            return "break"   # the window-level <Return> would search the typed prefix
+        self.hide_suggestions()
+
+    def pick_suggestion(self, text):
+        self.hide_suggestions()
+        self.fill_search(text)
+
     def reset_app(self):
+        self.worker.cancel()
+        self._cancel_debounce()
+        self._last_live_query = ""
         self.search_var.set("")
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        self.hide_suggestions()
+        self.results_list.clear()
         self.status_lbl.config(text="System Ready")
         self.entry.focus()
 
+    def on_key_release(self, event):
+        if event.keysym in ('Return', 'Up', 'Down', 'Escape'):
+            return
+        # Suggestions are sub-millisecond: refresh them on every key press
+        self.update_suggestions()
+        self._cancel_debounce()
+        self._debounce_id = self.after(self.DEBOUNCE_MS, self.live_search)
+
+    def _cancel_debounce(self):
+        if self._debounce_id is not None:
+            self.after_cancel(self._debounce_id)
+            self._debounce_id = None
+
+    def live_search(self):
+        self._debounce_id = None
+        query = self.search_var.get().strip()
+        if not self.model_loaded or query == self._last_live_query:
+            return
+        self._last_live_query = query
+        if len(query) < self.MIN_LIVE_CHARS:
+            # Nothing will answer the last submit: drop its cards and status
+            self.worker.cancel()
+            self.results_list.clear()
+            if query:
+                self.status_lbl.config(text=f"Type {self.MIN_LIVE_CHARS}+ characters or press Enter")
+            else:
+                self.status_lbl.config(text="System Ready")
+            return
+        self.worker.submit(query, 20)
+        self.status_lbl.config(text="Searching...")
+
     def run_search(self):
         if not self.model_loaded: 
             messagebox.showerror("Error", "AI Model not loaded!")
@@ -263,69 +607,32 @@ class DjezzySearchApp(tk.Tk):
         query = self.search_var.get()
         if not query.strip(): return
 
-        # Clear previous results
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        # Perform AI Search (off the Tk thread)
+        self.hide_suggestions()
+        self._cancel_debounce()
+        self._last_live_query = query.strip()
+        self.worker.submit(query, 20)
+        self.status_lbl.config(text="Searching...")
 
-        # Perform AI Search
-        results = self.engine.search(query, top_k=20)
-        
+    def poll_results(self):
+        done = self.worker.poll()
+        if done is not None:
+            self.show_results(*done)
+        self.after(self.POLL_MS, self.poll_results)
+
+    def show_results(self, query, results, seconds):
         # Filter by relevance
-        relevant = results[results['ai_score'] > 0.35]
+        relevant = [row for row in results if row['ai_score'] > 0.35]
 
-        if relevant.empty:
-            lbl = tk.Label(self.scrollable_frame, text=f"No hardware found for '{query}'", 
-                           bg=self.COLORS["bg"], fg="#b2bec3", font=("Segoe UI", 11), justify="center")
-            lbl.pack(pady=50)
-            self.status_lbl.config(text="0 results found.")
+        elapsed_ms = seconds * 1000
+        if not relevant:
+            self.results_list.show_message(f"No hardware found for '{query}'")
+            self.status_lbl.config(text=f"0 results in {elapsed_ms:.0f} ms")
         else:
             count = len(relevant)
-            self.status_lbl.config(text=f"Found {count} products.")
-            for _, row in relevant.iterrows():
-                self.draw_card(row)
-
-    def draw_card(self, row):
-        card = tk.Frame(self.scrollable_frame, bg="white", padx=15, pady=12)
-        card.pack(fill="x", pady=6)
-        
-        # 1. Header: Name + Price
-        header = tk.Frame(card, bg="white")
-        header.pack(fill="x")
-        
-        tk.Label(header, text=row['product_name'], font=self.FONTS["title"], 
-                 bg="white", fg=self.COLORS["dark"]).pack(side="left")
-        
-        tk.Label(header, text=f"{row['price']}", font=self.FONTS["price"], 
-                 bg="white", fg=self.COLORS["primary"]).pack(side="right")
-        
-        # 2. Category Tag
-        cat_text = row.get('category', 'Product')
-        tk.Label(card, text=f"[{cat_text}]", font=("Segoe UI", 8, "bold"), 
-                 bg="white", fg="#0984e3", anchor="w").pack(fill="x", pady=(2,0))
-
-        # 3. Description
-        desc = str(row['description'])
-        if len(desc) > 80: desc = desc[:80] + "..." 
-        tk.Label(card, text=desc, font=("Segoe UI", 9), bg="white", fg="#636E72", anchor="w").pack(fill="x", pady=(2, 8))
-
-        # 4. AI Confidence Bar
-        score = int(row['ai_score'] * 100)
-        bar_color = self.COLORS["accent"] if score > 75 else self.COLORS["medium"]
-        
-        bar_frame = tk.Frame(card, bg="white")
-        bar_frame.pack(fill="x")
-        
-        tk.Label(bar_frame, text="Match:", font=("Segoe UI", 7, "bold"), bg="white", fg="#B2BEC3").pack(side="left")
-        
-        progress_bg = tk.Frame(bar_frame, bg="#F0F2F5", height=5, width=150)
-        progress_bg.pack(side="left", padx=10)
-        progress_bg.pack_propagate(False)
-        
-        fill_width = int((score / 100) * 150)
-        progress_fill = tk.Frame(progress_bg, bg=bar_color, height=5, width=fill_width)
-        progress_fill.pack(side="left")
-        
-        tk.Label(bar_frame, text=f"{score}%", font=("Segoe UI", 8, "bold"), bg="white", fg=bar_color).pack(side="right")
+            self.status_lbl.config(text=f"{count} results in {elapsed_ms:.0f} ms")
+            # Cards are re-filled in place, not destroyed and rebuilt
+            self.results_list.set_rows(relevant)
 
 if __name__ == "__main__":
     app = DjezzySearchApp()